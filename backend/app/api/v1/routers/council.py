@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Optional
 from uuid import UUID
 import os
 
@@ -14,25 +14,36 @@ from fastapi import (
     File,
     HTTPException,
     UploadFile,
-    BackgroundTasks,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.core.deps import TestUser, get_current_project, get_current_user, get_db
-from app.db.session import SessionLocal
 from app.crud import document as document_crud
 from app.models.chat_message import ChatMessage, ChatRole
-from app.models.document import Document
+from app.models.document import Document, DocumentStatus
 from app.models.project import Project
 from app.models.risk_alert import RiskAlert, RiskSeverity, RiskStatus
 from app.schemas.document import DocumentCreate, DocumentResponse, DocumentUploadResponse
-from app.schemas.risk_alert import RiskAlertResponse, RiskAlertUpdate
+from app.schemas.job import JobResponse
+from app.schemas.risk_alert import (
+    RiskAlertResponse,
+    RiskAlertUpdate,
+    RiskKeywordSchema,
+    RiskKeywordTaxonomy,
+)
 from app.services.claude_service import ClaudeService
-from app.services.risk_scanner import RiskScannerService
+from app.services.keyword_matcher import Keyword
+from app.services.risk_scanner import RiskKeywordService, RiskScannerService
 from app.services.notification_service import NotificationService
-from app.tasks.document_tasks import process_document
+from app.services.document_chunks import DocumentChunkService
+from app.services.document_storage import DocumentStorage
+from app.services.job_queue import JobQueue
+from app.services.upload_storage import UploadTooLargeError, safe_filename
+from app.tasks.document_tasks import DOCUMENT_PIPELINE
+from app.tasks.job_worker import job_worker
 from app.core.config import settings
 
 
@@ -40,16 +51,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/council", tags=["council"])
 
-UPLOAD_ROOT = Path("uploads")
-
-
 @router.post(
     "/upload",
     response_model=DocumentUploadResponse,
     status_code=status.HTTP_201_CREATED,
 )
 async def upload_document(
-    background_tasks: BackgroundTasks,
     project: Any = Depends(get_current_project),
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -58,19 +65,27 @@ async def upload_document(
     """Upload a document for a project and create a Document record."""
     project_id: UUID = project.id  # type: ignore[assignment]
 
-    # Save file to local storage: ./uploads/{tenant_id}/{project_id}/
-    target_dir = UPLOAD_ROOT / str(current_user.tenant_id) / str(project_id)
-    target_dir.mkdir(parents=True, exist_ok=True)
-    target_path = target_dir / file.filename
-
-    content = await file.read()
-    with target_path.open("wb") as f:
-        f.write(content)
+    # Content-addressed: identical bytes are stored once across projects
+    storage = DocumentStorage()
+    try:
+        file_name = safe_filename(file.filename)
+        blob, deduplicated = await storage.store(
+            db,
+            file,
+            file_name,
+            tenant_id=current_user.tenant_id,
+            max_bytes=settings.upload_max_bytes,
+            chunk_size=settings.upload_chunk_size,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # Determine file type from extension
     file_type = file.content_type or "application/octet-stream"
     if not file.content_type:
-        ext = Path(file.filename).suffix.lower()
+        ext = Path(file_name).suffix.lower()
         if ext == ".pdf":
             file_type = "application/pdf"
         elif ext in [".docx", ".doc"]:
@@ -80,9 +95,10 @@ async def upload_document(
 
     doc_in = DocumentCreate(
         project_id=project_id,
-        file_name=file.filename,
-        file_path=str(target_path),
+        file_name=file_name,
+        file_path=blob.storage_path,
         file_type=file_type,
+        meta_data={"size": blob.size, "sha256": blob.sha256},
     )
     db_doc: Document = document_crud.create_document(
         db,
@@ -91,26 +107,42 @@ async def upload_document(
     )
 
     logger.info(
-        "Document uploaded id=%s project_id=%s tenant_id=%s",
+        "Document uploaded id=%s project_id=%s tenant_id=%s deduplicated=%s",
         db_doc.id,
         project_id,
         current_user.tenant_id,
+        deduplicated,
     )
 
-    # Kick off background text extraction / embedding status update
-    background_tasks.add_task(process_document, SessionLocal, str(db_doc.id))
-    # Also scan for risks after document is processed
-    background_tasks.add_task(
-        scan_document_risks_background,
+    stages = DOCUMENT_PIPELINE
+    if deduplicated and blob.extracted_text is not None:
+        # Same content was already processed for another document of the tenant
+        db_doc.status = DocumentStatus.READY
+        db_doc.extracted_text = blob.extracted_text
+        # Chunking and embedding a whole document is blocking work
+        await run_in_threadpool(DocumentChunkService().store, db, db_doc, blob.extracted_text)
+        stages = DOCUMENT_PIPELINE[1:]
+    # Extraction, then the risk scan, run on the job worker
+    job = JobQueue().enqueue_pipeline(
+        db,
+        stages,
+        {"document_id": str(db_doc.id), "notify_user_id": current_user.id},
+        tenant_id=current_user.tenant_id,
+        project_id=project_id,
         document_id=db_doc.id,
-        project_owner_id=current_user.id,
     )
+    db.commit()
+    job_worker.notify()
 
     return DocumentUploadResponse(
         id=db_doc.id,
         project_id=db_doc.project_id,
         file_name=db_doc.file_name,
-        url=str(target_path),
+        url=blob.storage_path,
+        size=blob.size,
+        sha256=blob.sha256,
+        deduplicated=deduplicated,
+        job_id=job.id,
     )
 
 
@@ -147,15 +179,12 @@ def delete_document(
             detail="Not enough permissions to delete this document",
         )
 
-    # Optionally delete file from disk
-    try:
-        path_obj = Path(db_doc.file_path)
-        if path_obj.exists():
-            path_obj.unlink()
-    except OSError:
-        logger.warning("Failed to delete file at %s", db_doc.file_path)
-
+    # The file is shared with other documents of the same content
+    storage = DocumentStorage()
+    released = storage.release(db, db_doc)
     document_crud.delete_document(db, db_obj=db_doc)
+    storage.delete_files(released)
+    DocumentChunkService().compact_vectors(db, project.id)
     logger.info(
         "Document deleted id=%s project_id=%s tenant_id=%s",
         document_id,
@@ -164,14 +193,54 @@ def delete_document(
     )
 
 
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> JobResponse:
+    """Status of a background job (document processing, risk scan)."""
+    job = JobQueue().get(db, job_id)
+    if job is None or job.tenant_id != current_user.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return JobResponse.model_validate(job)
+
+
+@router.get("/documents/{document_id}/jobs", response_model=List[JobResponse])
+def list_document_jobs(
+    document_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> List[JobResponse]:
+    """Every processing stage queued for a document, oldest first."""
+    db_doc = document_crud.get_document(db, document_id=document_id)
+    if not db_doc or db_doc.project.tenant_id != current_user.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found",
+        )
+    return [JobResponse.model_validate(job) for job in JobQueue().for_document(db, document_id)]
+
+
 class CouncilQueryRequest(BaseModel):
     project_id: UUID
     query: str
 
 
+class CouncilCitation(BaseModel):
+    document_id: UUID
+    page_number: Optional[int] = None
+    start_offset: int
+    end_offset: int
+
+
 class CouncilQueryResponse(BaseModel):
     answer: str
     sources: List[UUID]
+    citations: List[CouncilCitation] = []
 
 
 @router.post("/query", response_model=CouncilQueryResponse)
@@ -192,31 +261,26 @@ async def council_query(
             detail="Project not found",
         )
 
-    docs = document_crud.list_documents_for_project(db, project_id=project.id)
-    if not docs:
+    if not document_crud.project_has_documents(db, project_id=project.id):
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="No documents available for this project",
         )
 
-    contents: List[str] = []
-    used_ids: List[UUID] = []
-    for d in docs:
-        try:
-            path_obj = Path(d.file_path)
-            if not path_obj.exists():
-                continue
-            text = path_obj.read_text(encoding="utf-8", errors="ignore")
-            contents.append(text)
-            used_ids.append(d.id)
-        except OSError:
-            continue
-
-    if not contents:
+    # Chunks, BM25 postings and embeddings were stored at ingestion; no
+    # document or file is read per query. Questions matching nothing fall
+    # back to the leading chunks in upload order.
+    chunk_service = DocumentChunkService()
+    top_k = settings.council_retrieval_top_k
+    chunks = chunk_service.retrieve(db, project.id, payload.query, limit=top_k)
+    if not chunks:
+        chunks = chunk_service.by_position(chunk_service.for_project(db, project.id, limit=top_k))
+    if not chunks:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Documents could not be read",
         )
+    used_ids = list(dict.fromkeys(chunk.document_id for chunk in chunks))
 
     api_key = os.getenv("ANTHROPIC_API_KEY", "") or getattr(settings, "anthropic_api_key", "")
     if not api_key:
@@ -225,7 +289,9 @@ async def council_query(
             detail="Claude API key not configured",
         )
     service = ClaudeService(api_key=api_key)
-    rag_result = await service.query_with_context(payload.query, docs)
+    rag_result = await service.query_with_context(
+        payload.query, chunks, max_context_tokens=settings.council_context_tokens
+    )
     answer = rag_result["answer"]
     sources_ids = [UUID(s) for s in rag_result.get("sources", [])]
 
@@ -251,7 +317,11 @@ async def council_query(
         current_user.tenant_id,
     )
 
-    return CouncilQueryResponse(answer=answer, sources=sources_ids or used_ids)
+    return CouncilQueryResponse(
+        answer=answer,
+        sources=sources_ids or used_ids,
+        citations=rag_result.get("citations", []),
+    )
 
 
 @router.post("/projects/{project_id}/scan-risks", response_model=dict)
@@ -406,6 +476,50 @@ async def update_risk_status(
     return RiskAlertResponse.model_validate(risk)
 
 
+@router.get("/risk-keywords", response_model=RiskKeywordTaxonomy)
+def get_risk_keywords(
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> RiskKeywordTaxonomy:
+    """Risk keywords used to scan the tenant's documents."""
+    custom, keywords = RiskKeywordService().taxonomy(db, current_user.tenant_id)
+    return _keyword_taxonomy(custom, keywords)
+
+
+@router.put("/risk-keywords", response_model=RiskKeywordTaxonomy)
+def replace_risk_keywords(
+    payload: RiskKeywordTaxonomy,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> RiskKeywordTaxonomy:
+    """
+    Replace the tenant's risk keywords; an empty list restores the built-in ones.
+
+    Applies to documents scanned from now on.
+    """
+    service = RiskKeywordService()
+    try:
+        service.replace(
+            db,
+            current_user.tenant_id,
+            [Keyword(kw.category.value, kw.keyword, kw.match_mode) for kw in payload.keywords],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    custom, keywords = service.taxonomy(db, current_user.tenant_id)
+    return _keyword_taxonomy(custom, keywords)
+
+
+def _keyword_taxonomy(custom: bool, keywords: List[Keyword]) -> RiskKeywordTaxonomy:
+    return RiskKeywordTaxonomy(
+        custom=custom,
+        keywords=[
+            RiskKeywordSchema(category=kw.category, keyword=kw.text, match_mode=kw.mode)
+            for kw in keywords
+        ],
+    )
+
+
 @router.post("/projects/{project_id}/insights", response_model=dict)
 async def generate_project_insights(
     project_id: UUID,
@@ -430,9 +544,7 @@ async def generate_project_insights(
             detail="Project not found",
         )
 
-    # Get all documents
-    docs = document_crud.list_documents_for_project(db, project_id=project.id)
-    if not docs:
+    if not document_crud.project_has_documents(db, project_id=project.id):
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="No documents available for this project",
@@ -464,8 +576,18 @@ Format your response as JSON:
     "threats": ["threat 1", "threat 2", ...]
 }"""
 
+    chunk_service = DocumentChunkService()
+    chunks = chunk_service.by_position(chunk_service.for_project(db, project.id))
+    if not chunks:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Documents could not be read",
+        )
+
     try:
-        result = await service.query_with_context(prompt, docs)
+        result = await service.query_with_context(
+            prompt, chunks, max_context_tokens=settings.council_context_tokens
+        )
         answer = result["answer"]
 
         # Try to parse JSON from response
@@ -500,35 +622,3 @@ Format your response as JSON:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate insights: {str(e)}",
         )
-
-
-async def scan_document_risks_background(document_id: UUID, project_owner_id: int):
-    """Background task to scan document and notify user."""
-    db = SessionLocal()
-    try:
-        api_key = os.getenv("ANTHROPIC_API_KEY", "") or getattr(
-            settings, "anthropic_api_key", ""
-        )
-        if not api_key:
-            logger.warning("Claude API key not configured, skipping risk scan")
-            return
-
-        scanner = RiskScannerService(api_key=api_key)
-        risks = await scanner.scan_document(db, document_id)
-
-        if risks:
-            notif_service = NotificationService()
-            for risk in risks:
-                await notif_service.notify_risk_detected(db, risk, project_owner_id)
-
-        logger.info(
-            "Background risk scan completed document_id=%s risks=%d",
-            document_id,
-            len(risks),
-        )
-    except Exception as e:
-        logger.error("Error in background risk scan: %s", e)
-    finally:
-        db.close()
-
-
@@ -2,18 +2,40 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-from typing import Any, Dict, List
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.core.deps import TestUser, get_current_project, get_current_user, get_db
 from app.crud import variable as variable_crud
+from app.db.session import SessionLocal
 from app.models.project import Project
 from app.models.variable import Variable, VariableCategory, ValueType
+from app.schemas.model_version import (
+    ModelVersionCreate,
+    ModelVersionDiff,
+    ModelVersionResponse,
+)
+from app.schemas.scenario import ScenarioCreate, ScenarioResponse, ScenarioUpdate
 from app.schemas.variable import (
     VariableCreate,
     VariableResponse,
@@ -22,9 +44,20 @@ from app.schemas.variable import (
 from app.services.dependency_resolver import DependencyResolver
 from app.services.formula_parser import FormulaParser
 from app.services.loom_engine import LoomEngine
+from app.services.loom_optimizer import Constraint, DecisionVariable, LoomOptimizer
+from app.services.loom_profiler import critical_path, loom_profiler
+from app.services.model_evaluator import ModelEvaluator
+from app.services.portfolio_service import PortfolioService
+from app.services.project_clone_service import ProjectCloneService
+from app.services.recalculation_jobs import RecalculationJob, recalculation_jobs
+from app.services.scenario_service import ScenarioService
 from app.services.template_service import TemplateService
+from app.services.value_history import ValueHistoryService
+from app.services.variable_import import VariableImportService
+from app.services.version_service import VersionService
 from app.models.model_template import ModelTemplate
 from app.models.model_version import ModelVersion
+from app.models.scenario import Scenario
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +95,9 @@ async def get_project_variables(
             detail="Project not found",
         )
 
-    variables = variable_crud.list_variables_for_project(db, project_id=project_id)
+    # Copy-on-write clones also list the variables inherited from their parent
+    variables, _ = ProjectCloneService().effective_variables(db, project_id)
+    variables.sort(key=lambda var: var.created_at)
 
     # Group by category
     grouped: Dict[str, List[VariableResponse]] = {
@@ -80,6 +115,57 @@ async def get_project_variables(
     return grouped
 
 
+@router.get("/projects/{project_id}/values")
+async def get_project_values(
+    project: Project = Depends(get_current_project),
+    layout: Literal["map", "columnar"] = Query(
+        "map",
+        alias="format",
+        description="{key: value} map or {keys: [...], values: [...]} arrays",
+    ),
+    keys: Optional[str] = Query(None, description="Comma-separated variable keys"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    Current values only, for dashboards and embedded charts.
+
+    Reads just the key and value columns (the raw value for inputs that
+    were never calculated) and answers with an ETag; a request whose
+    If-None-Match matches gets an empty 304.
+    """
+    rows = [
+        (key, calculated or raw, order)
+        for key, calculated, raw, order in ProjectCloneService().effective_columns(
+            db,
+            project.id,
+            [Variable.calculated_value, Variable.raw_value, Variable.display_order],
+        )
+    ]
+    if keys:
+        wanted = {key.strip() for key in keys.split(",") if key.strip()}
+        rows = [row for row in rows if row[0] in wanted]
+    rows.sort(key=lambda row: (row[2] or 0, row[0]))
+
+    digest = hashlib.blake2b(layout.encode(), digest_size=16)
+    for key, value, _ in rows:
+        digest.update(f"{key}\0{value}\0".encode())
+    etag = f'"{digest.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if layout == "columnar":
+        content: Dict[str, Any] = {
+            "keys": [row[0] for row in rows],
+            "values": [row[1] for row in rows],
+        }
+    else:
+        content = {key: value for key, value, _ in rows}
+    return JSONResponse(content=content, headers=headers)
+
+
 @router.post(
     "/projects/{project_id}/variables",
     response_model=VariableResponse,
@@ -164,6 +250,11 @@ async def create_variable(
         except Exception as e:
             logger.warning("Could not calculate initial formula value: %s", e)
 
+    await PortfolioService().record_values(
+        db, project_id, {db_var.key: db_var.calculated_value or db_var.raw_value}
+    )
+    db.commit()
+
     logger.info(
         "Variable created id=%s project_id=%s tenant_id=%s",
         db_var.id,
@@ -174,16 +265,58 @@ async def create_variable(
     return VariableResponse.model_validate(db_var)
 
 
+@router.post("/projects/{project_id}/variables/import", response_model=Dict[str, Any])
+async def import_variables(
+    project: Project = Depends(get_current_project),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Import variables from a CSV or XLSX file, then recalculate the project.
+
+    Rows are validated and inserted in batches; invalid rows are reported
+    in "errors" (by spreadsheet row number) and do not stop the import.
+    """
+    try:
+        # Parsing, bulk inserts and the recalculation block, so they run
+        # on a worker thread with their own event loop
+        result = await run_in_threadpool(
+            asyncio.run,
+            VariableImportService().import_file(db, project.id, file.file, file.filename or ""),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    logger.info(
+        "Variables import finished project_id=%s tenant_id=%s imported=%d failed=%d",
+        project.id,
+        current_user.tenant_id,
+        result["imported"],
+        result["failed"],
+    )
+    return result
+
+
 @router.put("/variables/{variable_id}", response_model=Dict[str, Any])
 async def update_variable(
     variable_id: UUID,
     update_data: VariableUpdate,
+    project_id: Optional[UUID] = Query(
+        None, description="Copy-on-write clone to edit an inherited variable in"
+    ),
     db: Session = Depends(get_db),
     current_user: TestUser = Depends(get_current_user),
 ) -> Dict[str, Any]:
     """
     Update variable - triggers cascade recalculation.
 
+    Passing the `project_id` of a copy-on-write clone edits the clone's own
+    copy of an inherited variable, leaving the parent untouched.
+
     Returns: {
         "updated_variable": {...},
         "affected_variables": [...]
@@ -204,6 +337,10 @@ async def update_variable(
             detail="Not enough permissions to modify this variable",
         )
 
+    if project_id is not None and project_id != variable.project_id:
+        variable = _clone_copy(db, project_id, variable, current_user)
+        variable_id = variable.id
+
     engine = LoomEngine(db)
 
     # Handle value update (triggers cascade)
@@ -266,6 +403,9 @@ async def delete_variable(
         )
 
     db.delete(variable)
+    db.flush()
+    # Copy-on-write clones fall back to the parent's value
+    await PortfolioService().refresh_project(db, variable.project_id)
     db.commit()
 
     logger.info(
@@ -287,10 +427,18 @@ class FormulaRequest(BaseModel):
 async def set_variable_formula(
     variable_id: UUID,
     formula_data: FormulaRequest,
+    project_id: Optional[UUID] = Query(
+        None, description="Copy-on-write clone to set the formula in"
+    ),
     db: Session = Depends(get_db),
     current_user: TestUser = Depends(get_current_user),
 ) -> VariableResponse:
-    """Set or update formula for a variable"""
+    """
+    Set or update formula for a variable.
+
+    Passing the `project_id` of a copy-on-write clone sets the formula on
+    the clone's own copy of an inherited variable.
+    """
     variable = db.query(Variable).filter(Variable.id == variable_id).first()
     if not variable:
         raise HTTPException(
@@ -306,6 +454,10 @@ async def set_variable_formula(
             detail="Not enough permissions to modify this variable",
         )
 
+    if project_id is not None and project_id != variable.project_id:
+        variable = _clone_copy(db, project_id, variable, current_user)
+        variable_id = variable.id
+
     engine = LoomEngine(db)
 
     # Validate formula
@@ -406,3 +558,605 @@ async def recalculate_project(
     )
 
     return result
+
+
+@router.post(
+    "/projects/{project_id}/recalculate/jobs",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_recalculation_job(
+    project: Project = Depends(get_current_project),
+    current_user: TestUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Recalculate the project in the background, level by level.
+
+    Progress and per-level results stream from the job's events endpoint;
+    values are committed in chunks as the job goes. Returns the running
+    job if the project is already being recalculated.
+    """
+    job = recalculation_jobs.start(project.id, current_user.tenant_id, SessionLocal)
+    logger.info(
+        "Recalculation job started id=%s project_id=%s tenant_id=%s",
+        job.id,
+        project.id,
+        current_user.tenant_id,
+    )
+    return job.summary()
+
+
+@router.get("/recalculate/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_recalculation_job(
+    job_id: str,
+    current_user: TestUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """Current progress of a recalculation job."""
+    return _get_job(job_id, current_user).summary()
+
+
+@router.get("/recalculate/jobs/{job_id}/events")
+async def stream_recalculation_job(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None),
+    current_user: TestUser = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Server-Sent Events for a recalculation job.
+
+    Events: "started", one "level" per dependency level (with its
+    results), then "completed" or "failed". Reconnecting clients resume
+    after Last-Event-ID.
+    """
+    job = _get_job(job_id, current_user)
+    return StreamingResponse(
+        recalculation_jobs.stream(job, last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class EvaluateRequest(BaseModel):
+    """Request body for on-demand evaluation (defaults to output variables)."""
+
+    variable_ids: List[UUID] | None = None
+
+
+@router.post("/projects/{project_id}/evaluate", response_model=Dict[str, Any])
+async def evaluate_variables(
+    payload: EvaluateRequest,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Evaluate requested variables (and only what they depend on) without saving.
+
+    Returns: {"values": {variable_id: value}, "evaluated": int, "errors": {...}}
+    """
+    variable_ids = payload.variable_ids
+    if variable_ids is None:
+        variable_ids = [
+            row.id
+            for row in db.query(Variable.id).filter(
+                Variable.project_id == project.id,
+                Variable.category == VariableCategory.OUTPUT,
+            )
+        ]
+
+    try:
+        result = await LoomEngine(db).evaluate_requested(project.id, variable_ids)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return result
+
+
+class VariableBounds(BaseModel):
+    """A variable with optional lower/upper bounds."""
+
+    variable_id: UUID
+    min: float | None = None
+    max: float | None = None
+
+
+class OptimizeRequest(BaseModel):
+    """Request body for optimizing a project model."""
+
+    objective_id: UUID
+    sense: Literal["maximize", "minimize"] = "maximize"
+    decision_variables: List[VariableBounds] = Field(..., min_length=1, max_length=50)
+    constraints: List[VariableBounds] = Field(default_factory=list, max_length=100)
+    max_iterations: int = Field(500, ge=1, le=10000)
+    time_budget_seconds: float = Field(5.0, gt=0, le=60)
+
+
+@router.post("/projects/{project_id}/optimize", response_model=Dict[str, Any])
+async def optimize_project(
+    payload: OptimizeRequest,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Find input values that maximize/minimize a variable subject to bounds.
+
+    Runs entirely in memory; nothing is saved. Returns the best inputs,
+    the resulting objective and constraint values, and the trajectory.
+    """
+    variables, aliases = ProjectCloneService().effective_variables(db, project.id)
+    optimizer = LoomOptimizer(
+        ModelEvaluator.from_variables(variables, lazy=True, aliases=aliases)
+    )
+
+    try:
+        result = await run_in_threadpool(
+            optimizer.optimize,
+            objective=payload.objective_id,
+            decisions=[
+                DecisionVariable(d.variable_id, d.min, d.max)
+                for d in payload.decision_variables
+            ],
+            constraints=[
+                Constraint(c.variable_id, c.min, c.max) for c in payload.constraints
+            ],
+            maximize=payload.sense == "maximize",
+            max_iterations=payload.max_iterations,
+            time_budget_seconds=payload.time_budget_seconds,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    logger.info(
+        "Project optimized project_id=%s status=%s iterations=%d",
+        project.id,
+        result.status,
+        result.iterations,
+    )
+
+    return {
+        "status": result.status,
+        "feasible": result.feasible,
+        "objective_value": result.objective_value,
+        "inputs": {str(k): v for k, v in result.inputs.items()},
+        "constraint_values": {str(k): v for k, v in result.constraint_values.items()},
+        "iterations": result.iterations,
+        "evaluations": result.evaluations,
+        "elapsed_ms": result.elapsed_ms,
+        "trajectory": result.trajectory,
+    }
+
+
+@router.get("/admin/projects/{project_id}/profile", response_model=Dict[str, Any])
+async def get_project_profile(
+    limit: int = Query(20, ge=1, le=200),
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Slowest formulas of a project and the critical path of its graph.
+
+    Timings come from the in-process profiler (LOOM_PROFILING_ENABLED);
+    the critical path is computed from the current formulas and weighted
+    by the profiled mean times when available.
+    """
+    variables, aliases = ProjectCloneService().effective_variables(db, project.id)
+    evaluator = ModelEvaluator.from_variables(variables, aliases=aliases)
+    try:
+        path = critical_path(evaluator, loom_profiler.mean_times(project.id))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    return {
+        "project_id": project.id,
+        "profiling_enabled": loom_profiler.enabled,
+        "formulas": len(evaluator.compiled),
+        "critical_path": path,
+        "slowest": loom_profiler.slowest(project.id, limit),
+        "recent_runs": loom_profiler.runs(project.id, limit),
+    }
+
+
+class ApplyTemplateRequest(BaseModel):
+    """Request body for applying a template to a project."""
+
+    template_id: str
+
+
+class BatchApplyTemplateRequest(BaseModel):
+    """Request body for instantiating a template into many projects."""
+
+    project_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+
+
+@router.post(
+    "/projects/{project_id}/apply-template",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_201_CREATED,
+)
+async def apply_template(
+    payload: ApplyTemplateRequest,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Create all variables of a template in the project."""
+    try:
+        return await TemplateService().apply_template(db, project.id, payload.template_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+
+@router.post(
+    "/templates/{template_id}/apply-batch",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_201_CREATED,
+)
+async def apply_template_batch(
+    template_id: str,
+    payload: BatchApplyTemplateRequest,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """Instantiate one template into many projects in a single call (client onboarding)."""
+    project_ids = list(dict.fromkeys(payload.project_ids))
+
+    # Verify project access for all projects at once
+    found = {
+        row.id
+        for row in db.query(Project.id)
+        .filter(Project.id.in_(project_ids), Project.tenant_id == current_user.tenant_id)
+        .all()
+    }
+    missing = [str(pid) for pid in project_ids if pid not in found]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Projects not found: {', '.join(missing)}",
+        )
+
+    try:
+        result = await TemplateService().apply_template_to_projects(
+            db, project_ids, template_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    logger.info(
+        "Template batch applied template_id=%s tenant_id=%s projects=%d",
+        template_id,
+        current_user.tenant_id,
+        len(project_ids),
+    )
+
+    return result
+
+
+@router.get(
+    "/projects/{project_id}/versions",
+    response_model=List[ModelVersionResponse],
+)
+async def list_versions(
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> List[ModelVersionResponse]:
+    """List saved versions of the project model, newest first."""
+    versions = await VersionService().list_versions(db, project.id)
+    return [ModelVersionResponse.model_validate(v) for v in versions]
+
+
+@router.post(
+    "/projects/{project_id}/versions",
+    response_model=ModelVersionResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def save_version(
+    payload: ModelVersionCreate,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> ModelVersionResponse:
+    """Save the current state of the model as a new version."""
+    version = await VersionService().save_version(
+        db,
+        project.id,
+        change_summary=payload.change_summary,
+        created_by_id=current_user.id,
+    )
+    return ModelVersionResponse.model_validate(version)
+
+
+@router.get(
+    "/projects/{project_id}/versions/diff",
+    response_model=ModelVersionDiff,
+)
+async def diff_versions(
+    from_version: int,
+    to_version: int,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> ModelVersionDiff:
+    """Diff two versions (by version number) of the project model."""
+    try:
+        diff = await VersionService().diff_versions(
+            db, project.id, from_version, to_version
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return ModelVersionDiff(**diff)
+
+
+@router.post(
+    "/projects/{project_id}/versions/{version_id}/restore",
+    response_model=Dict[str, Any],
+)
+async def restore_version(
+    version_id: UUID,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """Restore all project variables to a saved version."""
+    try:
+        result = await VersionService().restore_version(db, project.id, version_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    logger.info(
+        "Version restored project_id=%s version_id=%s tenant_id=%s",
+        project.id,
+        version_id,
+        current_user.tenant_id,
+    )
+
+    return result
+
+
+def _get_job(job_id: str, current_user: TestUser) -> RecalculationJob:
+    job = recalculation_jobs.get(job_id)
+    if job is None or job.tenant_id != current_user.tenant_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recalculation job not found",
+        )
+    return job
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _clone_copy(
+    db: Session, project_id: UUID, variable: Variable, current_user: TestUser
+) -> Variable:
+    """The clone's own copy of a variable it inherits (created on first edit)."""
+    clone = (
+        db.query(Project)
+        .filter(Project.id == project_id, Project.tenant_id == current_user.tenant_id)
+        .first()
+    )
+    if not clone:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found",
+        )
+
+    clones = ProjectCloneService()
+    variables, _ = clones.effective_variables(db, project_id)
+    if variable.id not in {var.id for var in variables}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Variable is not inherited by this project",
+        )
+    copy = clones.materialize_variable(db, project_id, variable)
+    db.flush()
+    return copy
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Interpret naive query datetimes as UTC."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+@router.get("/projects/{project_id}/values/as-of", response_model=Dict[str, Any])
+async def get_values_as_of(
+    at: datetime,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Calculated values of all project variables as they were at `at`."""
+    as_of = _as_utc(at)
+    values = await ValueHistoryService().values_as_of(db, project.id, as_of)
+    return {"project_id": project.id, "as_of": as_of, "values": values}
+
+
+@router.get(
+    "/projects/{project_id}/variables/{variable_id}/history",
+    response_model=Dict[str, Any],
+)
+async def get_variable_history(
+    variable_id: UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Value trend of one variable (last 30 days by default)."""
+    var = variable_crud.get_variable(db, variable_id=variable_id)
+    if not var or var.project_id != project.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Variable not found",
+        )
+
+    end_at = _as_utc(end) if end else datetime.now(timezone.utc)
+    start_at = _as_utc(start) if start else end_at - timedelta(days=30)
+    if start_at > end_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end",
+        )
+
+    points = await ValueHistoryService().history(
+        db, variable_id, project.id, start_at, end_at
+    )
+    return {"variable_id": variable_id, "key": var.key, "points": points}
+
+
+def _get_scenario(db: Session, project: Project, scenario_id: UUID) -> Scenario:
+    scenario = db.get(Scenario, scenario_id)
+    if scenario is None or scenario.project_id != project.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scenario not found",
+        )
+    return scenario
+
+
+def _split_keys(keys: Optional[str]) -> Optional[List[str]]:
+    if not keys:
+        return None
+    return [key.strip() for key in keys.split(",") if key.strip()]
+
+
+@router.get("/projects/{project_id}/scenarios", response_model=List[ScenarioResponse])
+async def list_scenarios(
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> List[ScenarioResponse]:
+    """Scenarios of a project with their overrides."""
+    return (
+        db.query(Scenario)
+        .filter(Scenario.project_id == project.id)
+        .order_by(Scenario.name)
+        .all()
+    )
+
+
+@router.post(
+    "/projects/{project_id}/scenarios",
+    response_model=ScenarioResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_scenario(
+    payload: ScenarioCreate,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> ScenarioResponse:
+    """
+    Create a scenario from a sparse set of overrides.
+
+    Overrides may reference variables by id, key or label; only the
+    overridden values are stored.
+    """
+    try:
+        return await ScenarioService().create(
+            db,
+            project.id,
+            payload.name,
+            payload.overrides,
+            description=payload.description,
+            created_by=current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/projects/{project_id}/scenarios/compare", response_model=Dict[str, Any])
+async def compare_scenarios(
+    keys: Optional[str] = Query(None, description="Comma-separated variable keys"),
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Base values next to the values of every scenario of the project."""
+    try:
+        return await ScenarioService().compare(db, project.id, _split_keys(keys))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.put(
+    "/projects/{project_id}/scenarios/{scenario_id}",
+    response_model=ScenarioResponse,
+)
+async def update_scenario(
+    scenario_id: UUID,
+    payload: ScenarioUpdate,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> ScenarioResponse:
+    """Rename a scenario or merge new overrides into it (null removes one)."""
+    scenario = _get_scenario(db, project, scenario_id)
+    try:
+        return await ScenarioService().update(
+            db,
+            scenario,
+            name=payload.name,
+            description=payload.description,
+            overrides=payload.overrides,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.delete(
+    "/projects/{project_id}/scenarios/{scenario_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_scenario(
+    scenario_id: UUID,
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> None:
+    """Delete a scenario; the base project is not touched."""
+    scenario = _get_scenario(db, project, scenario_id)
+    db.delete(scenario)
+    db.commit()
+
+
+@router.get(
+    "/projects/{project_id}/scenarios/{scenario_id}/values",
+    response_model=Dict[str, Any],
+)
+async def get_scenario_values(
+    scenario_id: UUID,
+    keys: Optional[str] = Query(None, description="Comma-separated variable keys"),
+    project: Project = Depends(get_current_project),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Project values as seen through a scenario.
+
+    Only the formulas downstream of the overrides are recomputed, and only
+    when the base project changed since the last evaluation.
+    """
+    scenario = _get_scenario(db, project, scenario_id)
+    try:
+        values = await ScenarioService().values(db, scenario, _split_keys(keys))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"scenario_id": scenario.id, "name": scenario.name, "values": values}
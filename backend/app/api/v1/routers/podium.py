@@ -13,11 +13,13 @@ from sqlalchemy.orm import Session
 
 from app.core.deps import TestUser, get_current_user, get_db
 from app.crud import podium_access as podium_crud
-from app.crud import variable as variable_crud
 from app.models.project import Project
+from app.models.variable import VariableCategory
 from app.schemas.podium_access import PodiumAccessCreate, PodiumAccessRead
 from app.schemas.project import ProjectResponse
 from app.schemas.variable import VariableResponse
+from app.services.model_evaluator import ModelEvaluator
+from app.services.project_clone_service import ProjectCloneService
 
 
 logger = logging.getLogger(__name__)
@@ -97,13 +99,27 @@ def get_podium_view(
             detail="Project not found",
         )
 
-    vars_ = variable_crud.list_variables_for_project(db, project_id=project.id)
+    # Copy-on-write clones also show the variables inherited from their parent
+    vars_, aliases = ProjectCloneService().effective_variables(db, project.id)
+    vars_.sort(key=lambda var: var.created_at)
 
     project_data = ProjectResponse.model_validate(project)
     variables_data = [VariableResponse.model_validate(v) for v in vars_]
 
+    # Evaluate only the outputs and what they depend on
+    outputs = [v for v in vars_ if v.category == VariableCategory.OUTPUT]
+    evaluator = ModelEvaluator.from_variables(vars_, lazy=True, aliases=aliases)
+    try:
+        results = evaluator.evaluate_requested([v.id for v in outputs])
+    except ValueError as e:
+        logger.warning("Podium outputs not evaluated project_id=%s: %s", project.id, e)
+        results = {}
+
     charts_data: Dict[str, Any] = {
         "variables_count": len(vars_),
+        "outputs": {
+            v.key: results.get(v.id, v.calculated_value or v.raw_value) for v in outputs
+        },
     }
 
     logger.info(
@@ -0,0 +1,129 @@
+"""Portfolio router: tenant-level rollups across projects."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import TestUser, get_current_user, get_db
+from app.models.portfolio_rollup import PortfolioRollup
+from app.schemas.portfolio import PortfolioRollupCreate, PortfolioRollupResponse
+from app.services.portfolio_service import PortfolioService, rollup_value
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+
+@router.get("/rollups", response_model=List[PortfolioRollupResponse])
+async def list_rollups(
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> List[PortfolioRollupResponse]:
+    """Every rollup of the tenant with its materialized value (one query)."""
+    rollups = (
+        db.query(PortfolioRollup)
+        .filter(PortfolioRollup.tenant_id == current_user.tenant_id)
+        .order_by(PortfolioRollup.key)
+        .all()
+    )
+    return [_to_response(rollup) for rollup in rollups]
+
+
+@router.post(
+    "/rollups",
+    response_model=PortfolioRollupResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_rollup(
+    payload: PortfolioRollupCreate,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> PortfolioRollupResponse:
+    """Create a rollup of one variable key across the tenant's projects."""
+    try:
+        rollup = await PortfolioService().create_rollup(
+            db,
+            tenant_id=current_user.tenant_id,
+            key=payload.key,
+            label=payload.label,
+            variable_key=payload.variable_key,
+            aggregate=payload.aggregate,
+            project_ids=payload.project_ids,
+            created_by=current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _to_response(rollup)
+
+
+@router.get("/rollups/{rollup_id}/contributions", response_model=List[Dict[str, Any]])
+async def get_rollup_contributions(
+    rollup_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> List[Dict[str, Any]]:
+    """Per-project values behind a rollup."""
+    rollup = _get_rollup(db, rollup_id, current_user)
+    return PortfolioService().contributions(db, rollup.id)
+
+
+@router.post("/rollups/{rollup_id}/refresh", response_model=PortfolioRollupResponse)
+async def refresh_rollup(
+    rollup_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> PortfolioRollupResponse:
+    """Recompute a rollup from the current project values."""
+    rollup = _get_rollup(db, rollup_id, current_user)
+    return _to_response(await PortfolioService().refresh(db, rollup))
+
+
+@router.delete("/rollups/{rollup_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rollup(
+    rollup_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> None:
+    """Delete a rollup."""
+    rollup = _get_rollup(db, rollup_id, current_user)
+    db.delete(rollup)
+    db.commit()
+    logger.info(
+        "Portfolio rollup deleted id=%s tenant_id=%s", rollup_id, current_user.tenant_id
+    )
+
+
+def _get_rollup(db: Session, rollup_id: UUID, current_user: TestUser) -> PortfolioRollup:
+    rollup = (
+        db.query(PortfolioRollup)
+        .filter(
+            PortfolioRollup.id == rollup_id,
+            PortfolioRollup.tenant_id == current_user.tenant_id,
+        )
+        .first()
+    )
+    if not rollup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rollup not found",
+        )
+    return rollup
+
+
+def _to_response(rollup: PortfolioRollup) -> PortfolioRollupResponse:
+    return PortfolioRollupResponse(
+        id=rollup.id,
+        key=rollup.key,
+        label=rollup.label,
+        variable_key=rollup.variable_key,
+        aggregate=rollup.aggregate,
+        project_ids=rollup.project_ids,
+        value=rollup_value(rollup),
+        projects_count=rollup.value_count,
+        updated_at=rollup.updated_at,
+    )
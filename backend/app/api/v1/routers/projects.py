@@ -11,13 +11,22 @@ from sqlalchemy.orm import Session
 
 from app.core.deps import TestUser, get_current_project, get_current_user, get_db
 from app.crud import project as project_crud
-from app.schemas.project import ProjectCreate, ProjectResponse, ProjectUpdate
+from app.schemas.project import ProjectClone, ProjectCreate, ProjectResponse, ProjectUpdate
+from app.services.document_chunks import DocumentChunkService
+from app.services.document_storage import DocumentStorage
+from app.services.portfolio_service import PortfolioService
+from app.services.project_clone_service import ProjectCloneService
 
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+clone_service = ProjectCloneService()
+portfolio_service = PortfolioService()
+document_storage = DocumentStorage()
+chunk_service = DocumentChunkService()
+
 
 @router.post(
     "/",
@@ -89,6 +98,53 @@ def update_project(
     return updated
 
 
+@router.post(
+    "/{project_id}/clone",
+    response_model=ProjectResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def clone_project(
+    payload: ProjectClone,
+    project: ProjectResponse = Depends(get_current_project),
+    db: Session = Depends(get_db),
+    current_user: TestUser = Depends(get_current_user),
+) -> ProjectResponse:
+    """
+    Clone a project with its variables and calculated values.
+
+    With copy_on_write the clone shares the source's variables and only
+    copies the ones that are edited in it.
+    """
+    try:
+        clone, _ = await clone_service.clone_project(
+            db,
+            project,
+            name=payload.name,
+            copy_on_write=payload.copy_on_write,
+            created_by=current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    # The clone contributes its values to portfolio rollups straight away
+    await portfolio_service.refresh_project(db, clone.id)
+    db.commit()
+    return clone
+
+
+@router.post("/{project_id}/detach")
+def detach_project(
+    project: ProjectResponse = Depends(get_current_project),
+    db: Session = Depends(get_db),
+):
+    """Copy all inherited variables into a copy-on-write clone."""
+    try:
+        copied = clone_service.detach(db, project.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    return {"project_id": str(project.id), "variables_copied": copied}
+
+
 @router.delete(
     "/{project_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -109,7 +165,13 @@ def delete_project(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found",
         )
+    # Copy-on-write clones would lose their inherited variables
+    clone_service.detach_children(db, project_id)
+    portfolio_service.remove_project(db, project_id)
+    released = document_storage.release_project(db, project_id)
     project_crud.delete_project(db, db_obj=db_obj)
+    document_storage.delete_files(released)
+    chunk_service.drop_project(project_id)
     logger.info("Project deleted id=%s tenant_id=%s", project_id, current_user.tenant_id)
 
 
@@ -37,5 +37,72 @@ class Settings:
         os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", "7")
     )
 
+    # Loom value history: batches older than this are folded into checkpoints
+    value_history_retention_days: int = int(
+        os.getenv("VALUE_HISTORY_RETENTION_DAYS", "90")
+    )
+
+    # Loom formula profiling (per-variable timings kept in a ring buffer)
+    loom_profiling_enabled: bool = (
+        os.getenv("LOOM_PROFILING_ENABLED", "false").lower() == "true"
+    )
+    loom_profile_buffer_size: int = int(
+        os.getenv("LOOM_PROFILE_BUFFER_SIZE", "10000")
+    )
+
+    # Loom recalculation jobs: rows per commit and progress events kept per job
+    loom_recalc_chunk_size: int = int(
+        os.getenv("LOOM_RECALC_CHUNK_SIZE", "1000")
+    )
+    loom_recalc_event_buffer_size: int = int(
+        os.getenv("LOOM_RECALC_EVENT_BUFFER_SIZE", "200")
+    )
+
+    # Document uploads: largest accepted file and bytes read per chunk
+    upload_max_bytes: int = int(
+        os.getenv("UPLOAD_MAX_BYTES", str(256 * 1024 * 1024))
+    )
+    upload_chunk_size: int = int(
+        os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024))
+    )
+
+    # Council RAG: chunks retrieved per query and token budget of the packed context
+    council_retrieval_top_k: int = int(
+        os.getenv("COUNCIL_RETRIEVAL_TOP_K", "20")
+    )
+    council_context_tokens: int = int(
+        os.getenv("COUNCIL_CONTEXT_TOKENS", "24000")
+    )
+
+    # Per-project chunk embedding files (memory-mapped at query time)
+    vector_index_dir: str = os.getenv("VECTOR_INDEX_DIR", "indexes")
+
+    # PDF extraction: worker processes, pages per task, per-document deadline
+    # and address-space cap per worker (0 = unlimited)
+    pdf_extract_workers: int = int(
+        os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))
+    )
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+    pdf_extract_timeout_seconds: float = float(
+        os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "120")
+    )
+    pdf_worker_memory_mb: int = int(os.getenv("PDF_WORKER_MEMORY_MB", "1024"))
+
+    # Background job queue: run the worker in this process, poll interval,
+    # attempts per job, retry backoff bounds and lease before a running job
+    # counts as abandoned (workers renew it while the job runs)
+    job_worker_enabled: bool = (
+        os.getenv("JOB_WORKER_ENABLED", "true").lower() == "true"
+    )
+    job_poll_interval_seconds: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    job_retry_base_seconds: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+    job_retry_max_seconds: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "900"))
+
+    # Concurrent jobs per document stage
+    job_concurrency_ingest: int = int(os.getenv("JOB_CONCURRENCY_INGEST", "2"))
+    job_concurrency_risk_scan: int = int(os.getenv("JOB_CONCURRENCY_RISK_SCAN", "2"))
+
 
 settings = Settings()
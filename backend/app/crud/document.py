@@ -18,6 +18,7 @@ def create_document(db: Session, *, obj_in: DocumentCreate, uploaded_by: Optiona
         file_name=obj_in.file_name,
         file_path=obj_in.file_path,
         file_type=obj_in.file_type,
+        meta_data=obj_in.meta_data,
     )
     db.add(db_obj)
     db.commit()
@@ -44,6 +45,13 @@ def list_documents_for_project(
     )
 
 
+def project_has_documents(db: Session, *, project_id: UUID) -> bool:
+    """Whether a project has any document, without loading them."""
+    return (
+        db.query(Document.id).filter(Document.project_id == project_id).first() is not None
+    )
+
+
 def delete_document(db: Session, *, db_obj: Document) -> None:
     """Delete a document."""
     db.delete(db_obj)
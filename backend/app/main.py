@@ -4,16 +4,21 @@ Main FastAPI application.
 Creates and configures the FastAPI application with all routers and middleware.
 """
 
+import asyncio
 import time
 import uuid
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.api.v1 import router as api_v1_router
 from app.core.config import settings
+from app.services.document_processor import shutdown_pdf_pool
+from app.services.template_service import template_catalog
+from app.tasks.job_worker import job_worker
 
 
 class RequestIDMiddleware(BaseHTTPMiddleware):
@@ -33,6 +38,32 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class UploadSizeLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Rejects oversized document uploads before their body is read.
+
+    Relies on Content-Length; chunked uploads without it are still cut off
+    while being streamed to disk.
+    """
+
+    UPLOAD_PATH_SUFFIX = "/council/upload"
+    # Multipart boundaries and part headers on top of the file itself
+    FORM_OVERHEAD_BYTES = 64 * 1024
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "POST" and request.url.path.endswith(self.UPLOAD_PATH_SUFFIX):
+            length = request.headers.get("content-length")
+            limit = settings.upload_max_bytes + self.FORM_OVERHEAD_BYTES
+            if length and length.isdigit() and int(length) > limit:
+                return JSONResponse(
+                    status_code=413,
+                    content={
+                        "detail": f"File exceeds the upload limit of {settings.upload_max_bytes} bytes"
+                    },
+                )
+        return await call_next(request)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -40,7 +71,17 @@ async def lifespan(app: FastAPI):
     
     Вся работа с созданием/миграциями БД выполняется через Alembic.
     """
-    yield
+    # Компилируем встроенные шаблоны Loom заранее
+    template_catalog.warm()
+    # Фоновые задачи (обработка документов) из очереди jobs
+    if settings.job_worker_enabled:
+        await job_worker.start()
+    try:
+        yield
+    finally:
+        await job_worker.stop()
+        # Останавливаем процессы извлечения PDF, когда новых задач уже не будет
+        await asyncio.to_thread(shutdown_pdf_pool, True)
 
 
 def create_application() -> FastAPI:
@@ -57,6 +98,7 @@ def create_application() -> FastAPI:
 
     # Middleware
     app.add_middleware(RequestIDMiddleware)
+    app.add_middleware(UploadSizeLimitMiddleware)
     
     # CORS middleware (для разработки, на проде настроить правильно)
     app.add_middleware(
@@ -0,0 +1,96 @@
+"""Okapi BM25 scoring for keyword retrieval over document chunks."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Mapping, Tuple
+
+# Unicode word characters, so Cyrillic text is tokenized as well as Latin
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Longest term stored in the index; longer tokens are hashes, ids and noise
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be but by for from has have in is it its of on or
+    that the this to was were will with
+    и в во на с со по к о об от до из за для не что как это то а но или
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased index terms of a text, stop words and single characters dropped."""
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if 1 < len(token) <= MAX_TERM_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def term_frequencies(text: str) -> Counter:
+    """{term: occurrences} for one chunk."""
+    return Counter(tokenize(text))
+
+
+@dataclass
+class Posting:
+    """One term occurring in one chunk."""
+
+    chunk_id: Hashable
+    term: str
+    tf: int
+    # Number of terms in the chunk
+    length: int
+
+
+class BM25Scorer:
+    """
+    Scores chunks against a query from their postings.
+
+    Corpus statistics (chunk count, average length, document frequency)
+    are passed in rather than kept here, so the postings can live in the
+    database and be updated incrementally as chunks are added or removed.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def idf(self, n_chunks: int, df: int) -> float:
+        # BM25+ style floor: never negative for very common terms
+        return math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+
+    def score(
+        self,
+        postings: Iterable[Posting],
+        n_chunks: int,
+        avg_length: float,
+        df: Mapping[str, int],
+        query_terms: Mapping[str, int] | None = None,
+    ) -> Dict[Hashable, float]:
+        """
+        {chunk_id: score} for every chunk with at least one query term.
+
+        `query_terms` weights terms repeated in the query ({term: count}).
+        """
+        avg_length = avg_length or 1.0
+        scores: Dict[Hashable, float] = {}
+        for posting in postings:
+            idf = self.idf(n_chunks, df.get(posting.term, 1))
+            norm = self.k1 * (1 - self.b + self.b * posting.length / avg_length)
+            weight = (query_terms or {}).get(posting.term, 1)
+            scores[posting.chunk_id] = scores.get(posting.chunk_id, 0.0) + weight * idf * (
+                posting.tf * (self.k1 + 1) / (posting.tf + norm)
+            )
+        return scores
+
+    @staticmethod
+    def top(scores: Mapping[Hashable, float], k: int) -> List[Tuple[Hashable, float]]:
+        """The k best (chunk_id, score) pairs, best first."""
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
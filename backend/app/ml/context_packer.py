@@ -0,0 +1,118 @@
+"""Packs retrieved chunks into a prompt under a token budget."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+SEPARATOR = "\n\n---\n\n"
+
+# Average characters per token for English prose
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, good enough for context budgeting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class ScoredChunk:
+    """A retrieved chunk with its relevance score."""
+
+    chunk_id: Hashable
+    document_id: Hashable
+    text: str
+    start_offset: int
+    end_offset: int
+    score: float
+    token_count: int
+    page_number: Optional[int] = None
+
+    @classmethod
+    def from_chunk(cls, chunk: Any, score: float) -> "ScoredChunk":
+        """Wrap a DocumentChunk row."""
+        return cls(
+            chunk_id=chunk.id,
+            document_id=chunk.document_id,
+            text=chunk.text,
+            start_offset=chunk.start_offset,
+            end_offset=chunk.end_offset,
+            score=score,
+            token_count=chunk.token_count,
+            page_number=chunk.page_number,
+        )
+
+
+@dataclass
+class PackedContext:
+    """The chunks chosen for a prompt, in reading order."""
+
+    chunks: List[ScoredChunk] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def text(self) -> str:
+        return SEPARATOR.join(chunk.text for chunk in self.chunks)
+
+    @property
+    def sources(self) -> List[Dict[str, Any]]:
+        """Exact location of every packed chunk in its document's extracted text."""
+        return [
+            {
+                "document_id": chunk.document_id,
+                "chunk_id": chunk.chunk_id,
+                "page_number": chunk.page_number,
+                "start_offset": chunk.start_offset,
+                "end_offset": chunk.end_offset,
+            }
+            for chunk in self.chunks
+        ]
+
+
+def pack_context(chunks: Sequence[ScoredChunk], budget_tokens: int) -> PackedContext:
+    """
+    Choose chunks for a prompt of at most `budget_tokens` tokens.
+
+    Chunks are taken greedily by score per token; one that does not fit is
+    skipped and smaller ones are still tried. Repeated text (the same
+    content in several documents) and chunks overlapping an already chosen
+    range of the same document are dropped. The result is ordered by
+    document and offset so the prompt reads in source order.
+    """
+    separator_tokens = estimate_tokens(SEPARATOR)
+    packed = PackedContext()
+    seen_text = set()
+    taken: Dict[Hashable, List[ScoredChunk]] = {}
+
+    # Highest score first among equals, so a dropped duplicate is the weaker one
+    candidates = sorted(
+        chunks, key=lambda c: (c.score / max(c.token_count, 1), c.score), reverse=True
+    )
+    for chunk in candidates:
+        if chunk.score <= 0 or not chunk.text.strip():
+            continue
+        cost = chunk.token_count + (separator_tokens if packed.chunks else 0)
+        if packed.tokens + cost > budget_tokens:
+            continue
+        fingerprint = chunk.text.strip()
+        if fingerprint in seen_text:
+            continue
+        if any(
+            chunk.start_offset < other.end_offset and other.start_offset < chunk.end_offset
+            for other in taken.get(chunk.document_id, ())
+        ):
+            continue
+        seen_text.add(fingerprint)
+        taken.setdefault(chunk.document_id, []).append(chunk)
+        packed.chunks.append(chunk)
+        packed.tokens += cost
+
+    order = {doc_id: position for position, doc_id in enumerate(_first_seen(chunks))}
+    packed.chunks.sort(key=lambda c: (order[c.document_id], c.start_offset))
+    return packed
+
+
+def _first_seen(chunks: Sequence[ScoredChunk]) -> List[Hashable]:
+    # Documents in the order retrieval ranked them
+    return list(dict.fromkeys(chunk.document_id for chunk in chunks))
@@ -0,0 +1,63 @@
+"""CPU-only text embeddings built with the hashing trick."""
+
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from app.ml.bm25 import tokenize
+
+
+@lru_cache(maxsize=200_000)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable (column, sign) of a feature; Python's hash() is salted per process."""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Maps text to fixed-size L2-normalized float32 vectors without a model.
+
+    Features are words, adjacent word pairs and character trigrams of each
+    word, hashed into `dim` signed buckets with sublinear term weights.
+    Trigrams let inflected forms ("terminate", "termination", "договора",
+    "договор") land close together; nothing has to be downloaded or
+    trained, and identical text always gets identical vectors.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    @property
+    def name(self) -> str:
+        """Identifies the vector space; vectors of different names are not comparable."""
+        return f"hash{self.dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Vectors for a batch of texts, shape (len(texts), dim)."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict = {}
+            words = tokenize(text)
+            for feature in self._features(words):
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                column, sign = _bucket(feature, self.dim)
+                matrix[row, column] += sign * (1.0 + np.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    @staticmethod
+    def _features(words: Sequence[str]):
+        for index, word in enumerate(words):
+            yield word
+            if index:
+                yield f"{words[index - 1]} {word}"
+            padded = f"<{word}>"
+            for start in range(len(padded) - 2):
+                yield "#" + padded[start : start + 3]
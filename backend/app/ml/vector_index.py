@@ -0,0 +1,127 @@
+"""Append-only, memory-mapped vector index with exact nearest-neighbour search."""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AbstractSet, Iterator, List, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+
+class VectorIndex:
+    """
+    One file of (id, float32 vector) records.
+
+    Appends write whole records in a single call, so readers never see a
+    torn record; appends and `compact` hold an exclusive lock on a sibling
+    `.lock` file (the index file itself is swapped out by compaction), so
+    writers in any process never interleave with a rewrite. Searches memory-map the file and
+    scan it in blocks, so RAM stays flat however many vectors there are;
+    rows are L2-normalized, so the dot product is the cosine similarity.
+    Records of ids that no longer exist are dropped by `compact`.
+    """
+
+    BLOCK_ROWS = 65_536
+
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype([("id", "V16"), ("vector", "<f4", (dim,))])
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.path) // self.dtype.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def append(self, ids: Sequence[UUID], vectors: np.ndarray) -> None:
+        """Add vectors (shape (len(ids), dim)) under the given ids."""
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if not len(ids):
+            return
+        records = np.empty(len(ids), dtype=self.dtype)
+        records["id"] = [np.void(item.bytes) for item in ids]
+        records["vector"] = vectors
+        with self._locked(), open(self.path, "ab") as f:
+            f.write(records.tobytes())
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[UUID, float]]]:
+        """
+        The k most similar ids for each query vector, best first.
+
+        `queries` has shape (n, dim); returns n lists of (id, similarity).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        count = len(self)
+        if count == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, count, self.BLOCK_ROWS):
+            block = records["vector"][start : start + self.BLOCK_ROWS]
+            scores = queries @ block.T
+            rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            # Keep the running top k per query
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, rows], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                rows = np.take_along_axis(rows, keep, axis=1)
+            best_scores, best_rows = scores, rows
+
+        results: List[List[Tuple[UUID, float]]] = []
+        for scores, rows in zip(best_scores, best_rows, strict=True):
+            order = np.argsort(-scores)
+            results.append(
+                [(UUID(bytes=records["id"][rows[i]].tobytes()), float(scores[i])) for i in order]
+            )
+        del records
+        return results
+
+    def compact(self, keep: AbstractSet[UUID]) -> int:
+        """
+        Rewrite the file with only the records whose id is in `keep`.
+
+        The new file is written next to the old one, block by block, and
+        swapped in atomically while appends wait. Searches that already
+        mapped the old file finish on it. Returns the number of records
+        dropped.
+        """
+        with self._locked():
+            count = len(self)
+            if count == 0:
+                return 0
+            wanted = np.array([item.bytes for item in keep], dtype="V16")
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            kept = 0
+            with open(temp_path, "wb") as out:
+                records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+                for start in range(0, count, self.BLOCK_ROWS):
+                    block = records[start : start + self.BLOCK_ROWS]
+                    live = block[np.isin(block["id"], wanted)]
+                    out.write(live.tobytes())
+                    kept += len(live)
+                del records
+            os.replace(temp_path, self.path)
+        return count - kept
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the index's exclusive lock (across threads and processes)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
@@ -0,0 +1,53 @@
+"""Document blob ORM model."""
+
+from datetime import datetime
+from sqlalchemy import JSON, BigInteger, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class DocumentBlob(Base):
+    """
+    One stored file, addressed by the SHA-256 of its content.
+
+    Documents that upload identical bytes share a blob (their metadata
+    holds its hash), across tenants. Results that depend only on the content - extracted
+    text and risk findings - are cached here, so a duplicate upload skips
+    processing. The file is deleted with the last referencing document.
+    """
+
+    __tablename__ = "document_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    storage_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    # Number of documents pointing at this blob
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Null until the first extraction finished
+    extracted_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # {taxonomy fingerprint: [{category, severity, title, description,
+    # source_text, recommendation}]}; null until the first risk scan finished
+    risk_findings: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class DocumentBlobTenant(Base):
+    """
+    A tenant's references to a blob.
+
+    Blobs are shared across tenants, but whether content was already
+    uploaded may only be revealed to a tenant that uploaded it itself;
+    this row answers that without searching the tenant's documents.
+    """
+
+    __tablename__ = "document_blob_tenants"
+
+    sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("document_blobs.sha256", ondelete="CASCADE"), primary_key=True
+    )
+    tenant_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Number of the tenant's documents pointing at the blob
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,55 @@
+"""Document chunk ORM model."""
+
+import uuid
+from sqlalchemy import ForeignKey, Index, Integer, String, Text, UniqueConstraint, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class DocumentChunk(Base):
+    """
+    A slice of a document's extracted text, stored at ingestion.
+
+    RAG queries read these rows instead of re-extracting files. Offsets
+    index into the document's extracted_text.
+    """
+
+    __tablename__ = "document_chunks"
+    __table_args__ = (
+        UniqueConstraint("document_id", "ordinal", name="uq_document_chunks_document_ordinal"),
+        Index("ix_document_chunks_project", "project_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    document_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    ordinal: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    end_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    # 1-based; null for documents without pages (DOCX, plain text)
+    page_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    char_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    token_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Number of BM25 index terms (the chunk length used in scoring)
+    term_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class DocumentChunkTerm(Base):
+    """A BM25 posting: how often one term occurs in one chunk."""
+
+    __tablename__ = "document_chunk_terms"
+    __table_args__ = (
+        Index("ix_document_chunk_terms_project_term", "project_id", "term"),
+    )
+
+    chunk_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("document_chunks.id", ondelete="CASCADE"), primary_key=True
+    )
+    term: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Denormalized from the chunk so lookups need no join
+    project_id: Mapped[uuid.UUID] = mapped_column(Uuid, nullable=False)
+    tf: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,53 @@
+"""Background job ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class Job(Base):
+    """
+    A unit of background work in the persistent job queue.
+
+    Workers claim queued jobs whose run_after has passed, so jobs survive
+    restarts and failed attempts are retried after a backoff. A job whose
+    `pipeline` is set enqueues the next stage with the same payload when
+    it succeeds, which keeps the stages of a document in order.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "kind", "run_after"),
+        Index("ix_jobs_document", "document_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    # Handler name, e.g. "document.ingest"
+    kind: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # Kinds still to run after this one, in order
+    pipeline: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # queued, running, succeeded or failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+
+    tenant_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    project_id: Mapped[uuid.UUID | None] = mapped_column(Uuid, nullable=True)
+    document_id: Mapped[uuid.UUID | None] = mapped_column(Uuid, nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5)
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Set while running; a lease older than job_lease_seconds is reclaimed
+    locked_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
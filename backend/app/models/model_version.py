@@ -0,0 +1,51 @@
+"""Model version ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    Text,
+    UniqueConstraint,
+    Uuid,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class ModelVersion(Base):
+    """
+    Saved state of a Loom project.
+
+    Every version stores a compressed sparse delta against the previous one;
+    every N-th version additionally stores a full compressed columnar snapshot,
+    so restoring never replays more than N deltas.
+    """
+
+    __tablename__ = "model_versions"
+    __table_args__ = (
+        UniqueConstraint("project_id", "version_number", name="uq_model_versions_project_version"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    version_number: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Compressed columnar encoding of all variables (only on snapshot versions).
+    # The length makes MySQL use LONGBLOB; a plain BLOB holds only 64 KB.
+    snapshot: Mapped[bytes | None] = mapped_column(LargeBinary(2**32 - 1), nullable=True)
+    # Compressed sparse delta against the previous version (null for version 1)
+    delta: Mapped[bytes | None] = mapped_column(LargeBinary(2**32 - 1), nullable=True)
+
+    variables_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    changes_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    change_summary: Mapped[str] = mapped_column(Text, nullable=True)
+
+    created_by_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,74 @@
+"""Portfolio rollup ORM models."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    Uuid,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class PortfolioRollup(Base):
+    """
+    A tenant-level variable aggregating one output across projects.
+
+    The sum/count/min/max columns are materialized: they are adjusted
+    incrementally whenever a contributing project's value changes, so a
+    portfolio view reads them directly instead of loading any project.
+    """
+
+    __tablename__ = "portfolio_rollups"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "key", name="uq_portfolio_rollups_tenant_key"),
+        Index("ix_portfolio_rollups_tenant_variable", "tenant_id", "variable_key"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    label: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Key of the variable aggregated in every source project
+    variable_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    # sum, avg, min, max or count
+    aggregate: Mapped[str] = mapped_column(String(20), nullable=False, default="sum")
+    # Restrict to these projects (null = every project of the tenant)
+    project_ids: Mapped[list | None] = mapped_column(JSON, nullable=True)
+
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    value_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    value_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    created_by_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class PortfolioRollupContribution(Base):
+    """The current value one project contributes to a rollup."""
+
+    __tablename__ = "portfolio_rollup_contributions"
+
+    rollup_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("portfolio_rollups.id", ondelete="CASCADE"), primary_key=True
+    )
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
@@ -0,0 +1,29 @@
+"""Project clone link ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import Boolean, DateTime, ForeignKey, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class ProjectCloneLink(Base):
+    """
+    Records which project a clone was made from.
+
+    For copy-on-write clones the clone only stores variables that were
+    edited (matched to the parent by key); every other variable is read
+    from the parent until it is written.
+    """
+
+    __tablename__ = "project_clone_links"
+
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True
+    )
+    parent_project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    copy_on_write: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
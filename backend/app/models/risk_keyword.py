@@ -0,0 +1,33 @@
+"""Risk keyword ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String, UniqueConstraint, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class RiskKeyword(Base):
+    """
+    One keyword of a tenant's own risk taxonomy.
+
+    A tenant with any keywords is scanned with exactly these instead of
+    the built-in list; categories are risk alert types.
+    """
+
+    __tablename__ = "risk_keywords"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "category", "keyword", name="uq_risk_keywords_tenant_category_keyword"
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    tenant_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    # AlertType value, e.g. "financial_risk"
+    category: Mapped[str] = mapped_column(String(50), nullable=False)
+    keyword: Mapped[str] = mapped_column(String(255), nullable=False)
+    # word, prefix or substring (see app.services.keyword_matcher)
+    match_mode: Mapped[str] = mapped_column(String(20), nullable=False, default="prefix")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
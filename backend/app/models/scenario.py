@@ -0,0 +1,52 @@
+"""Scenario ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    Uuid,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class Scenario(Base):
+    """
+    A what-if scenario stored as a sparse overlay on its project.
+
+    Only the overridden values are stored, plus a cache of the formulas
+    downstream of them; every other value is read from the base project.
+    """
+
+    __tablename__ = "scenarios"
+    __table_args__ = (
+        UniqueConstraint("project_id", "name", name="uq_scenarios_project_name"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # {variable_id: value} - the only values that differ from the base project
+    overrides: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # {variable_id: value} for formulas downstream of the overrides, valid
+    # while the base project's fingerprint equals cached_fingerprint
+    cached_results: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    cached_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    created_by_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
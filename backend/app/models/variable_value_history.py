@@ -0,0 +1,39 @@
+"""Variable value history ORM model."""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    Uuid,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class VariableValueHistory(Base):
+    """
+    Append-only log of calculated values.
+
+    Each row is one batch of value changes written by the Loom engine,
+    stored as a compressed {variable_id: value} payload. Checkpoint rows hold
+    the full state of a project and bound how far back as-of reads replay.
+    """
+
+    __tablename__ = "variable_value_history"
+    __table_args__ = (
+        Index("ix_variable_value_history_project_recorded", "project_id", "recorded_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    is_checkpoint: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    entries_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # LONGBLOB on MySQL: checkpoints of large projects exceed a 64 KB BLOB
+    payload: Mapped[bytes] = mapped_column(LargeBinary(2**32 - 1), nullable=False)
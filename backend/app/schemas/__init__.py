@@ -26,7 +26,13 @@ from app.schemas.auth import (
     RefreshTokenRequest,
     TokenResponse,
 )
-from app.schemas.project import ProjectBase, ProjectCreate, ProjectUpdate, ProjectResponse
+from app.schemas.project import (
+    ProjectBase,
+    ProjectClone,
+    ProjectCreate,
+    ProjectUpdate,
+    ProjectResponse,
+)
 from app.schemas.document import (
     DocumentBase,
     DocumentCreate,
@@ -40,6 +46,14 @@ from app.schemas.variable import (
     VariableUpdate,
     VariableResponse,
 )
+from app.schemas.portfolio import PortfolioRollupCreate, PortfolioRollupResponse
+from app.schemas.scenario import ScenarioCreate, ScenarioUpdate, ScenarioResponse
+from app.schemas.job import JobResponse
+from app.schemas.model_version import (
+    ModelVersionCreate,
+    ModelVersionResponse,
+    ModelVersionDiff,
+)
 from app.schemas.podium_access import (
     PodiumAccessBase,
     PodiumAccessCreate,
@@ -55,6 +69,8 @@ from app.schemas.risk_alert import (
     RiskAlertCreate,
     RiskAlertUpdate,
     RiskAlertResponse,
+    RiskKeywordSchema,
+    RiskKeywordTaxonomy,
 )
 from app.schemas.notification import (
     NotificationBase,
@@ -87,6 +103,7 @@ __all__ = [
     # Project schemas
     "ProjectBase",
     "ProjectCreate",
+    "ProjectClone",
     "ProjectUpdate",
     "ProjectResponse",
     # Document schemas
@@ -100,6 +117,19 @@ __all__ = [
     "VariableCreate",
     "VariableUpdate",
     "VariableResponse",
+    # Portfolio schemas
+    "PortfolioRollupCreate",
+    "PortfolioRollupResponse",
+    # Scenario schemas
+    "ScenarioCreate",
+    "ScenarioUpdate",
+    "ScenarioResponse",
+    # Job schemas
+    "JobResponse",
+    # ModelVersion schemas
+    "ModelVersionCreate",
+    "ModelVersionResponse",
+    "ModelVersionDiff",
     # PodiumAccess schemas
     "PodiumAccessBase",
     "PodiumAccessCreate",
@@ -113,6 +143,8 @@ __all__ = [
     "RiskAlertCreate",
     "RiskAlertUpdate",
     "RiskAlertResponse",
+    "RiskKeywordSchema",
+    "RiskKeywordTaxonomy",
     # Notification schemas
     "NotificationBase",
     "NotificationCreate",
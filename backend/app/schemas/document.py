@@ -23,6 +23,7 @@ class DocumentCreate(DocumentBase):
 
     project_id: UUID
     file_path: str = Field(..., min_length=1, max_length=1024)
+    meta_data: Optional[dict] = None
 
 
 class DocumentUpdate(BaseModel):
@@ -53,5 +54,11 @@ class DocumentUploadResponse(BaseModel):
     project_id: UUID
     file_name: str
     url: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    # True when the tenant already uploaded identical content
+    deduplicated: bool = False
+    # First job of the document's processing pipeline
+    job_id: Optional[UUID] = None
 
 
@@ -0,0 +1,30 @@
+"""Pydantic schemas for background jobs."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobResponse(BaseModel):
+    """State of a queued, running or finished job."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    kind: str
+    status: str
+    project_id: Optional[UUID] = None
+    document_id: Optional[UUID] = None
+    # Kinds that will run after this one succeeds
+    pipeline: Optional[List[str]] = None
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    result: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,40 @@
+"""Pydantic schemas for ModelVersion entity."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ModelVersionCreate(BaseModel):
+    """Payload for saving a project version."""
+
+    change_summary: Optional[str] = Field(None, max_length=2000)
+
+
+class ModelVersionResponse(BaseModel):
+    """Version metadata returned by the API (payloads are never exposed)."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    project_id: UUID
+    version_number: int
+    variables_count: int
+    changes_count: int
+    change_summary: Optional[str] = None
+    created_by_id: Optional[int] = None
+    created_at: datetime
+
+
+class ModelVersionDiff(BaseModel):
+    """Variables added, changed and removed between two versions."""
+
+    from_version: int
+    to_version: int
+    added: Dict[str, Dict[str, Any]]
+    changed: Dict[str, Dict[str, Any]]
+    removed: List[str]
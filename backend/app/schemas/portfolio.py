@@ -0,0 +1,34 @@
+"""Pydantic schemas for portfolio rollups."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class PortfolioRollupCreate(BaseModel):
+    """Payload for creating a portfolio rollup."""
+
+    key: str = Field(..., min_length=1, max_length=255)
+    label: str = Field(..., min_length=1, max_length=255)
+    variable_key: str = Field(..., min_length=1, max_length=255)
+    aggregate: Literal["sum", "avg", "min", "max", "count"] = "sum"
+    # Only these projects (default: every project of the tenant)
+    project_ids: Optional[List[UUID]] = None
+
+
+class PortfolioRollupResponse(BaseModel):
+    """A rollup with its current value."""
+
+    id: UUID
+    key: str
+    label: str
+    variable_key: str
+    aggregate: str
+    project_ids: Optional[List[UUID]] = None
+    value: Optional[float] = None
+    projects_count: int
+    updated_at: datetime
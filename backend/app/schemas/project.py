@@ -34,6 +34,14 @@ class ProjectUpdate(BaseModel):
     status: Optional[ProjectStatus] = None
 
 
+class ProjectClone(BaseModel):
+    """Payload for cloning a project."""
+
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    # Share the source's variables until they are edited instead of copying them
+    copy_on_write: bool = False
+
+
 class ProjectResponse(ProjectBase):
     """Representation of a project returned by the API."""
 
@@ -50,3 +50,20 @@ class RiskAlertResponse(RiskAlertBase):
     reviewed_at: datetime | None = None
     created_at: datetime
 
+
+
+class RiskKeywordSchema(BaseModel):
+    """One keyword of a tenant's risk taxonomy."""
+
+    category: AlertType
+    keyword: str = Field(..., min_length=1, max_length=255)
+    # word, prefix or substring
+    match_mode: str = "prefix"
+
+
+class RiskKeywordTaxonomy(BaseModel):
+    """Risk keywords in effect for a tenant."""
+
+    # False while the built-in keywords are used
+    custom: bool = False
+    keywords: list[RiskKeywordSchema] = Field(default_factory=list)
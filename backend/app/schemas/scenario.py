@@ -0,0 +1,40 @@
+"""Pydantic schemas for Loom scenarios."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ScenarioCreate(BaseModel):
+    """Payload for creating a scenario."""
+
+    name: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    # {variable id, key or label: value}
+    overrides: Dict[str, float] = Field(default_factory=dict)
+
+
+class ScenarioUpdate(BaseModel):
+    """Partial scenario update; an override set to null is removed."""
+
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    description: Optional[str] = None
+    overrides: Optional[Dict[str, Optional[float]]] = None
+
+
+class ScenarioResponse(BaseModel):
+    """A scenario with its overrides keyed by variable id."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    project_id: UUID
+    name: str
+    description: Optional[str] = None
+    overrides: Dict[str, float]
+    created_at: datetime
+    updated_at: datetime
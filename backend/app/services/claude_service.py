@@ -5,12 +5,11 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
-from typing import Dict, List
+from typing import Dict, Sequence
 
 from anthropic import AsyncAnthropic, APIStatusError
 
-from app.models.document import Document
-from app.services.document_processor import chunk_text, extract_text
+from app.ml.context_packer import ScoredChunk, pack_context
 
 
 logger = logging.getLogger(__name__)
@@ -27,34 +26,23 @@ class ClaudeService:
     async def query_with_context(
         self,
         query: str,
-        documents: List[Document],
-        max_context_length: int = 100_000,
+        chunks: Sequence[ScoredChunk],
+        max_context_tokens: int = 24_000,
     ) -> Dict[str, object]:
         """
-        RAG-запрос: извлекает тексты, чанкует, формирует промпт и спрашивает Claude.
+        RAG-запрос: упаковывает найденные чанки в бюджет токенов и спрашивает Claude.
 
-        Returns: {"answer": str, "sources": [doc_id]}
+        Returns: {"answer": str, "sources": [doc_id], "citations": [{document_id,
+        chunk_id, page_number, start_offset, end_offset}]}
         """
-        texts: List[str] = []
-        sources: List[str] = []
-
-        for doc in documents:
-            text = await extract_text(doc.file_path)
-            if not text:
-                continue
-            chunks = await chunk_text(text)
-            for ch in chunks:
-                if len(ch) == 0:
-                    continue
-                if sum(len(t) for t in texts) + len(ch) > max_context_length:
-                    break
-                texts.append(ch)
-                sources.append(str(doc.id))
-
-        if not texts:
+        packed = pack_context(chunks, max_context_tokens)
+        if not packed.chunks:
             raise RuntimeError("No readable document content for RAG query")
 
-        context_text = "\n\n---\n\n".join(texts)
+        context_text = packed.text
+        sources = list(dict.fromkeys(str(chunk.document_id) for chunk in packed.chunks))
+        logger.info("RAG context packed chunks=%d tokens=%d", len(packed.chunks), packed.tokens)
+
         system_prompt = (
             "You are KenesCloud Council, a strategic consulting assistant. "
             "Answer strictly based on the provided project documents. "
@@ -88,7 +76,7 @@ class ClaudeService:
             if getattr(block, "type", None) == "text":
                 parts.append(block.text)
         answer = "\n".join(parts).strip()
-        return {"answer": answer, "sources": sources}
+        return {"answer": answer, "sources": sources, "citations": packed.sources}
 
     async def stream_response(self, query: str, context: str):
         """Streaming response for real-time chat."""
@@ -2,11 +2,57 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Set
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.services.formula_parser import FormulaParser, parse_group_ref
+
+
+@dataclass(frozen=True)
+class GroupRef:
+    """
+    Virtual graph node for a {{category:...}} / {{tag:...}} reference.
+
+    The group depends on its members and formulas depend on the group, so an
+    aggregate over N variables referenced by M formulas costs N + M edges
+    instead of N * M.
+    """
+
+    kind: str
+    name: str
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+    def contains(self, category: Optional[str], tags: Iterable[str]) -> bool:
+        """Whether a variable with this category / tags belongs to the group."""
+        if self.kind == "category":
+            return category == self.name
+        return self.name in tags
+
+
+def group_refs(formula: Optional[str]) -> Set[GroupRef]:
+    """Group references used in a formula."""
+    if not formula:
+        return set()
+    refs = set()
+    for ref in re.findall(FormulaParser.VARIABLE_PATTERN, formula):
+        group = parse_group_ref(ref)
+        if group:
+            refs.add(GroupRef(*group))
+    return refs
+
+
+def variable_tags(validation_rules: Optional[Dict[str, Any]]) -> List[str]:
+    """Tags are stored as validation_rules["tags"]."""
+    tags = (validation_rules or {}).get("tags") or []
+    return [str(tag) for tag in tags] if isinstance(tags, list) else []
+
 
 class DependencyResolver:
     """
@@ -23,6 +69,9 @@ class DependencyResolver:
         Build a graph of variable dependencies.
 
         Returns: {variable_id: set_of_variables_it_depends_on}
+
+        Group references add one GroupRef node per group (see `GroupRef`);
+        callers that only want variables should skip those nodes.
         """
         from app.models.variable import Variable
 
@@ -32,42 +81,54 @@ class DependencyResolver:
             .all()
         )
 
-        graph: Dict[UUID, Set[UUID]] = {}
+        graph: Dict[Hashable, Set[Hashable]] = {}
+        referrers: Dict[GroupRef, Set[UUID]] = {}
         for var in variables:
-            depends_on = set(var.depends_on) if var.depends_on else set()
+            depends_on: Set[Hashable] = set(var.depends_on) if var.depends_on else set()
+            for group in group_refs(var.formula):
+                depends_on.add(group)
+                referrers.setdefault(group, set()).add(var.id)
             graph[var.id] = depends_on
 
+        for group, refs in referrers.items():
+            # A total over its own category does not depend on itself
+            graph[group] = {
+                var.id
+                for var in variables
+                if var.id not in refs
+                and group.contains(var.category.value, variable_tags(var.validation_rules))
+            }
+
         return graph
 
-    def topological_sort(self, graph: Dict[UUID, Set[UUID]]) -> List[UUID]:
+    @staticmethod
+    def topological_sort(graph: Dict[UUID, Set[UUID]]) -> List[UUID]:
         """
         Sort variables in calculation order (dependencies first).
 
         Raises ValueError if circular dependency detected.
 
-        Uses Kahn's algorithm.
+        Uses Kahn's algorithm over a reverse adjacency index, O(V + E).
         """
-        # Calculate in-degree (how many variables depend on this one)
-        in_degree: Dict[UUID, int] = {node: 0 for node in graph}
-        for node, deps in graph.items():
-            for dep in deps:
-                if dep in in_degree:
-                    in_degree[dep] += 1
+        # In-degree = number of (known) variables this one depends on
+        in_degree: Dict[UUID, int] = {
+            node: sum(1 for dep in deps if dep in graph) for node, deps in graph.items()
+        }
+        dependents = DependencyResolver.build_dependents(graph)
 
         # Start with nodes that have no dependencies
-        queue: List[UUID] = [node for node, degree in in_degree.items() if degree == 0]
+        queue = deque(node for node, degree in in_degree.items() if degree == 0)
         sorted_order: List[UUID] = []
 
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             sorted_order.append(node)
 
-            # Remove edges from this node
-            for neighbor, deps in graph.items():
-                if node in deps:
-                    in_degree[neighbor] -= 1
-                    if in_degree[neighbor] == 0:
-                        queue.append(neighbor)
+            # Release variables that were waiting on this node
+            for dependent in dependents.get(node, ()):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
 
         # Check for circular dependencies
         if len(sorted_order) != len(graph):
@@ -75,21 +136,35 @@ class DependencyResolver:
 
         return sorted_order
 
+    @staticmethod
+    def build_dependents(graph: Dict[UUID, Set[UUID]]) -> Dict[UUID, List[UUID]]:
+        """
+        Invert the graph.
+
+        Returns: {variable_id: [variables_that_depend_on_it]}
+        """
+        dependents: Dict[UUID, List[UUID]] = {}
+        for node, deps in graph.items():
+            for dep in deps:
+                if dep in graph:
+                    dependents.setdefault(dep, []).append(node)
+        return dependents
+
     def get_affected_variables(
         self, variable_id: UUID, graph: Dict[UUID, Set[UUID]]
     ) -> Set[UUID]:
         """
         Get all variables that depend on the given variable (directly or indirectly).
         """
+        dependents = self.build_dependents(graph)
         affected: Set[UUID] = set()
         to_check: List[UUID] = [variable_id]
 
         while to_check:
             current = to_check.pop()
-            for var_id, deps in graph.items():
-                if current in deps and var_id not in affected:
+            for var_id in dependents.get(current, ()):
+                if var_id not in affected:
                     affected.add(var_id)
                     to_check.append(var_id)
 
         return affected
-
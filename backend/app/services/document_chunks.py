@@ -0,0 +1,303 @@
+"""Persisted chunks of extracted document text."""
+
+from __future__ import annotations
+
+import logging
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterable, Dict, List, Optional, Sequence
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.ml.bm25 import BM25Scorer, Posting, term_frequencies
+from app.ml.context_packer import ScoredChunk
+from app.ml.embeddings import HashingEmbedder
+from app.ml.vector_index import VectorIndex
+from app.models.document import Document, DocumentStatus
+from app.models.document_chunk import DocumentChunk, DocumentChunkTerm
+from app.services.document_processor import Page, TextChunk, iter_chunks, split_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentChunkService:
+    """
+    Writes a document's chunks once at ingestion and serves them to RAG.
+
+    Each chunk's BM25 postings are written with it, so the per-project
+    index grows incrementally and a query only reads the postings of its
+    own terms. Chunk embeddings are appended to a per-project vector file
+    at the same time; vectors of chunks that were later replaced or rolled
+    back stay in the file, are dropped when results are matched against
+    the database, and are removed once they outnumber the live ones
+    (`compact_vectors`). Readers never touch the documents: those
+    processed before chunks were stored are chunked from their
+    extracted_text once, by `backfill`.
+    """
+
+    INSERT_BATCH_SIZE = 1000
+    # Rewrite a vector file once it holds this many vectors per live chunk
+    COMPACT_RATIO = 2
+    # Reciprocal rank fusion constant (Cormack et al.)
+    RRF_K = 60
+
+    def __init__(self, chunk_size: int = 2000, index_dir: Optional[Path] = None):
+        self.chunk_size = chunk_size
+        self.scorer = BM25Scorer()
+        self.embedder = HashingEmbedder()
+        self.index_dir = index_dir or Path(settings.vector_index_dir)
+
+    def store(self, db: Session, document: Document, text: str) -> int:
+        """Replace a document's chunks and postings with those of `text`. Does not commit."""
+        self.clear(db, document)
+        chunks = split_chunks(text, self.chunk_size)
+        postings = self._write(db, document, chunks)
+        logger.info(
+            "Document chunked id=%s chunks=%d postings=%d", document.id, len(chunks), postings
+        )
+        return len(chunks)
+
+    async def store_pages(self, db: Session, document: Document, pages: AsyncIterable[Page]) -> int:
+        """
+        Replace a document's chunks with those of a page stream. Does not commit.
+
+        Chunks, postings and vectors are written every `INSERT_BATCH_SIZE`
+        chunks, so only one batch is held in memory however long the
+        document is.
+        """
+        self.clear(db, document)
+        batch: List[TextChunk] = []
+        count = 0
+        postings = 0
+        async for chunk in iter_chunks(pages, self.chunk_size):
+            batch.append(chunk)
+            if len(batch) >= self.INSERT_BATCH_SIZE:
+                postings += self._write(db, document, batch)
+                count += len(batch)
+                batch = []
+        postings += self._write(db, document, batch)
+        count += len(batch)
+        logger.info("Document chunked id=%s chunks=%d postings=%d", document.id, count, postings)
+        return count
+
+    @staticmethod
+    def clear(db: Session, document: Document) -> None:
+        """Delete a document's chunks and postings. Does not commit."""
+        old_ids = select(DocumentChunk.id).where(DocumentChunk.document_id == document.id)
+        db.execute(delete(DocumentChunkTerm).where(DocumentChunkTerm.chunk_id.in_(old_ids)))
+        db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document.id))
+
+    def backfill(self, db: Session, project_id: Optional[UUID] = None) -> int:
+        """
+        Chunk documents that have extracted text but no stored chunks yet.
+
+        Documents are loaded and committed one at a time; returns how many
+        were chunked. Run by scripts/backfill_document_chunks.py.
+        """
+        chunked = select(DocumentChunk.id).where(DocumentChunk.document_id == Document.id).exists()
+        query = select(Document.id).where(Document.extracted_text.is_not(None), ~chunked)
+        if project_id is not None:
+            query = query.where(Document.project_id == project_id)
+        count = 0
+        for document_id in db.execute(query).scalars().all():
+            document = db.get(Document, document_id)
+            if document.extracted_text:
+                self.store(db, document, document.extracted_text)
+                db.commit()
+                count += 1
+        return count
+
+    def for_project(
+        self, db: Session, project_id: UUID, limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """Chunks of a project, newest document first then in ordinal order, at most `limit`."""
+        query = (
+            db.query(DocumentChunk)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .filter(DocumentChunk.project_id == project_id)
+            .order_by(Document.created_at.desc(), DocumentChunk.document_id, DocumentChunk.ordinal)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def search(
+        self, db: Session, project_id: UUID, query: str, limit: int = 20
+    ) -> List[DocumentChunk]:
+        """The `limit` chunks of a project that best match `query` (BM25), best first."""
+        query_terms = term_frequencies(query)
+        if not query_terms:
+            return []
+
+        n_chunks, avg_length = db.execute(
+            select(func.count(DocumentChunk.id), func.avg(DocumentChunk.term_count)).where(
+                DocumentChunk.project_id == project_id
+            )
+        ).one()
+        if not n_chunks:
+            return []
+
+        rows = db.execute(
+            select(
+                DocumentChunkTerm.chunk_id,
+                DocumentChunkTerm.term,
+                DocumentChunkTerm.tf,
+                DocumentChunk.term_count,
+            )
+            .join(DocumentChunk, DocumentChunk.id == DocumentChunkTerm.chunk_id)
+            .where(
+                DocumentChunkTerm.project_id == project_id,
+                DocumentChunkTerm.term.in_(list(query_terms)),
+            )
+        ).all()
+        postings = [Posting(chunk_id, term, tf, length) for chunk_id, term, tf, length in rows]
+        df = Counter(posting.term for posting in postings)
+        scores = self.scorer.score(postings, n_chunks, float(avg_length or 0), df, query_terms)
+        ranked = [chunk_id for chunk_id, _ in self.scorer.top(scores, limit)]
+        return self._load(db, project_id, ranked)
+
+    def semantic_search(
+        self, db: Session, project_id: UUID, query: str, limit: int = 20
+    ) -> List[DocumentChunk]:
+        """The `limit` chunks of a project closest to `query` in embedding space."""
+        # Over-fetch: some stored vectors may belong to replaced chunks
+        hits = self.vectors(project_id).search(self.embedder.embed([query]), limit * 2)[0]
+        ranked = [chunk_id for chunk_id, similarity in hits if similarity > 0]
+        return self._load(db, project_id, ranked)[:limit]
+
+    def retrieve(
+        self, db: Session, project_id: UUID, query: str, limit: int = 20
+    ) -> List[ScoredChunk]:
+        """
+        Keyword (BM25) and semantic results merged by reciprocal rank fusion.
+
+        Chunks ranked high by either method come first; chunks found by
+        both are boosted. Scores are the fused RRF scores.
+        """
+        fused: Dict[UUID, float] = {}
+        chunks: Dict[UUID, DocumentChunk] = {}
+        for results in (
+            self.search(db, project_id, query, limit),
+            self.semantic_search(db, project_id, query, limit),
+        ):
+            for rank, chunk in enumerate(results):
+                chunks[chunk.id] = chunk
+                fused[chunk.id] = fused.get(chunk.id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+        ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+        return [ScoredChunk.from_chunk(chunks[chunk_id], fused[chunk_id]) for chunk_id in ranked]
+
+    @staticmethod
+    def by_position(chunks: Sequence[DocumentChunk]) -> List[ScoredChunk]:
+        """Score unranked chunks by position, earlier first."""
+        return [ScoredChunk.from_chunk(chunk, 1.0 / (rank + 1)) for rank, chunk in enumerate(chunks)]
+
+    def vectors(self, project_id: UUID) -> VectorIndex:
+        """The project's chunk embedding index."""
+        return VectorIndex(
+            self.index_dir / str(project_id) / f"chunks-{self.embedder.name}.vec",
+            self.embedder.dim,
+        )
+
+    def compact_vectors(self, db: Session, project_id: UUID) -> int:
+        """
+        Drop vectors of deleted chunks once they outnumber the live ones.
+
+        Skipped while a document of the project is not yet ready or failed,
+        since chunks it is still writing would lose their vectors. Returns the number
+        of vectors dropped.
+        """
+        index = self.vectors(project_id)
+        stored = len(index)
+        if not stored:
+            return 0
+        live = db.execute(
+            select(func.count(DocumentChunk.id)).where(DocumentChunk.project_id == project_id)
+        ).scalar_one()
+        if stored <= self.COMPACT_RATIO * live:
+            return 0
+        ingesting = db.execute(
+            select(Document.id)
+            .where(
+                Document.project_id == project_id,
+                Document.status.notin_([DocumentStatus.READY, DocumentStatus.ERROR]),
+            )
+            .limit(1)
+        ).first()
+        if ingesting:
+            return 0
+        keep = set(
+            db.execute(
+                select(DocumentChunk.id).where(DocumentChunk.project_id == project_id)
+            ).scalars()
+        )
+        dropped = index.compact(keep)
+        logger.info(
+            "Vector index compacted project_id=%s dropped=%d kept=%d",
+            project_id,
+            dropped,
+            stored - dropped,
+        )
+        return dropped
+
+    def drop_project(self, project_id: UUID) -> None:
+        """Delete a project's vector files (its rows go with the project)."""
+        shutil.rmtree(self.index_dir / str(project_id), ignore_errors=True)
+
+    @staticmethod
+    def _load(db: Session, project_id: UUID, ranked: List[UUID]) -> List[DocumentChunk]:
+        """Chunks by id in the given order, skipping ids no longer in the project."""
+        if not ranked:
+            return []
+        by_id = {
+            chunk.id: chunk
+            for chunk in db.query(DocumentChunk).filter(
+                DocumentChunk.id.in_(ranked), DocumentChunk.project_id == project_id
+            )
+        }
+        return [by_id[chunk_id] for chunk_id in ranked if chunk_id in by_id]
+
+    def _write(self, db: Session, document: Document, chunks: Sequence[TextChunk]) -> int:
+        """Insert chunks with their postings and vectors; returns the posting count."""
+        rows = []
+        postings = []
+        for chunk in chunks:
+            chunk_id = uuid4()
+            terms = term_frequencies(chunk.text)
+            rows.append(
+                {
+                    "id": chunk_id,
+                    "document_id": document.id,
+                    "project_id": document.project_id,
+                    "ordinal": chunk.ordinal,
+                    "start_offset": chunk.start_offset,
+                    "end_offset": chunk.end_offset,
+                    "page_number": chunk.page_number,
+                    "char_count": chunk.char_count,
+                    "token_count": chunk.token_count,
+                    "term_count": sum(terms.values()),
+                    "text": chunk.text,
+                }
+            )
+            postings.extend(
+                {"chunk_id": chunk_id, "term": term, "project_id": document.project_id, "tf": tf}
+                for term, tf in terms.items()
+            )
+        self._insert(db, DocumentChunk, rows)
+        self._insert(db, DocumentChunkTerm, postings)
+        if rows:
+            self.vectors(document.project_id).append(
+                [row["id"] for row in rows],
+                self.embedder.embed([row["text"] for row in rows]),
+            )
+        return len(postings)
+
+    def _insert(self, db: Session, model, rows: List[dict]) -> None:
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            db.execute(
+                insert(model).execution_options(render_nulls=True),
+                rows[start : start + self.INSERT_BATCH_SIZE],
+            )
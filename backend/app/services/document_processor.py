@@ -3,59 +3,312 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import AsyncIterable, AsyncIterator, Deque, Iterator, List, Optional, Sequence, Tuple
 
-import PyPDF2
 from docx import Document as DocxDocument
 
+from app.core.config import settings
+from app.ml.context_packer import estimate_tokens
+from app.tasks.pdf_worker import extract_pdf_pages, init_pdf_worker, pdf_page_count
 
-async def extract_text(file_path: str) -> str:
+logger = logging.getLogger(__name__)
+
+# Separates pages in extracted PDF text, as pdftotext does
+PAGE_BREAK = "\f"
+
+
+@dataclass
+class TextChunk:
+    """A slice of a document's extracted text."""
+
+    ordinal: int
+    start_offset: int
+    end_offset: int
+    page_number: Optional[int]
+    text: str
+
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+    @property
+    def token_count(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class Page:
     """
-    Extract text from a document based on its extension.
+    One page of extracted text.
 
-    Supports PDF, DOCX, TXT. Returns empty string on errors.
+    `number` starts at 1 and is None for unpaged documents (DOCX, plain
+    text), which arrive as consecutive blocks instead. `offset` is where
+    the page starts in the joined text (see `join_pages`).
+    """
+
+    number: Optional[int]
+    offset: int
+    text: str
+
+
+# Plain text files are read in blocks of this many characters
+TEXT_BLOCK_CHARS = 1 << 20
+
+
+async def iter_pages(file_path: str) -> AsyncIterator[Page]:
+    """
+    Yield a document's text page by page, in order.
+
+    Only a bounded window of pages is held at a time: PDF page ranges are
+    yielded as soon as they and all earlier ranges are done, and plain
+    text is read in blocks. Raises PdfExtractionError when a PDF hits its
+    limits; other errors propagate.
     """
     path = Path(file_path)
     if not path.exists() or not path.is_file():
-        return ""
+        return
 
     suffix = path.suffix.lower()
-    try:
-        if suffix == ".pdf":
-            return await asyncio.to_thread(_extract_pdf, path)
-        if suffix in {".docx", ".doc"}:
-            return await asyncio.to_thread(_extract_docx, path)
+    if suffix == ".pdf":
+        pages = _iter_pdf_pages(path)
+    elif suffix in {".docx", ".doc"}:
+        pages = _iter_docx(path)
+    else:
         # Fallback to plain text
-        return await asyncio.to_thread(path.read_text, encoding="utf-8", errors="ignore")
+        pages = _iter_text_blocks(path)
+
+    offset = 0
+    async for number, text in pages:
+        if number is not None and number > 1:
+            offset += len(PAGE_BREAK)
+        yield Page(number=number, offset=offset, text=text)
+        offset += len(text)
+
+
+def join_pages(pages: Sequence[Page]) -> str:
+    """The full text of a document from its pages, as stored in extracted_text."""
+    if pages and pages[0].number is not None:
+        return PAGE_BREAK.join(page.text for page in pages)
+    return "".join(page.text for page in pages)
+
+
+def text_pages(text: str) -> Iterator[Page]:
+    """Split joined text back into its pages."""
+    if not text:
+        return
+    if PAGE_BREAK not in text:
+        yield Page(number=None, offset=0, text=text)
+        return
+    offset = 0
+    for number, page in enumerate(text.split(PAGE_BREAK), start=1):
+        yield Page(number=number, offset=offset, text=page)
+        offset += len(page) + len(PAGE_BREAK)
+
+
+async def extract_text(file_path: str) -> str:
+    """
+    Extract text from a document based on its extension.
+
+    Supports PDF, DOCX, TXT. Returns empty string on errors.
+    """
+    try:
+        return join_pages([page async for page in iter_pages(file_path)])
+    except PdfExtractionError as e:
+        logger.warning("%s", e)
+        return ""
     except Exception:
         return ""
 
 
 async def chunk_text(text: str, chunk_size: int = 2000) -> List[str]:
     """Split text into chunks of roughly `chunk_size` characters."""
-    if not text:
-        return []
-    chunks: List[str] = []
+    return [chunk.text for chunk in split_chunks(text, chunk_size)]
+
+
+def split_chunks(text: str, chunk_size: int = 2000) -> List[TextChunk]:
+    """
+    Split extracted text into chunks of at most `chunk_size` characters.
+
+    Chunks never span a page break and end at a paragraph or word boundary
+    when one falls in the last fifth of the window. Offsets index into
+    `text`; page numbers start at 1 and are only set for paged documents.
+    """
+    chunks: List[TextChunk] = []
+    for page in text_pages(text):
+        chunks.extend(_split_page(page, chunk_size, len(chunks), final=True)[0])
+    return chunks
+
+
+async def iter_chunks(pages: AsyncIterable[Page], chunk_size: int = 2000) -> AsyncIterator[TextChunk]:
+    """
+    Chunk a page stream exactly as `split_chunks` chunks the joined text.
+
+    Unpaged blocks hand their unfinished tail on to the next block, so
+    block boundaries never cut a chunk short.
+    """
+    ordinal = 0
+    tail: Optional[Page] = None
+    async for page in pages:
+        if tail is not None:
+            page = Page(number=page.number, offset=tail.offset, text=tail.text + page.text)
+        chunks, consumed = _split_page(page, chunk_size, ordinal, final=page.number is not None)
+        for chunk in chunks:
+            yield chunk
+        ordinal += len(chunks)
+        tail = None
+        if consumed < len(page.text):
+            tail = Page(number=None, offset=page.offset + consumed, text=page.text[consumed:])
+    if tail is not None:
+        for chunk in _split_page(tail, chunk_size, ordinal, final=True)[0]:
+            yield chunk
+
+
+def _split_page(
+    page: Page, chunk_size: int, first_ordinal: int, final: bool
+) -> Tuple[List[TextChunk], int]:
+    """
+    Chunks of one page and how many of its characters they consumed.
+
+    Unless `final`, the piece reaching the end of the page is left
+    unconsumed: more text may follow that would move its boundary.
+    """
+    chunks: List[TextChunk] = []
+    text = page.text
     start = 0
     while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            floor = start + chunk_size * 4 // 5
+            cut = max(text.rfind("\n\n", floor, end), text.rfind(" ", floor, end))
+            if cut > start:
+                end = cut
+        elif not final:
+            break
+        piece = text[start:end]
+        if piece.strip():
+            chunks.append(
+                TextChunk(
+                    ordinal=first_ordinal + len(chunks),
+                    start_offset=page.offset + start,
+                    end_offset=page.offset + end,
+                    page_number=page.number,
+                    text=piece,
+                )
+            )
         start = end
-    return chunks
+    return chunks, start
+
 
+class PdfExtractionError(Exception):
+    """A PDF could not be extracted within its time or memory limits."""
 
-def _extract_pdf(path: Path) -> str:
-    text_parts: List[str] = []
-    with path.open("rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            try:
-                text_parts.append(page.extract_text() or "")
-            except Exception:
-                continue
-    return "\n".join(text_parts)
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_extract_workers,
+            # Workers never inherit the event loop, threads or DB connections
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_pdf_worker,
+            initargs=(settings.pdf_worker_memory_mb,),
+            # Recycle workers so leaks from odd PDFs do not accumulate
+            max_tasks_per_child=100,
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool(wait: bool = False) -> None:
+    """Stop the PDF workers (on app shutdown, or after one crashed)."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=wait, cancel_futures=True)
+        _pdf_pool = None
+
+
+async def _iter_pdf_pages(path: Path) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Extract a PDF in page ranges on the process pool, yielding (number, text).
+
+    Pages are split into tasks of `pdf_pages_per_task`. At most
+    `pdf_extract_workers` tasks are in flight; each finished range is
+    yielded in page order and replaced by the next one, so memory is
+    bounded by the window rather than the document. The whole document
+    shares one deadline (`pdf_extract_timeout_seconds`), enforced inside
+    the workers as well, and every worker's address space is capped at
+    `pdf_worker_memory_mb`. Raises PdfExtractionError when a limit is hit.
+    """
+    timeout = settings.pdf_extract_timeout_seconds
+    deadline = time.monotonic() + timeout
+    step = max(1, settings.pdf_pages_per_task)
+    pool = _get_pdf_pool()
+    loop = asyncio.get_running_loop()
+    pending: Deque[asyncio.Future] = deque()
+    page_count = 0
+    starts = iter(())
+
+    def submit() -> None:
+        start = next(starts, None)
+        if start is not None:
+            pending.append(
+                loop.run_in_executor(
+                    pool,
+                    extract_pdf_pages,
+                    str(path),
+                    start,
+                    min(start + step, page_count),
+                    deadline - time.monotonic(),
+                )
+            )
+
+    number = 0
+    try:
+        page_count = await asyncio.wait_for(
+            loop.run_in_executor(pool, pdf_page_count, str(path), deadline - time.monotonic()),
+            timeout=max(deadline - time.monotonic(), 0.1),
+        )
+        starts = iter(range(0, page_count, step))
+        for _ in range(max(1, settings.pdf_extract_workers)):
+            submit()
+        while pending:
+            texts = await asyncio.wait_for(
+                pending[0], timeout=max(deadline - time.monotonic(), 0.1)
+            )
+            pending.popleft()
+            submit()
+            for text in texts:
+                number += 1
+                yield number, text
+    except TimeoutError as e:
+        raise PdfExtractionError(f"PDF extraction timed out after {timeout}s: {path.name}") from e
+    except BrokenProcessPool as e:
+        # A worker died (e.g. killed at the memory cap); start a fresh pool
+        shutdown_pdf_pool()
+        raise PdfExtractionError(f"PDF extraction worker crashed: {path.name}") from e
+    except MemoryError as e:
+        raise PdfExtractionError(f"PDF extraction exceeded the memory limit: {path.name}") from e
+    finally:
+        for task in pending:
+            task.cancel()
+
+    logger.info("PDF extracted file=%s pages=%d", path.name, page_count)
+
+
+async def _iter_docx(path: Path) -> AsyncIterator[Tuple[None, str]]:
+    # python-docx parses the whole file anyway, so it is a single block
+    yield None, await asyncio.to_thread(_extract_docx, path)
 
 
 def _extract_docx(path: Path) -> str:
@@ -63,5 +316,17 @@ def _extract_docx(path: Path) -> str:
     return "\n".join(p.text for p in doc.paragraphs)
 
 
-
-
+async def _iter_text_blocks(path: Path) -> AsyncIterator[Tuple[None, str]]:
+    """Read a text file in blocks that end at a line break where possible."""
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        carry = ""
+        while True:
+            block = await asyncio.to_thread(f.read, TEXT_BLOCK_CHARS)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind("\n") + 1 or len(block)
+            carry = block[cut:]
+            yield None, block[:cut]
+        if carry:
+            yield None, carry
@@ -0,0 +1,190 @@
+"""Content-addressed storage of uploaded documents."""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob, DocumentBlobTenant
+from app.services.upload_storage import save_upload
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROOT = Path("uploads")
+
+
+def document_sha256(document: Document) -> Optional[str]:
+    """Hash of the blob a document points at (None for pre-dedup uploads)."""
+    return (document.meta_data or {}).get("sha256")
+
+
+class DocumentStorage:
+    """
+    Stores uploads once per distinct content.
+
+    Files live at `{root}/blobs/{hash[:2]}/{hash}{suffix}`. An upload is
+    streamed to a staging file first; once its hash is known it either
+    becomes a new blob or is discarded in favour of the existing one, whose
+    reference count goes up. Each tenant's references are counted too, so
+    duplicates are only reported to a tenant that uploaded the content
+    itself. Does not commit; files are deleted by `delete_files` once the
+    release is committed.
+    """
+
+    def __init__(self, root: Path = UPLOAD_ROOT):
+        self.root = root
+
+    async def store(
+        self,
+        db: Session,
+        upload: UploadFile,
+        file_name: str,
+        tenant_id: int,
+        max_bytes: int,
+        chunk_size: int,
+    ) -> Tuple[DocumentBlob, bool]:
+        """
+        Store a tenant's upload and take a reference to its blob.
+
+        Returns (blob, deduplicated); `deduplicated` is True when the
+        tenant already holds identical content, whoever else does.
+        Raises UploadTooLargeError like `save_upload`.
+        """
+        staging = self.root / "staging" / uuid4().hex
+        staged = await save_upload(upload, staging, max_bytes=max_bytes, chunk_size=chunk_size)
+
+        blob = self._acquire(db, staged.sha256)
+        if blob is not None:
+            staging.unlink(missing_ok=True)
+            return blob, self._acquire_for_tenant(db, blob.sha256, tenant_id)
+
+        path = self.root / "blobs" / staged.sha256[:2] / (staged.sha256 + Path(file_name).suffix.lower())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        await run_in_threadpool(os.replace, staging, path)
+        blob = DocumentBlob(
+            sha256=staged.sha256, size=staged.size, storage_path=str(path), ref_count=1
+        )
+        try:
+            # A concurrent upload of the same content may have won the insert
+            with db.begin_nested():
+                db.add(blob)
+        except IntegrityError:
+            # Same bytes at the same path, so the file it references is intact
+            blob = self._acquire(db, staged.sha256)
+            return blob, self._acquire_for_tenant(db, blob.sha256, tenant_id)
+
+        self._acquire_for_tenant(db, blob.sha256, tenant_id)
+        logger.info("Document blob stored sha256=%s bytes=%d", blob.sha256, blob.size)
+        return blob, False
+
+    def get(self, db: Session, document: Document) -> Optional[DocumentBlob]:
+        """The blob behind a document, if it has one."""
+        sha256 = document_sha256(document)
+        return db.get(DocumentBlob, sha256) if sha256 else None
+
+    def release(self, db: Session, document: Document) -> List[Path]:
+        """
+        Drop a document's reference to its blob, deleting the blob with the
+        last one. Documents without a blob own their file. Returns the
+        files to delete once the release is committed.
+        """
+        sha256 = document_sha256(document)
+        if sha256 is None:
+            return [Path(document.file_path)]
+
+        tenant_id = document.project.tenant_id
+        db.execute(
+            update(DocumentBlobTenant)
+            .where(DocumentBlobTenant.sha256 == sha256, DocumentBlobTenant.tenant_id == tenant_id)
+            .values(ref_count=DocumentBlobTenant.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(DocumentBlobTenant)
+            .where(
+                DocumentBlobTenant.sha256 == sha256,
+                DocumentBlobTenant.tenant_id == tenant_id,
+                DocumentBlobTenant.ref_count <= 0,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(DocumentBlob)
+            .where(DocumentBlob.sha256 == sha256)
+            .values(ref_count=DocumentBlob.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        path = db.execute(
+            select(DocumentBlob.storage_path).where(DocumentBlob.sha256 == sha256)
+        ).scalar()
+        deleted = db.execute(
+            delete(DocumentBlob)
+            .where(DocumentBlob.sha256 == sha256, DocumentBlob.ref_count <= 0)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not (deleted and path):
+            return []
+        logger.info("Document blob deleted sha256=%s", sha256)
+        return [Path(path)]
+
+    def release_project(self, db: Session, project_id: UUID) -> List[Path]:
+        """Release the blobs of every document of a project (before deleting it)."""
+        documents: List[Document] = (
+            db.query(Document).filter(Document.project_id == project_id).all()
+        )
+        return [path for document in documents for path in self.release(db, document)]
+
+    def delete_files(self, paths: List[Path]) -> None:
+        """Delete the files of committed releases."""
+        for path in paths:
+            self._unlink(path)
+
+    @staticmethod
+    def _acquire(db: Session, sha256: str) -> Optional[DocumentBlob]:
+        taken = db.execute(
+            update(DocumentBlob)
+            .where(DocumentBlob.sha256 == sha256)
+            .values(ref_count=DocumentBlob.ref_count + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not taken:
+            return None
+        blob = db.get(DocumentBlob, sha256)
+        db.refresh(blob)
+        return blob
+
+    @staticmethod
+    def _acquire_for_tenant(db: Session, sha256: str, tenant_id: int) -> bool:
+        """Count a tenant's reference to a blob; True if it already had one."""
+        taken = db.execute(
+            update(DocumentBlobTenant)
+            .where(DocumentBlobTenant.sha256 == sha256, DocumentBlobTenant.tenant_id == tenant_id)
+            .values(ref_count=DocumentBlobTenant.ref_count + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if taken:
+            return True
+        try:
+            # A concurrent upload of the tenant may have won the insert
+            with db.begin_nested():
+                db.add(DocumentBlobTenant(sha256=sha256, tenant_id=tenant_id, ref_count=1))
+        except IntegrityError:
+            return DocumentStorage._acquire_for_tenant(db, sha256, tenant_id)
+        return False
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            logger.warning("Failed to delete file at %s", path)
@@ -0,0 +1,149 @@
+"""Aggregate and financial functions available in Loom formulas.
+
+Group references such as {{category:input}} or {{tag:opex}} evaluate to
+NumPy arrays, so every function here accepts scalars, arrays or a mix of
+both and reduces them with vectorized kernels.
+"""
+
+from __future__ import annotations
+
+import builtins
+from typing import Any
+
+import numpy as np
+
+
+def _flatten(args: tuple) -> np.ndarray:
+    """Concatenate scalar and array arguments into one float vector."""
+    if len(args) == 1 and isinstance(args[0], (list, tuple)):
+        args = tuple(args[0])
+    parts = [np.atleast_1d(np.asarray(arg, dtype=float)).ravel() for arg in args]
+    if not parts:
+        return np.empty(0)
+    return np.concatenate(parts)
+
+
+def _scalar(value: Any) -> float:
+    return float(value)
+
+
+# Aggregates ---------------------------------------------------------------
+
+
+def agg_sum(*args: Any) -> float:
+    """Sum of all values (scalars, groups or lists)."""
+    return _scalar(np.sum(_flatten(args)))
+
+
+def agg_avg(*args: Any) -> float:
+    """Arithmetic mean; 0 for an empty group."""
+    values = _flatten(args)
+    return _scalar(values.mean()) if values.size else 0.0
+
+
+def agg_min(*args: Any) -> float:
+    """Smallest value; 0 for an empty group."""
+    values = _flatten(args)
+    return _scalar(values.min()) if values.size else 0.0
+
+
+def agg_max(*args: Any) -> float:
+    """Largest value; 0 for an empty group."""
+    values = _flatten(args)
+    return _scalar(values.max()) if values.size else 0.0
+
+
+def agg_count(*args: Any) -> int:
+    """Number of values."""
+    return int(_flatten(args).size)
+
+
+# Financial ----------------------------------------------------------------
+
+
+def discount(value: Any, rate: float, periods: Any = 1) -> Any:
+    """Present value of `value` received after `periods` at `rate` per period."""
+    result = np.asarray(value, dtype=float) / (1.0 + rate) ** np.asarray(periods, dtype=float)
+    return _scalar(result) if result.ndim == 0 else result
+
+
+def npv(rate: float, *cashflows: Any) -> float:
+    """
+    Net present value of cash flows at periods 0, 1, 2, ...
+
+    Like the Excel function shifted by one period: the first flow is not
+    discounted (use discount(npv(...), rate) for Excel semantics).
+    """
+    flows = _flatten(cashflows)
+    factors = (1.0 + rate) ** -np.arange(flows.size, dtype=float)
+    return _scalar(flows @ factors)
+
+
+def irr(*cashflows: Any) -> float:
+    """
+    Internal rate of return of cash flows at periods 0, 1, 2, ...
+
+    Solves NPV(r) = 0 as a polynomial in 1 / (1 + r) and returns the real
+    solution closest to zero. Raises ValueError if there is none.
+    """
+    flows = _flatten(cashflows)
+    if flows.size < 2 or not (np.any(flows > 0) and np.any(flows < 0)):
+        raise ValueError("IRR needs at least one positive and one negative cash flow")
+
+    roots = np.roots(flows[::-1])
+    roots = roots[np.isclose(roots.imag, 0.0) & (roots.real > 0)].real
+    if roots.size == 0:
+        raise ValueError("IRR did not converge")
+    rates = 1.0 / roots - 1.0
+    return _scalar(rates[np.argmin(np.abs(rates))])
+
+
+def pmt(rate: float, nper: float, pv: float, fv: float = 0.0, when: int = 0) -> float:
+    """Payment per period for a loan/annuity (Excel sign convention)."""
+    if rate == 0:
+        return -(pv + fv) / nper
+    growth = (1.0 + rate) ** nper
+    return -(fv + pv * growth) * rate / ((1.0 + rate * when) * (growth - 1.0))
+
+
+def pv(rate: float, nper: float, pmt: float, fv: float = 0.0, when: int = 0) -> float:
+    """Present value of an annuity (Excel sign convention)."""
+    if rate == 0:
+        return -(fv + pmt * nper)
+    growth = (1.0 + rate) ** nper
+    return -(fv + pmt * (1.0 + rate * when) * (growth - 1.0) / rate) / growth
+
+
+def fv(rate: float, nper: float, pmt: float, pv: float = 0.0, when: int = 0) -> float:
+    """Future value of an annuity (Excel sign convention)."""
+    if rate == 0:
+        return -(pv + pmt * nper)
+    growth = (1.0 + rate) ** nper
+    return -(pv * growth + pmt * (1.0 + rate * when) * (growth - 1.0) / rate)
+
+
+def _scalar_or_aggregate(builtin, aggregate):
+    """Keep builtin behaviour for scalars, reduce arrays with the kernel."""
+
+    def func(*args: Any) -> Any:
+        if builtins.any(isinstance(arg, np.ndarray) for arg in args):
+            return aggregate(*args)
+        return builtin(*args)
+
+    func.__name__ = builtin.__name__
+    return func
+
+
+FORMULA_FUNCTIONS = {
+    "sum": _scalar_or_aggregate(builtins.sum, agg_sum),
+    "min": _scalar_or_aggregate(builtins.min, agg_min),
+    "max": _scalar_or_aggregate(builtins.max, agg_max),
+    "avg": agg_avg,
+    "count": agg_count,
+    "npv": npv,
+    "irr": irr,
+    "pmt": pmt,
+    "pv": pv,
+    "fv": fv,
+    "discount": discount,
+}
@@ -2,11 +2,82 @@
 
 from __future__ import annotations
 
+import ast
 import re
-from typing import Any, Dict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 from uuid import UUID
 
+from app.services.formula_functions import FORMULA_FUNCTIONS
+
+# Functions callable from formulas
+ALLOWED_FUNCTIONS: Dict[str, Any] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "sum": sum,
+    "len": len,
+    "pow": pow,
+    **FORMULA_FUNCTIONS,
+}
+
+# Group references: {{category:<category>}} and {{tag:<tag>}}
+GROUP_KINDS = ("category", "tag")
+
+
+def parse_group_ref(ref: str) -> Optional[Tuple[str, str]]:
+    """Split a group reference into (kind, name); None for plain references."""
+    kind, sep, name = ref.partition(":")
+    if sep and kind in GROUP_KINDS and name:
+        return kind, name
+    return None
+
+# AST nodes a compiled formula may contain (no attribute access, subscripts, lambdas...)
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.keyword,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Tuple,
+    ast.List,
+    ast.operator,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+)
+
+
+@dataclass(frozen=True)
+class CompiledFormula:
+    """
+    A formula compiled once to Python bytecode.
+
+    `references` holds the {{...}} references in placeholder order; the same
+    compiled object can be evaluated any number of times with new values.
+    """
+
+    source: str
+    references: Tuple[str, ...]
+    code: Any
+
+    def evaluate(self, values: Mapping[str, Any]) -> Any:
+        """Evaluate with `values` mapping each reference to its value."""
+        local_vars = {f"_r{i}": values[ref] for i, ref in enumerate(self.references)}
+        try:
+            return eval(self.code, {"__builtins__": ALLOWED_FUNCTIONS}, local_vars)
+        except Exception as e:
+            raise ValueError(f"Formula evaluation error: {str(e)}")
+
 
 class FormulaParser:
     """
@@ -14,9 +85,13 @@ class FormulaParser:
 
     Formula syntax: {{variable_name}} or {{variable_id}}
     Example: "{{revenue}} * (1 + {{growth_rate}} / 100)"
+
+    Group references {{category:name}} and {{tag:name}} stand for the values
+    of all variables in a category / with a tag and are used with aggregate
+    functions, e.g. "sum({{tag:opex}})" or "npv(0.1, {{tag:cashflow}})".
     """
 
-    VARIABLE_PATTERN = r'\{\{([a-zA-Z0-9_\-]+)\}\}'
+    VARIABLE_PATTERN = r'\{\{([a-zA-Z0-9_\-]+(?::[a-zA-Z0-9_\-]+)?)\}\}'
 
     def parse_formula(self, formula: str) -> Dict[str, Any]:
         """
@@ -27,11 +102,12 @@ class FormulaParser:
         Returns: {
             "valid": bool,
             "variables": ["var_id_1", "var_id_2"],
+            "groups": ["category:input", "tag:opex"],
             "error": str | None
         }
         """
         if not formula:
-            return {"valid": False, "variables": [], "error": "Formula is empty"}
+            return {"valid": False, "variables": [], "groups": [], "error": "Formula is empty"}
 
         # Extract all {{variable}} references
         matches = re.findall(self.VARIABLE_PATTERN, formula)
@@ -40,21 +116,25 @@ class FormulaParser:
             return {
                 "valid": False,
                 "variables": [],
+                "groups": [],
                 "error": "No variables found in formula",
             }
 
         # Check for invalid characters (prevent SQL injection, code execution)
         allowed_chars = re.compile(r'^[\w\s\{\}\+\-\*\/\(\)\.\,\[\]]+$')
-        if not allowed_chars.match(formula):
+        if not allowed_chars.match(re.sub(self.VARIABLE_PATTERN, "_", formula)):
             return {
                 "valid": False,
                 "variables": [],
+                "groups": [],
                 "error": "Formula contains invalid characters",
             }
 
+        groups = {ref for ref in matches if parse_group_ref(ref)}
         return {
             "valid": True,
-            "variables": list(set(matches)),  # Unique variables
+            "variables": list(set(matches) - groups),  # Unique variables
+            "groups": sorted(groups),
             "error": None,
         }
 
@@ -80,19 +160,58 @@ class FormulaParser:
             expression = self.replace_variables(formula, variable_values)
 
             # Safe eval with restricted builtins
-            allowed_names = {
-                "abs": abs,
-                "min": min,
-                "max": max,
-                "round": round,
-                "sum": sum,
-                "len": len,
-                "pow": pow,
-                "__builtins__": {},
-            }
+            allowed_names = {**ALLOWED_FUNCTIONS, "__builtins__": {}}
 
             result = eval(expression, {"__builtins__": allowed_names}, {})
             return result
         except Exception as e:
             raise ValueError(f"Formula evaluation error: {str(e)}")
 
+    def compile_formula(self, formula: str) -> CompiledFormula:
+        """
+        Compile a formula for repeated evaluation.
+
+        Results are cached per formula text, so templates and projects that
+        share formulas only pay for parsing once per process.
+
+        Raises ValueError for invalid formulas.
+        """
+        return _compile_formula(formula, self.VARIABLE_PATTERN)
+
+
+@lru_cache(maxsize=4096)
+def _compile_formula(formula: str, pattern: str) -> CompiledFormula:
+    parse_result = FormulaParser().parse_formula(formula)
+    if not parse_result["valid"]:
+        raise ValueError(f"Invalid formula: {parse_result['error']}")
+
+    references: Dict[str, str] = {}
+
+    def _placeholder(match: re.Match) -> str:
+        ref = match.group(1)
+        if ref not in references:
+            references[ref] = f"_r{len(references)}"
+        return references[ref]
+
+    expression = re.sub(pattern, _placeholder, formula)
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"Invalid formula syntax: {formula}") from exc
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported expression in formula: {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_FUNCTIONS:
+            if node.id not in references.values():
+                raise ValueError(f"Unknown name in formula: {node.id}")
+        if isinstance(node, ast.Call) and not (
+            isinstance(node.func, ast.Name) and node.func.id in ALLOWED_FUNCTIONS
+        ):
+            raise ValueError("Only built-in formula functions can be called")
+
+    return CompiledFormula(
+        source=formula,
+        references=tuple(references),
+        code=compile(tree, "<formula>", "eval"),
+    )
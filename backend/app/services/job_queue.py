@@ -0,0 +1,269 @@
+"""Persistent background job queue backed by the application database."""
+
+from __future__ import annotations
+
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+def retry_delay(attempts: int, base: float, cap: float) -> float:
+    """
+    Seconds to wait before the next attempt: exponential backoff with jitter.
+
+    Half of the delay is fixed and half random, so jobs that failed together
+    (e.g. during an API outage) do not all retry at the same moment.
+    """
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class JobQueue:
+    """
+    Enqueues, claims and settles jobs stored in the `jobs` table.
+
+    Any database the app runs on works as the queue, SQLite included.
+    A job is claimed with a conditional UPDATE on its status, so several
+    workers (or processes) can poll the same table without running a job
+    twice. Running jobs hold a lease that their worker renews; `recover`
+    puts jobs back in the queue whose worker died without settling them,
+    unless they have no attempts left.
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.retry_base_seconds = retry_base_seconds or settings.job_retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds or settings.job_retry_max_seconds
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+
+    def enqueue(
+        self,
+        db: Session,
+        kind: str,
+        payload: Dict[str, Any],
+        pipeline: Optional[Sequence[str]] = None,
+        tenant_id: Optional[int] = None,
+        project_id: Optional[UUID] = None,
+        document_id: Optional[UUID] = None,
+    ) -> Job:
+        """
+        Add a job. `pipeline` lists the kinds to run after it, in order,
+        each with the same payload. Does not commit.
+        """
+        job = Job(
+            kind=kind,
+            payload=payload,
+            pipeline=list(pipeline) if pipeline else None,
+            status="queued",
+            tenant_id=tenant_id,
+            project_id=project_id,
+            document_id=document_id,
+            attempts=0,
+            max_attempts=self.max_attempts,
+            run_after=_now(),
+        )
+        db.add(job)
+        db.flush()
+        return job
+
+    def enqueue_pipeline(
+        self, db: Session, kinds: Sequence[str], payload: Dict[str, Any], **refs: Any
+    ) -> Job:
+        """Queue the first of `kinds`; the rest follow one by one. Does not commit."""
+        if not kinds:
+            raise ValueError("A pipeline needs at least one stage")
+        return self.enqueue(db, kinds[0], payload, pipeline=kinds[1:], **refs)
+
+    def claim(self, db: Session, kind: str, limit: int, worker_id: str) -> List[Job]:
+        """Mark up to `limit` due jobs of a kind as running for this worker."""
+        if limit <= 0:
+            return []
+        now = _now()
+        candidates = db.execute(
+            select(Job.id)
+            .where(Job.status == "queued", Job.kind == kind, Job.run_after <= now)
+            .order_by(Job.run_after, Job.created_at)
+            .limit(limit)
+        ).scalars().all()
+
+        claimed: List[UUID] = []
+        for job_id in candidates:
+            # Another worker may have taken it since the select
+            taken = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(
+                    status="running",
+                    locked_by=worker_id,
+                    locked_at=now,
+                    attempts=Job.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if taken.rowcount == 1:
+                claimed.append(job_id)
+        db.commit()
+        if not claimed:
+            return []
+        jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_(claimed))}
+        return [jobs[job_id] for job_id in claimed]
+
+    def complete(self, db: Session, job: Job, result: Optional[Dict[str, Any]] = None) -> Optional[Job]:
+        """Settle a job as succeeded and queue its next stage, if any."""
+        job.status = "succeeded"
+        job.result = result
+        job.last_error = None
+        job.locked_by = None
+        job.locked_at = None
+        job.finished_at = _now()
+        follow_up = None
+        if job.pipeline:
+            follow_up = self.enqueue(
+                db,
+                job.pipeline[0],
+                job.payload,
+                pipeline=job.pipeline[1:],
+                tenant_id=job.tenant_id,
+                project_id=job.project_id,
+                document_id=job.document_id,
+            )
+        db.commit()
+        return follow_up
+
+    def fail(self, db: Session, job: Job, error: str) -> bool:
+        """
+        Record a failed attempt. Returns True when the job will be retried,
+        False when it has used all of its attempts and is marked failed.
+        """
+        job.last_error = error
+        job.locked_by = None
+        job.locked_at = None
+        retry = job.attempts < job.max_attempts
+        if retry:
+            delay = retry_delay(job.attempts, self.retry_base_seconds, self.retry_max_seconds)
+            job.status = "queued"
+            job.run_after = _now() + timedelta(seconds=delay)
+        else:
+            job.status = "failed"
+            job.finished_at = _now()
+        db.commit()
+        return retry
+
+    def release(self, db: Session, job_ids: Sequence[UUID]) -> None:
+        """Put interrupted jobs back in the queue without counting the attempt."""
+        if not job_ids:
+            return
+        db.execute(
+            update(Job)
+            .where(Job.id.in_(list(job_ids)), Job.status == "running")
+            .values(status="queued", locked_by=None, locked_at=None, attempts=Job.attempts - 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def renew(self, db: Session, job_ids: Sequence[UUID], worker_id: str) -> int:
+        """Extend the leases of this worker's running jobs. Commits."""
+        if not job_ids:
+            return 0
+        renewed = db.execute(
+            update(Job)
+            .where(Job.id.in_(list(job_ids)), Job.status == "running", Job.locked_by == worker_id)
+            .values(locked_at=_now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return renewed
+
+    def fail_expired(self, db: Session) -> List[Job]:
+        """
+        Mark running jobs failed whose lease expired on their last attempt.
+        Returns them, so their failure hooks can run. Commits.
+        """
+        expired = _now() - timedelta(seconds=self.lease_seconds)
+        candidates = db.execute(
+            select(Job.id).where(
+                Job.status == "running",
+                Job.locked_at < expired,
+                Job.attempts >= Job.max_attempts,
+            )
+        ).scalars().all()
+
+        failed: List[UUID] = []
+        for job_id in candidates:
+            # Another worker may have settled it since the select
+            settled = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running")
+                .values(
+                    status="failed",
+                    last_error="Lease expired: the worker stopped while running the job",
+                    locked_by=None,
+                    locked_at=None,
+                    finished_at=_now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if settled.rowcount == 1:
+                failed.append(job_id)
+        db.commit()
+        if not failed:
+            return []
+        logger.warning("Failed %d jobs whose lease expired on their last attempt", len(failed))
+        return db.query(Job).filter(Job.id.in_(failed)).all()
+
+    def recover(self, db: Session) -> int:
+        """
+        Requeue running jobs whose lease expired (their worker died). Jobs
+        that were on their last attempt are failed instead, so a job that
+        kills its worker is not retried forever. Commits.
+        """
+        self.fail_expired(db)
+        expired = _now() - timedelta(seconds=self.lease_seconds)
+        recovered = db.execute(
+            update(Job)
+            .where(
+                Job.status == "running",
+                Job.locked_at < expired,
+                Job.attempts < Job.max_attempts,
+            )
+            .values(status="queued", locked_by=None, locked_at=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if recovered:
+            logger.warning("Requeued %d jobs with expired leases", recovered)
+        return recovered
+
+    def get(self, db: Session, job_id: UUID) -> Optional[Job]:
+        return db.get(Job, job_id)
+
+    def for_document(self, db: Session, document_id: UUID) -> List[Job]:
+        """Every job of a document, oldest first."""
+        return (
+            db.query(Job)
+            .filter(Job.document_id == document_id)
+            .order_by(Job.created_at, Job.run_after)
+            .all()
+        )
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
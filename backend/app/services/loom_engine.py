@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Set, Tuple
 from uuid import UUID
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.models.variable import Variable
 from app.services.dependency_resolver import DependencyResolver
 from app.services.formula_parser import FormulaParser
+from app.services.loom_profiler import LoomProfiler, loom_profiler
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+from app.services.portfolio_service import PortfolioService
+from app.services.project_clone_service import ProjectCloneService
+from app.services.value_history import ValueHistoryService
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +29,14 @@ class LoomEngine:
     Handles variable updates and cascading recalculations.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, profiler: LoomProfiler | None = None):
         self.db = db
+        self.profiler = profiler or loom_profiler
         self.parser = FormulaParser()
         self.resolver = DependencyResolver(db)
+        self.history = ValueHistoryService()
+        self.clones = ProjectCloneService()
+        self.portfolio = PortfolioService()
 
     async def calculate_all(self, project_id: UUID) -> Dict[str, Any]:
         """
@@ -33,47 +44,159 @@ class LoomEngine:
 
         Returns summary of calculations performed.
         """
-        # Build dependency graph
-        graph = self.resolver.build_dependency_graph(project_id)
+        started = time.perf_counter()
+        variables, aliases = self._load_variables(project_id)
+        evaluator = ModelEvaluator.from_variables(variables, self.parser, aliases=aliases)
+        evaluator.profile = self.profiler.enabled
 
         # Get calculation order
         try:
-            calc_order = self.resolver.topological_sort(graph)
+            calc_order = evaluator.calculation_order()
         except ValueError as e:
             logger.error("Circular dependency detected: %s", e)
             raise
 
-        # Calculate each variable in order
+        # Calculate every formula in memory, then write back the results
+        results = evaluator.evaluate(calc_order)
+        self._log_errors(evaluator, "Error calculating variable %s: %s")
+
+        by_id = {var.id: var for var in variables}
         calculated = []
+        changes = {}
+        values = {}
         for var_id in calc_order:
-            var = self.db.query(Variable).filter(Variable.id == var_id).first()
-
-            if var and var.value_type.value == "formula" and var.formula:
-                try:
-                    result = await self._calculate_variable(var)
-                    calculated.append(
-                        {
-                            "variable_id": var.id,
-                            "name": var.key,
-                            "old_value": var.calculated_value,
-                            "new_value": result,
-                        }
-                    )
-
-                    var.calculated_value = str(result)
-                except Exception as e:
-                    logger.error(
-                        "Error calculating variable %s: %s", var.key, e
-                    )
-                    continue
+            if var_id not in results:
+                continue
+            var = by_id[var_id]
+            result = results[var_id]
+            calculated.append(
+                {
+                    "variable_id": var.id,
+                    "name": var.key,
+                    "old_value": var.calculated_value,
+                    "new_value": result,
+                }
+            )
+            if var.calculated_value != str(result):
+                var = self._writable(var, project_id)
+                changes[var.id] = (var.calculated_value, str(result))
+                values[var.key] = str(result)
+                var.calculated_value = str(result)
 
+        await self._record_changes(project_id, changes, values)
         self.db.commit()
+        self._record_profile(project_id, "calculate_all", evaluator, started)
 
         return {
             "variables_calculated": len(calculated),
             "details": calculated,
         }
 
+    async def calculate_in_levels(
+        self, project_id: UUID, chunk_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recalculate all formula variables level by level.
+
+        Each level only depends on earlier ones (see
+        ModelEvaluator.calculation_levels). Yields a summary with the
+        level's results as soon as it is evaluated; changed values are
+        written and committed every `chunk_size` rows, so nothing but the
+        current chunk is held back.
+
+        Raises ValueError on circular dependencies.
+        """
+        started = time.perf_counter()
+        variables, aliases = self._load_variables(project_id)
+        evaluator = ModelEvaluator.from_variables(variables, self.parser, aliases=aliases)
+        evaluator.profile = self.profiler.enabled
+        try:
+            levels = evaluator.calculation_levels()
+        except ValueError as e:
+            logger.error("Circular dependency detected: %s", e)
+            raise
+
+        # Captured up front: committing a chunk expires the loaded rows
+        by_id = {var.id: var for var in variables}
+        stored = {var.id: var.calculated_value for var in variables}
+        keys = {var.id: var.key for var in variables}
+        inherited = {var.id for var in variables if var.project_id != project_id}
+        total = sum(len(level) for level in levels)
+        done = 0
+        pending: Dict[UUID, str] = {}
+
+        for number, level in enumerate(levels, start=1):
+            results = evaluator.evaluate(level)
+            level_results = []
+            for node_id in level:
+                if node_id not in results:
+                    continue
+                new = str(results[node_id])
+                level_results.append(
+                    {
+                        "variable_id": str(node_id),
+                        "name": evaluator.nodes[node_id].key,
+                        "old_value": stored[node_id],
+                        "new_value": results[node_id],
+                    }
+                )
+                # Later levels read their inputs from the nodes
+                evaluator.nodes[node_id].value = new
+                if stored[node_id] != new:
+                    pending[node_id] = new
+
+            if len(pending) >= chunk_size:
+                await self._write_chunk(project_id, pending, by_id, keys, stored, inherited)
+            done += len(level)
+
+            yield {
+                "level": number,
+                "levels": len(levels),
+                "done": done,
+                "total": total,
+                "results": level_results,
+                "errors": {
+                    str(node_id): evaluator.errors[node_id]
+                    for node_id in level
+                    if node_id in evaluator.errors
+                },
+            }
+
+        await self._write_chunk(project_id, pending, by_id, keys, stored, inherited)
+        self._log_errors(evaluator, "Error calculating variable %s: %s")
+        self._record_profile(project_id, "calculate_in_levels", evaluator, started)
+
+    async def _write_chunk(
+        self,
+        project_id: UUID,
+        pending: Dict[UUID, str],
+        by_id: Dict[UUID, Variable],
+        keys: Dict[UUID, str],
+        stored: Dict[UUID, Any],
+        inherited: Set[UUID],
+    ) -> None:
+        """Write and commit pending calculated values, then clear them."""
+        if not pending:
+            return
+        changes = {}
+        values = {}
+        rows = []
+        for var_id, new in pending.items():
+            values[keys[var_id]] = new
+            if var_id in inherited:
+                copy = self._writable(by_id[var_id], project_id)
+                copy.calculated_value = new
+                changes[copy.id] = (stored[var_id], new)
+            else:
+                rows.append({"id": var_id, "calculated_value": new})
+                changes[var_id] = (stored[var_id], new)
+            stored[var_id] = new
+        if rows:
+            self.db.execute(update(Variable), rows)
+        await self._record_changes(project_id, changes, values)
+        self.db.commit()
+        pending.clear()
+
     async def update_variable(
         self, variable_id: UUID, new_value: Any
     ) -> Dict[str, Any]:
@@ -82,21 +205,30 @@ class LoomEngine:
 
         Returns summary of affected variables.
         """
+        started = time.perf_counter()
         var = self.db.query(Variable).filter(Variable.id == variable_id).first()
         if not var:
             raise ValueError("Variable not found")
 
         old_value = var.raw_value
         var.raw_value = str(new_value)
+        changes = {}
+        values = {}
         # Also update calculated_value for non-formula variables
         if var.value_type.value != "formula":
+            if var.calculated_value != str(new_value):
+                changes[var.id] = (var.calculated_value or old_value, str(new_value))
+                values[var.key] = str(new_value)
             var.calculated_value = str(new_value)
 
-        # Get all affected variables
-        graph = self.resolver.build_dependency_graph(var.project_id)
-        affected_ids = self.resolver.get_affected_variables(variable_id, graph)
+        # Get all affected variables (groups included)
+        variables, aliases = self._load_variables(var.project_id)
+        evaluator = ModelEvaluator.from_variables(variables, self.parser, aliases=aliases)
+        evaluator.profile = self.profiler.enabled
+        affected_ids = self.resolver.get_affected_variables(variable_id, evaluator.graph)
 
         if not affected_ids:
+            await self._record_changes(var.project_id, changes, values)
             self.db.commit()
             return {
                 "updated_variable": {
@@ -109,40 +241,41 @@ class LoomEngine:
 
         # Recalculate affected variables in dependency order
         try:
-            calc_order = self.resolver.topological_sort(graph)
+            calc_order = evaluator.calculation_order()
         except ValueError as e:
             logger.error("Circular dependency detected: %s", e)
             raise
 
         affected_order = [vid for vid in calc_order if vid in affected_ids]
+        results = evaluator.evaluate(affected_order)
+        self._log_errors(evaluator, "Error recalculating dependent variable %s: %s")
 
+        by_id = {v.id: v for v in variables}
         affected_results = []
         for aff_id in affected_order:
-            aff_var = self.db.query(Variable).filter(Variable.id == aff_id).first()
-
-            if aff_var and aff_var.value_type.value == "formula" and aff_var.formula:
-                try:
-                    old = aff_var.calculated_value
-                    new = await self._calculate_variable(aff_var)
-                    aff_var.calculated_value = str(new)
-
-                    affected_results.append(
-                        {
-                            "id": aff_var.id,
-                            "name": aff_var.key,
-                            "old_value": old,
-                            "new_value": new,
-                        }
-                    )
-                except Exception as e:
-                    logger.error(
-                        "Error recalculating dependent variable %s: %s",
-                        aff_var.key,
-                        e,
-                    )
-                    continue
+            if aff_id not in results:
+                continue
+            aff_var = by_id[aff_id]
+            old = aff_var.calculated_value
+            new = results[aff_id]
+            if old != str(new):
+                aff_var = self._writable(aff_var, var.project_id)
+                changes[aff_var.id] = (old, str(new))
+                values[aff_var.key] = str(new)
+                aff_var.calculated_value = str(new)
+
+            affected_results.append(
+                {
+                    "id": aff_var.id,
+                    "name": aff_var.key,
+                    "old_value": old,
+                    "new_value": new,
+                }
+            )
 
+        await self._record_changes(var.project_id, changes, values)
         self.db.commit()
+        self._record_profile(var.project_id, "update_variable", evaluator, started)
 
         return {
             "updated_variable": {
@@ -154,47 +287,64 @@ class LoomEngine:
             "affected_variables": affected_results,
         }
 
+    async def evaluate_requested(
+        self, project_id: UUID, variable_ids: Iterable[UUID]
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the requested variables without recalculating the project.
+
+        Only the upstream closure of the requested variables is compiled and
+        evaluated (each node once); nothing is written to the database.
+
+        Returns: {
+            "values": {variable_id: value},
+            "evaluated": int,
+            "errors": {variable_id: str}
+        }
+        """
+        variables, aliases = self._load_variables(project_id)
+        evaluator = ModelEvaluator.from_variables(
+            variables, self.parser, lazy=True, aliases=aliases
+        )
+        requested = list(variable_ids)
+
+        try:
+            order = evaluator.upstream_order(requested)
+        except ValueError as e:
+            logger.error("Circular dependency detected: %s", e)
+            raise
+        results = evaluator.evaluate(order)
+
+        values: Dict[str, Any] = {}
+        for var_id in requested:
+            node = evaluator.nodes.get(var_id)
+            if node is None:
+                continue
+            values[str(var_id)] = results[var_id] if var_id in results else node.value
+
+        return {
+            "values": values,
+            "evaluated": len(results),
+            "errors": {
+                str(var_id): error
+                for var_id, error in evaluator.errors.items()
+                if str(var_id) in values
+            },
+        }
+
     async def _calculate_variable(self, variable: Variable) -> Any:
         """Calculate value for a formula variable"""
         if not variable.formula:
             return variable.raw_value
 
-        # Parse formula to get dependencies
-        parse_result = self.parser.parse_formula(variable.formula)
-        if not parse_result["valid"]:
-            raise ValueError(f"Invalid formula: {parse_result['error']}")
-
-        # Get values of dependent variables
-        var_values: Dict[str, Any] = {}
-        for dep_ref in parse_result["variables"]:
-            # Try to find variable by ID or key
-            dep_var = (
-                self.db.query(Variable)
-                .filter(
-                    Variable.project_id == variable.project_id,
-                    (Variable.id == UUID(dep_ref))
-                    | (Variable.key == dep_ref)
-                    | (Variable.label == dep_ref),
-                )
-                .first()
-            )
+        variables, aliases = self._load_variables(variable.project_id)
+        nodes = [ModelNode.from_variable(var) for var in variables if var.id != variable.id]
+        node = ModelNode.from_variable(variable)
+        node.formula = variable.formula
+        evaluator = ModelEvaluator([*nodes, node], self.parser, aliases=aliases)
 
-            if not dep_var:
-                raise ValueError(f"Dependent variable not found: {dep_ref}")
-
-            # Use calculated_value if available, otherwise raw_value
-            value_to_use = dep_var.calculated_value or dep_var.raw_value
-            if value_to_use:
-                try:
-                    var_values[dep_ref] = float(value_to_use)
-                except (ValueError, TypeError):
-                    var_values[dep_ref] = 0
-            else:
-                var_values[dep_ref] = 0
-
-        # Evaluate formula
-        result = self.parser.evaluate_formula(variable.formula, var_values)
-        return result
+        # Dependencies use their stored values
+        return evaluator.evaluate_node(variable.id, {})
 
     async def validate_formula(
         self, formula: str, project_id: UUID
@@ -205,29 +355,53 @@ class LoomEngine:
         if not parse_result["valid"]:
             return parse_result
 
-        # Check that all referenced variables exist
-        missing = []
-        for var_ref in parse_result["variables"]:
-            exists = (
-                self.db.query(Variable)
-                .filter(
-                    Variable.project_id == project_id,
-                    (Variable.id == UUID(var_ref))
-                    | (Variable.key == var_ref)
-                    | (Variable.label == var_ref),
-                )
-                .first()
-            )
+        try:
+            self.parser.compile_formula(formula)
+        except ValueError as e:
+            return {**parse_result, "valid": False, "error": str(e)}
 
-            if not exists:
-                missing.append(var_ref)
+        # Check that all referenced variables exist (by id, key or label)
+        rows, aliases = self._load_variables(project_id)
+        known = set(aliases)
+        for row in rows:
+            known.update((str(row.id), row.key, row.label))
+
+        missing = [ref for ref in parse_result["variables"] if ref not in known]
 
         if missing:
             return {
                 "valid": False,
                 "variables": parse_result["variables"],
+                "groups": parse_result["groups"],
                 "error": f"Variables not found: {', '.join(missing)}",
             }
 
         return parse_result
 
+    def _load_variables(self, project_id: UUID) -> Tuple[List[Variable], Dict[str, UUID]]:
+        """Variables visible in the project (copy-on-write clones inherit their parent's)."""
+        return self.clones.effective_variables(self.db, project_id)
+
+    def _writable(self, var: Variable, project_id: UUID) -> Variable:
+        # Changed results of inherited variables go to the clone's own copy
+        return self.clones.materialize_variable(self.db, project_id, var)
+
+    async def _record_changes(
+        self, project_id: UUID, changes: Dict[UUID, Tuple[Any, str]], values: Dict[str, str]
+    ) -> None:
+        """Add changed values to the value history and portfolio rollups (no commit)."""
+        await self.history.record(self.db, project_id, changes)
+        await self.portfolio.record_values(self.db, project_id, values)
+
+    def _record_profile(
+        self, project_id: UUID, operation: str, evaluator: ModelEvaluator, started: float
+    ) -> None:
+        if self.profiler.enabled:
+            self.profiler.record_run(
+                project_id, operation, evaluator, time.perf_counter() - started
+            )
+
+    @staticmethod
+    def _log_errors(evaluator: ModelEvaluator, message: str) -> None:
+        for node_id, error in evaluator.errors.items():
+            logger.error(message, evaluator.nodes[node_id].key, error)
@@ -0,0 +1,291 @@
+"""Constrained optimization over in-memory Loom models."""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.model_evaluator import ModelEvaluator, to_number
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DecisionVariable:
+    """An input the optimizer may change, optionally within [lower, upper]."""
+
+    node_id: Hashable
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+
+@dataclass
+class Constraint:
+    """Keep a variable within [lower, upper] (either side optional)."""
+
+    node_id: Hashable
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+    def violation(self, value: float) -> float:
+        if self.lower is not None and value < self.lower:
+            return self.lower - value
+        if self.upper is not None and value > self.upper:
+            return value - self.upper
+        return 0.0
+
+
+@dataclass
+class OptimizationResult:
+    """Outcome of `LoomOptimizer.optimize`."""
+
+    status: str
+    objective_value: Optional[float]
+    inputs: Dict[Hashable, float]
+    constraint_values: Dict[Hashable, Optional[float]]
+    feasible: bool
+    iterations: int
+    evaluations: int
+    elapsed_ms: float
+    trajectory: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class LoomOptimizer:
+    """
+    Nelder-Mead optimizer over a compiled formula graph.
+
+    Only the upstream closure of the objective and constraints is evaluated,
+    entirely in memory, so each iteration costs a handful of compiled
+    formula evaluations. Bounds on decision variables are enforced by
+    clipping; constraints on other variables by a quadratic penalty.
+    """
+
+    PENALTY_WEIGHT = 1e6
+
+    # Standard Nelder-Mead coefficients
+    REFLECTION = 1.0
+    EXPANSION = 2.0
+    CONTRACTION = 0.5
+    SHRINK = 0.5
+
+    def __init__(self, evaluator: ModelEvaluator):
+        self.evaluator = evaluator
+
+    def optimize(
+        self,
+        objective: Hashable,
+        decisions: Sequence[DecisionVariable],
+        constraints: Sequence[Constraint] = (),
+        maximize: bool = True,
+        max_iterations: int = 500,
+        time_budget_seconds: float = 5.0,
+        tolerance: float = 1e-8,
+    ) -> OptimizationResult:
+        """
+        Find decision values that maximize (or minimize) `objective`.
+
+        Stops after `max_iterations`, when the simplex has converged or
+        when `time_budget_seconds` is spent, whichever comes first.
+
+        Raises ValueError for unknown variables, formula decisions, or a
+        model with circular dependencies.
+        """
+        started = time.perf_counter()
+        self._validate(objective, decisions, constraints)
+
+        order = self.evaluator.upstream_order(
+            [objective, *(c.node_id for c in constraints)]
+        )
+        baseline_errors = dict(self.evaluator.errors)
+        lower = np.array([-math.inf if d.lower is None else d.lower for d in decisions])
+        upper = np.array([math.inf if d.upper is None else d.upper for d in decisions])
+        sign = -1.0 if maximize else 1.0
+        evaluations = 0
+
+        def run(x: np.ndarray) -> Optional[Dict[Hashable, Any]]:
+            nonlocal evaluations
+            evaluations += 1
+            overrides = {d.node_id: float(v) for d, v in zip(decisions, x, strict=True)}
+            self.evaluator.errors = dict(baseline_errors)
+            results = self.evaluator.evaluate(order, overrides)
+            results.update(overrides)
+            return results
+
+        def value_of(results: Dict[Hashable, Any], node_id: Hashable) -> Optional[float]:
+            if node_id in results:
+                value = to_number(results[node_id])
+            elif node_id in self.evaluator.compiled:
+                return None  # Formula failed for these inputs
+            else:
+                value = to_number(self.evaluator.nodes[node_id].value)
+            return value if math.isfinite(value) else None
+
+        def cost(x: np.ndarray) -> float:
+            results = run(x)
+            value = value_of(results, objective)
+            if value is None:
+                return math.inf
+            penalty = 0.0
+            for constraint in constraints:
+                current = value_of(results, constraint.node_id)
+                if current is None:
+                    return math.inf
+                penalty += constraint.violation(current) ** 2
+            return sign * value + penalty_scale * penalty
+
+        x0 = np.clip(
+            np.array([to_number(self.evaluator.nodes[d.node_id].value) for d in decisions]),
+            lower,
+            upper,
+        )
+        initial = value_of(run(x0), objective)
+        penalty_scale = self.PENALTY_WEIGHT * max(1.0, abs(initial or 0.0))
+
+        # Initial simplex: step 5% of the range, or of the value when unbounded
+        n = len(decisions)
+        simplex = np.repeat(x0[None, :], n + 1, axis=0)
+        for i in range(n):
+            if math.isfinite(lower[i]) and math.isfinite(upper[i]) and upper[i] > lower[i]:
+                step = 0.05 * (upper[i] - lower[i])
+            else:
+                step = 0.05 * abs(x0[i]) if x0[i] != 0 else 0.00025
+            candidate = x0[i] + step
+            if candidate > upper[i]:
+                candidate = x0[i] - step
+            simplex[i + 1, i] = candidate
+        simplex = np.clip(simplex, lower, upper)
+        costs = np.array([cost(x) for x in simplex])
+
+        trajectory: List[Dict[str, Any]] = []
+        status = "max_iterations"
+        iteration = 0
+        while iteration < max_iterations:
+            if time.perf_counter() - started > time_budget_seconds:
+                status = "time_budget"
+                break
+
+            ranking = np.argsort(costs)
+            simplex, costs = simplex[ranking], costs[ranking]
+            best = simplex[0]
+            trajectory.append(self._step(iteration, best, costs[0], sign, decisions))
+
+            if (
+                np.max(np.abs(costs[1:] - costs[0])) <= tolerance * max(1.0, abs(costs[0]))
+                and np.max(np.abs(simplex[1:] - best)) <= tolerance * max(1.0, np.max(np.abs(best)))
+            ):
+                status = "converged"
+                break
+            iteration += 1
+
+            centroid = simplex[:-1].mean(axis=0)
+            worst = simplex[-1]
+            reflected = np.clip(centroid + self.REFLECTION * (centroid - worst), lower, upper)
+            reflected_cost = cost(reflected)
+
+            if reflected_cost < costs[0]:
+                expanded = np.clip(centroid + self.EXPANSION * (reflected - centroid), lower, upper)
+                expanded_cost = cost(expanded)
+                if expanded_cost < reflected_cost:
+                    simplex[-1], costs[-1] = expanded, expanded_cost
+                else:
+                    simplex[-1], costs[-1] = reflected, reflected_cost
+                continue
+
+            if reflected_cost < costs[-2]:
+                simplex[-1], costs[-1] = reflected, reflected_cost
+                continue
+
+            # Contract towards the better of the worst and reflected points
+            if reflected_cost < costs[-1]:
+                contracted = centroid + self.CONTRACTION * (reflected - centroid)
+            else:
+                contracted = centroid + self.CONTRACTION * (worst - centroid)
+            contracted = np.clip(contracted, lower, upper)
+            contracted_cost = cost(contracted)
+            if contracted_cost < min(reflected_cost, costs[-1]):
+                simplex[-1], costs[-1] = contracted, contracted_cost
+                continue
+
+            # Shrink everything towards the best point
+            simplex[1:] = np.clip(best + self.SHRINK * (simplex[1:] - best), lower, upper)
+            costs[1:] = [cost(x) for x in simplex[1:]]
+
+        best_index = int(np.argmin(costs))
+        best = simplex[best_index]
+        results = run(best)
+        objective_value = value_of(results, objective)
+        # Per constraint: several may bound the same variable
+        bounded = [value_of(results, c.node_id) for c in constraints]
+        constraint_values = dict(zip((c.node_id for c in constraints), bounded, strict=True))
+        feasible = objective_value is not None and all(
+            value is not None and c.violation(value) <= 1e-6 * max(1.0, abs(value))
+            for c, value in zip(constraints, bounded, strict=True)
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        logger.info(
+            "Optimization finished status=%s iterations=%d evaluations=%d elapsed_ms=%.1f",
+            status,
+            iteration,
+            evaluations,
+            elapsed_ms,
+        )
+
+        return OptimizationResult(
+            status=status,
+            objective_value=objective_value,
+            inputs={d.node_id: float(v) for d, v in zip(decisions, best, strict=True)},
+            constraint_values=constraint_values,
+            feasible=feasible,
+            iterations=iteration,
+            evaluations=evaluations,
+            elapsed_ms=round(elapsed_ms, 3),
+            trajectory=trajectory,
+        )
+
+    def _validate(
+        self,
+        objective: Hashable,
+        decisions: Sequence[DecisionVariable],
+        constraints: Sequence[Constraint],
+    ) -> None:
+        nodes = self.evaluator.nodes
+        if objective not in nodes:
+            raise ValueError(f"Objective variable not found: {objective}")
+        if not decisions:
+            raise ValueError("At least one decision variable is required")
+        for decision in decisions:
+            node = nodes.get(decision.node_id)
+            if node is None:
+                raise ValueError(f"Decision variable not found: {decision.node_id}")
+            if node.formula:
+                raise ValueError(f"Decision variable {node.key} is a formula, not an input")
+            if (
+                decision.lower is not None
+                and decision.upper is not None
+                and decision.lower > decision.upper
+            ):
+                raise ValueError(f"Invalid bounds for decision variable {node.key}")
+        for constraint in constraints:
+            if constraint.node_id not in nodes:
+                raise ValueError(f"Constraint variable not found: {constraint.node_id}")
+
+    @staticmethod
+    def _step(
+        iteration: int,
+        x: np.ndarray,
+        cost: float,
+        sign: float,
+        decisions: Sequence[DecisionVariable],
+    ) -> Dict[str, Any]:
+        return {
+            "iteration": iteration,
+            # Penalised objective, in the requested direction
+            "objective": float(sign * cost) if math.isfinite(cost) else None,
+            "inputs": {str(d.node_id): float(v) for d, v in zip(decisions, x, strict=True)},
+        }
@@ -0,0 +1,203 @@
+"""Per-formula evaluation profiling for the Loom engine."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Hashable, List, Mapping, Optional, Set
+from uuid import UUID
+
+from app.core.config import settings
+from app.services.dependency_resolver import GroupRef
+from app.services.model_evaluator import ModelEvaluator
+
+
+@dataclass(frozen=True)
+class FormulaSample:
+    """Timing of one formula evaluation."""
+
+    project_id: UUID
+    variable_id: Hashable
+    key: str
+    operation: str
+    fetch_ms: float
+    eval_ms: float
+    error: bool
+    recorded_at: float
+
+
+@dataclass(frozen=True)
+class RunSample:
+    """Summary of one calculate_all / update_variable run."""
+
+    project_id: UUID
+    operation: str
+    formulas: int
+    errors: int
+    total_ms: float
+    recorded_at: float
+
+
+class LoomProfiler:
+    """
+    Collects per-formula timings in bounded ring buffers.
+
+    Recording is off unless `enabled` (LOOM_PROFILING_ENABLED); when on, the
+    oldest samples are dropped once `buffer_size` is reached, so memory use
+    is fixed regardless of traffic.
+    """
+
+    def __init__(self, enabled: bool = False, buffer_size: int = 10000):
+        self.enabled = enabled
+        self._samples: Deque[FormulaSample] = deque(maxlen=buffer_size)
+        self._runs: Deque[RunSample] = deque(maxlen=max(1, buffer_size // 10))
+        self._lock = threading.Lock()
+
+    def record_run(
+        self,
+        project_id: UUID,
+        operation: str,
+        evaluator: ModelEvaluator,
+        total_seconds: float,
+    ) -> None:
+        """Store the timings an evaluator collected during one run."""
+        now = time.time()
+        samples = [
+            FormulaSample(
+                project_id=project_id,
+                variable_id=node_id,
+                key=evaluator.nodes[node_id].key,
+                operation=operation,
+                fetch_ms=fetch * 1000,
+                eval_ms=evaluate * 1000,
+                error=node_id in evaluator.errors,
+                recorded_at=now,
+            )
+            for node_id, (fetch, evaluate) in evaluator.timings.items()
+        ]
+        run = RunSample(
+            project_id=project_id,
+            operation=operation,
+            formulas=len(samples),
+            errors=len(evaluator.errors),
+            total_ms=total_seconds * 1000,
+            recorded_at=now,
+        )
+        with self._lock:
+            self._samples.extend(samples)
+            self._runs.append(run)
+
+    def slowest(self, project_id: UUID, limit: int = 20) -> List[Dict[str, Any]]:
+        """Formulas of a project ordered by mean evaluation time, slowest first."""
+        stats: Dict[Hashable, Dict[str, Any]] = {}
+        for sample in self._project_samples(project_id):
+            entry = stats.setdefault(
+                sample.variable_id,
+                {
+                    "variable_id": str(sample.variable_id),
+                    "key": sample.key,
+                    "samples": 0,
+                    "errors": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "fetch_ms": 0.0,
+                },
+            )
+            duration = sample.fetch_ms + sample.eval_ms
+            entry["samples"] += 1
+            entry["errors"] += int(sample.error)
+            entry["total_ms"] += duration
+            entry["fetch_ms"] += sample.fetch_ms
+            entry["max_ms"] = max(entry["max_ms"], duration)
+
+        for entry in stats.values():
+            entry["mean_ms"] = round(entry["total_ms"] / entry["samples"], 4)
+            entry["fetch_ms"] = round(entry["fetch_ms"] / entry["samples"], 4)
+            entry["total_ms"] = round(entry["total_ms"], 4)
+            entry["max_ms"] = round(entry["max_ms"], 4)
+        return sorted(stats.values(), key=lambda e: e["mean_ms"], reverse=True)[:limit]
+
+    def runs(self, project_id: UUID, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs of a project, newest first."""
+        with self._lock:
+            runs = [run for run in self._runs if run.project_id == project_id]
+        return [
+            {
+                "operation": run.operation,
+                "formulas": run.formulas,
+                "errors": run.errors,
+                "total_ms": round(run.total_ms, 3),
+                "recorded_at": run.recorded_at,
+            }
+            for run in reversed(runs[-limit:])
+        ]
+
+    def mean_times(self, project_id: UUID) -> Dict[Hashable, float]:
+        """Mean evaluation time (ms) per variable from the buffered samples."""
+        totals: Dict[Hashable, List[float]] = {}
+        for sample in self._project_samples(project_id):
+            entry = totals.setdefault(sample.variable_id, [0.0, 0])
+            entry[0] += sample.fetch_ms + sample.eval_ms
+            entry[1] += 1
+        return {node_id: total / count for node_id, (total, count) in totals.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._runs.clear()
+
+    def _project_samples(self, project_id: UUID) -> List[FormulaSample]:
+        with self._lock:
+            return [sample for sample in self._samples if sample.project_id == project_id]
+
+
+def critical_path(
+    evaluator: ModelEvaluator, weights_ms: Optional[Mapping[Hashable, float]] = None
+) -> Dict[str, Any]:
+    """
+    Longest dependency chain of a model.
+
+    `length` is the number of formulas on the deepest chain (the minimum
+    number of sequential evaluations); `ms` is the heaviest chain by
+    profiled time, with its variable keys. Raises ValueError on cycles.
+    """
+    weights_ms = weights_ms or {}
+    order = evaluator.calculation_order()
+    depth: Dict[Hashable, int] = {}
+    cost: Dict[Hashable, float] = {}
+    heaviest_dep: Dict[Hashable, Optional[Hashable]] = {}
+
+    for node_id in order:
+        deps: Set[Hashable] = evaluator.graph.get(node_id, set())
+        own = 1 if node_id in evaluator.compiled else 0
+        depth[node_id] = own + max((depth[d] for d in deps if d in depth), default=0)
+        best = max(
+            (d for d in deps if d in cost), key=lambda d: (cost[d], depth[d]), default=None
+        )
+        heaviest_dep[node_id] = best
+        cost[node_id] = weights_ms.get(node_id, 0.0) + (cost[best] if best is not None else 0.0)
+
+    if not order:
+        return {"length": 0, "ms": 0.0, "variables": []}
+
+    end = max(order, key=lambda n: (cost[n], depth[n]))
+    path: List[str] = []
+    node: Optional[Hashable] = end
+    while node is not None:
+        if not isinstance(node, GroupRef) and node in evaluator.compiled:
+            path.append(evaluator.nodes[node].key)
+        node = heaviest_dep[node]
+
+    return {
+        "length": max(depth.values()),
+        "ms": round(cost[end], 3),
+        "variables": list(reversed(path)),
+    }
+
+
+loom_profiler = LoomProfiler(
+    enabled=settings.loom_profiling_enabled,
+    buffer_size=settings.loom_profile_buffer_size,
+)
@@ -0,0 +1,362 @@
+"""In-memory evaluator for Loom formula graphs."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from app.models.variable import Variable
+from app.services.dependency_resolver import DependencyResolver, GroupRef, variable_tags
+from app.services.formula_parser import CompiledFormula, FormulaParser, parse_group_ref
+
+
+@dataclass
+class ModelNode:
+    """
+    Minimal view of a variable needed for evaluation.
+
+    `formula` is only set for variables that should be calculated;
+    `value` is the stored value (calculated_value or raw_value).
+    `category`, `tags` and `display_order` decide group membership and the
+    order of values within a group.
+    """
+
+    id: Hashable
+    key: str
+    label: Optional[str] = None
+    formula: Optional[str] = None
+    value: Any = None
+    category: Optional[str] = None
+    tags: Tuple[str, ...] = field(default_factory=tuple)
+    display_order: int = 0
+
+    @classmethod
+    def from_variable(cls, var: Variable) -> "ModelNode":
+        """Build a node from a Variable row."""
+        return cls(
+            id=var.id,
+            key=var.key,
+            label=var.label,
+            formula=var.formula if var.value_type.value == "formula" else None,
+            value=var.calculated_value or var.raw_value,
+            category=var.category.value,
+            tags=tuple(variable_tags(var.validation_rules)),
+            display_order=var.display_order or 0,
+        )
+
+
+def to_number(value: Any) -> float:
+    """Coerce a stored value to float the way the engine always has (0 on failure)."""
+    if value is None or value == "":
+        return 0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+class ModelEvaluator:
+    """
+    Evaluates a set of variables entirely in memory.
+
+    Formulas are compiled once, references are resolved against an in-memory
+    index (id, key or label) and dependencies come from the formulas
+    themselves, so evaluation never touches the database. Group references
+    become `GroupRef` nodes whose value is a NumPy array of member values.
+
+    With `lazy=True` nothing is compiled up front: formulas and groups are
+    resolved on first use, so `evaluate_requested` only pays for the
+    upstream closure of the requested nodes.
+
+    Setting `profile = True` records (fetch_seconds, eval_seconds) per
+    evaluated formula in `timings`.
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable[ModelNode],
+        parser: FormulaParser | None = None,
+        lazy: bool = False,
+        aliases: Mapping[str, Hashable] | None = None,
+    ):
+        self.parser = parser or FormulaParser()
+        self.nodes: Dict[Hashable, ModelNode] = {node.id: node for node in nodes}
+        self.compiled: Dict[Hashable, CompiledFormula] = {}
+        self.references: Dict[Hashable, Dict[str, Hashable]] = {}
+        self.graph: Dict[Hashable, Set[Hashable]] = {}
+        self.groups: Dict[GroupRef, List[Hashable]] = {}
+        self.errors: Dict[Hashable, str] = {}
+        self._complete = False
+        self._display_order: Optional[List[ModelNode]] = None
+        self.profile = False
+        self.timings: Dict[Hashable, Tuple[float, float]] = {}
+
+        # Same precedence as the DB lookup: id, then key, then label
+        self._index: Dict[str, Hashable] = {}
+        for node in self.nodes.values():
+            if node.label:
+                self._index.setdefault(node.label, node.id)
+        for node in self.nodes.values():
+            self._index[node.key] = node.id
+        for node in self.nodes.values():
+            self._index[str(node.id)] = node.id
+        # Extra references, e.g. parent ids of variables overridden in a clone
+        for ref, node_id in (aliases or {}).items():
+            if node_id in self.nodes:
+                self._index.setdefault(ref, node_id)
+
+        if not lazy:
+            self._build_graph()
+
+    @classmethod
+    def from_variables(
+        cls,
+        variables: Iterable[Variable],
+        parser: FormulaParser | None = None,
+        lazy: bool = False,
+        aliases: Mapping[str, Hashable] | None = None,
+    ) -> "ModelEvaluator":
+        """Build an evaluator from Variable rows."""
+        return cls(
+            (ModelNode.from_variable(var) for var in variables),
+            parser=parser,
+            lazy=lazy,
+            aliases=aliases,
+        )
+
+    def dependencies(self, node_id: Hashable) -> Set[Hashable]:
+        """Direct dependencies of a node, compiling it on first use."""
+        deps = self.graph.get(node_id)
+        if deps is not None:
+            return deps
+        if isinstance(node_id, GroupRef):
+            self._build_group(node_id)
+        else:
+            self.graph[node_id] = set()
+            node = self.nodes[node_id]
+            if node.formula:
+                self._compile_node(node)
+        return self.graph[node_id]
+
+    def _build_graph(self) -> None:
+        """Compile every node and every referenced group."""
+        if self._complete:
+            return
+        for node_id in self.nodes:
+            for dep_id in self.dependencies(node_id):
+                if isinstance(dep_id, GroupRef):
+                    self.dependencies(dep_id)
+        self._complete = True
+
+    def _compile_node(self, node: ModelNode) -> None:
+        try:
+            compiled = self.parser.compile_formula(node.formula)
+        except ValueError as e:
+            self.errors[node.id] = str(e)
+            return
+
+        refs: Dict[str, Hashable] = {}
+        for ref in compiled.references:
+            group = parse_group_ref(ref)
+            if group:
+                refs[ref] = GroupRef(*group)
+                continue
+            dep_id = self._index.get(ref)
+            if dep_id is None:
+                self.errors[node.id] = f"Dependent variable not found: {ref}"
+                return
+            refs[ref] = dep_id
+
+        self.compiled[node.id] = compiled
+        self.references[node.id] = refs
+        self.graph[node.id] = set(refs.values())
+
+    def _build_group(self, group: GroupRef) -> None:
+        """Add a graph node for a group, depending on its members."""
+        token = "{{%s}}" % group
+        if self._display_order is None:
+            self._display_order = sorted(
+                self.nodes.values(), key=lambda n: (n.display_order, n.key)
+            )
+        # A total over its own category does not depend on itself
+        self.groups[group] = [
+            node.id
+            for node in self._display_order
+            if group.contains(node.category, node.tags)
+            and not (node.formula and token in node.formula)
+        ]
+        self.graph[group] = set(self.groups[group])
+
+    def resolve(self, ref: str) -> Optional[Hashable]:
+        """Resolve a formula reference (id, key or label) to a node id."""
+        return self._index.get(ref)
+
+    def calculation_order(self) -> List[Hashable]:
+        """Node ids in dependency order. Raises ValueError on cycles."""
+        self._build_graph()
+        return DependencyResolver.topological_sort(self.graph)
+
+    def calculation_levels(self) -> List[List[Hashable]]:
+        """
+        Formula nodes grouped by dependency depth.
+
+        Every formula in a level depends only on inputs and on formulas of
+        earlier levels. Raises ValueError on cycles.
+        """
+        depth: Dict[Hashable, int] = {}
+        levels: List[List[Hashable]] = []
+        for node_id in self.calculation_order():
+            deepest = max((depth[d] for d in self.graph.get(node_id, ()) if d in depth), default=0)
+            if node_id in self.compiled:
+                depth[node_id] = deepest + 1
+                if deepest == len(levels):
+                    levels.append([])
+                levels[deepest].append(node_id)
+            else:
+                # Inputs and groups pass their depth through
+                depth[node_id] = deepest
+        return levels
+
+    def downstream_order(self, node_ids: Iterable[Hashable]) -> List[Hashable]:
+        """
+        Everything that depends on the given nodes, in dependency order.
+
+        The given nodes themselves are not included. Raises ValueError on
+        cycles.
+        """
+        roots = set(node_ids)
+        order = self.calculation_order()
+        dependents = DependencyResolver.build_dependents(self.graph)
+        affected: Set[Hashable] = set()
+        stack = list(roots)
+        while stack:
+            for dependent in dependents.get(stack.pop(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    stack.append(dependent)
+        return [node_id for node_id in order if node_id in affected and node_id not in roots]
+
+    def upstream_order(self, node_ids: Iterable[Hashable]) -> List[Hashable]:
+        """
+        The requested nodes and everything they depend on, dependencies first.
+
+        Only nodes in the closure are compiled. Raises ValueError on cycles.
+        """
+        order: List[Hashable] = []
+        done: Set[Hashable] = set()
+        visiting: Set[Hashable] = set()
+
+        for root in node_ids:
+            if root in done or root not in self.nodes:
+                continue
+            # Iterative DFS, so long chains cannot hit the recursion limit
+            visiting.add(root)
+            stack = [(root, iter(self.dependencies(root)))]
+            while stack:
+                node_id, deps = stack[-1]
+                for dep_id in deps:
+                    if dep_id in done:
+                        continue
+                    if dep_id in visiting:
+                        raise ValueError("Circular dependency detected in variable formulas")
+                    visiting.add(dep_id)
+                    stack.append((dep_id, iter(self.dependencies(dep_id))))
+                    break
+                else:
+                    stack.pop()
+                    visiting.discard(node_id)
+                    done.add(node_id)
+                    order.append(node_id)
+
+        return order
+
+    def evaluate_requested(self, node_ids: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Evaluate only what the requested nodes need.
+
+        Each node in the upstream closure is computed once and reused by
+        every requested node that depends on it. Returns {node_id: result}
+        for the formulas in the closure.
+        """
+        return self.evaluate(self.upstream_order(node_ids))
+
+    def evaluate(
+        self,
+        order: Iterable[Hashable] | None = None,
+        overrides: Dict[Hashable, float] | None = None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Evaluate formula nodes in dependency order.
+
+        `overrides` replaces the stored values of input nodes for this run
+        only (what-if analysis, optimization).
+
+        Returns {node_id: result} for every formula that evaluated;
+        failures are recorded in `self.errors` and downstream formulas keep
+        using the failed node's stored value.
+        """
+        values: Dict[Hashable, Any] = dict(overrides) if overrides else {}
+        results: Dict[Hashable, Any] = {}
+
+        for node_id in order if order is not None else self.calculation_order():
+            if isinstance(node_id, GroupRef):
+                values[node_id] = self._group_values(node_id, values)
+                continue
+            if node_id not in self.compiled:
+                continue
+            try:
+                result = self.evaluate_node(node_id, values)
+            except ValueError as e:
+                self.errors[node_id] = str(e)
+                continue
+            results[node_id] = result
+            values[node_id] = to_number(result)
+
+        return results
+
+    def evaluate_node(self, node_id: Hashable, values: Dict[Hashable, Any]) -> Any:
+        """Evaluate one formula node using `values` for already-computed nodes."""
+        self.dependencies(node_id)
+        if node_id not in self.compiled:
+            raise ValueError(self.errors.get(node_id, "Variable has no formula"))
+
+        compiled = self.compiled[node_id]
+        if self.profile:
+            started = time.perf_counter()
+        inputs = {}
+        for ref, dep_id in self.references[node_id].items():
+            if dep_id in values:
+                inputs[ref] = values[dep_id]
+            elif isinstance(dep_id, GroupRef):
+                inputs[ref] = self._group_values(dep_id, values)
+            else:
+                inputs[ref] = to_number(self.nodes[dep_id].value)
+
+        if self.profile:
+            fetched = time.perf_counter()
+            try:
+                result = compiled.evaluate(inputs)
+            finally:
+                self.timings[node_id] = (fetched - started, time.perf_counter() - fetched)
+        else:
+            result = compiled.evaluate(inputs)
+        if isinstance(result, np.ndarray):
+            raise ValueError(
+                "Formula returns a group of values; wrap group references in "
+                "an aggregate such as sum() or avg()"
+            )
+        return result
+
+    def _group_values(self, group: GroupRef, values: Dict[Hashable, Any]) -> np.ndarray:
+        """Current values of a group's members, in display order."""
+        self.dependencies(group)
+        return np.array(
+            [
+                values[m] if m in values else to_number(self.nodes[m].value)
+                for m in self.groups.get(group, ())
+            ],
+            dtype=float,
+        )
@@ -0,0 +1,308 @@
+"""Portfolio rollups - tenant-level aggregates of project outputs."""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.portfolio_rollup import PortfolioRollup, PortfolioRollupContribution
+from app.models.project import Project
+from app.models.project_clone import ProjectCloneLink
+from app.models.variable import Variable
+from app.services.project_clone_service import ProjectCloneService
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = ("sum", "avg", "min", "max", "count")
+
+# Inputs created outside the engine may only have a raw value
+CURRENT_VALUE = func.coalesce(Variable.calculated_value, Variable.raw_value)
+
+
+def to_float(value: Any) -> Optional[float]:
+    """Numeric value of a stored variable value; None if it is not a number."""
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def rollup_value(rollup: PortfolioRollup) -> Optional[float]:
+    """Final value of a rollup from its materialized columns."""
+    if rollup.aggregate == "count":
+        return float(rollup.value_count)
+    if rollup.aggregate == "sum":
+        return rollup.value_sum
+    if rollup.aggregate == "avg":
+        return rollup.value_sum / rollup.value_count if rollup.value_count else None
+    if rollup.aggregate == "min":
+        return rollup.value_min
+    return rollup.value_max
+
+
+class PortfolioService:
+    """
+    Maintains portfolio rollups.
+
+    Each rollup keeps one contribution row per source project plus
+    materialized sum/count/min/max columns. The Loom engine reports
+    changed values through `record_values`, which touches only the
+    affected contribution and adjusts the aggregates in place.
+    """
+
+    def __init__(self) -> None:
+        self.clones = ProjectCloneService()
+
+    async def create_rollup(
+        self,
+        db: Session,
+        tenant_id: int,
+        key: str,
+        label: str,
+        variable_key: str,
+        aggregate: str = "sum",
+        project_ids: Optional[Sequence[UUID]] = None,
+        created_by: Optional[int] = None,
+    ) -> PortfolioRollup:
+        """Create a rollup and compute it from the current project values."""
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+        exists = db.execute(
+            select(PortfolioRollup.id).where(
+                PortfolioRollup.tenant_id == tenant_id, PortfolioRollup.key == key
+            )
+        ).first()
+        if exists:
+            raise ValueError(f"Rollup key already exists: {key}")
+
+        rollup = PortfolioRollup(
+            tenant_id=tenant_id,
+            key=key,
+            label=label,
+            variable_key=variable_key,
+            aggregate=aggregate,
+            project_ids=[str(pid) for pid in project_ids] if project_ids is not None else None,
+            created_by_id=created_by,
+        )
+        db.add(rollup)
+        db.flush()
+        self._rebuild(db, rollup)
+        db.commit()
+        db.refresh(rollup)
+
+        logger.info(
+            "Portfolio rollup created id=%s tenant_id=%s variable_key=%s",
+            rollup.id,
+            tenant_id,
+            variable_key,
+        )
+        return rollup
+
+    async def refresh(self, db: Session, rollup: PortfolioRollup) -> PortfolioRollup:
+        """Recompute a rollup from scratch (e.g. after direct database edits)."""
+        self._rebuild(db, rollup)
+        db.commit()
+        db.refresh(rollup)
+        return rollup
+
+    def contributions(self, db: Session, rollup_id: UUID) -> List[Dict[str, Any]]:
+        """Per-project values of a rollup, largest first."""
+        rows = db.execute(
+            select(
+                PortfolioRollupContribution.project_id,
+                Project.name,
+                PortfolioRollupContribution.value,
+            )
+            .join(Project, Project.id == PortfolioRollupContribution.project_id)
+            .where(PortfolioRollupContribution.rollup_id == rollup_id)
+            .order_by(PortfolioRollupContribution.value.desc())
+        ).all()
+        return [
+            {"project_id": str(project_id), "project_name": name, "value": value}
+            for project_id, name, value in rows
+        ]
+
+    async def record_values(
+        self, db: Session, project_id: UUID, values: Mapping[str, Any]
+    ) -> None:
+        """
+        Apply a project's changed values {variable_key: value} to the
+        rollups aggregating them, including for copy-on-write clones that
+        inherit the value. Does not commit.
+        """
+        if not values:
+            return
+        tenant_id = select(Project.tenant_id).where(Project.id == project_id).scalar_subquery()
+        rollups = (
+            db.query(PortfolioRollup)
+            .filter(
+                PortfolioRollup.tenant_id == tenant_id,
+                PortfolioRollup.variable_key.in_(list(values)),
+            )
+            .all()
+        )
+        for rollup in rollups:
+            new = to_float(values[rollup.variable_key])
+            for target in [project_id, *self._inheriting(db, project_id, rollup.variable_key)]:
+                if self._includes(rollup, target):
+                    self._apply(db, rollup, target, new)
+
+    async def refresh_project(self, db: Session, project_id: UUID) -> None:
+        """Re-read every rollup value of one project (after bulk inserts). Does not commit."""
+        tenant_id = select(Project.tenant_id).where(Project.id == project_id).scalar_subquery()
+        rollups = db.query(PortfolioRollup).filter(PortfolioRollup.tenant_id == tenant_id).all()
+        if not rollups:
+            return
+        keys = {rollup.variable_key for rollup in rollups}
+        current = {
+            row[0]: row[1]
+            for row in self.clones.effective_columns(db, project_id, [CURRENT_VALUE])
+            if row[0] in keys
+        }
+        for rollup in rollups:
+            if self._includes(rollup, project_id):
+                self._apply(db, rollup, project_id, to_float(current.get(rollup.variable_key)))
+
+    def remove_project(self, db: Session, project_id: UUID) -> None:
+        """Drop a project's contributions (before deleting it). Does not commit."""
+        contributions = (
+            db.query(PortfolioRollupContribution)
+            .filter(PortfolioRollupContribution.project_id == project_id)
+            .all()
+        )
+        for contribution in contributions:
+            rollup = db.get(PortfolioRollup, contribution.rollup_id)
+            self._apply(db, rollup, project_id, None)
+
+    def _apply(
+        self, db: Session, rollup: PortfolioRollup, project_id: UUID, new: Optional[float]
+    ) -> None:
+        """Set one project's contribution and adjust the aggregates by the delta."""
+        contribution = db.get(PortfolioRollupContribution, (rollup.id, project_id))
+        old = contribution.value if contribution is not None else None
+        if old == new:
+            return
+
+        if contribution is None:
+            db.add(PortfolioRollupContribution(rollup_id=rollup.id, project_id=project_id, value=new))
+        elif new is None:
+            db.delete(contribution)
+        else:
+            contribution.value = new
+        db.flush()
+
+        # Applied in SQL so concurrent recalculations cannot lose updates
+        values: Dict[str, Any] = {
+            "value_sum": PortfolioRollup.value_sum + ((new or 0.0) - (old or 0.0)),
+            "value_count": PortfolioRollup.value_count + ((new is not None) - (old is not None)),
+        }
+        if rollup.aggregate in ("min", "max"):
+            values["value_min"] = (
+                select(func.min(PortfolioRollupContribution.value))
+                .where(PortfolioRollupContribution.rollup_id == rollup.id)
+                .scalar_subquery()
+            )
+            values["value_max"] = (
+                select(func.max(PortfolioRollupContribution.value))
+                .where(PortfolioRollupContribution.rollup_id == rollup.id)
+                .scalar_subquery()
+            )
+        db.execute(
+            update(PortfolioRollup)
+            .where(PortfolioRollup.id == rollup.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.expire(rollup, ["value_sum", "value_count", "value_min", "value_max"])
+
+    def _rebuild(self, db: Session, rollup: PortfolioRollup) -> None:
+        """Recompute all contributions and aggregates of a rollup."""
+        project_ids = [
+            pid
+            for pid in db.execute(
+                select(Project.id).where(Project.tenant_id == rollup.tenant_id)
+            ).scalars()
+            if self._includes(rollup, pid)
+        ]
+        current: Dict[UUID, Any] = {}
+        if project_ids:
+            current = dict(
+                db.execute(
+                    select(Variable.project_id, CURRENT_VALUE).where(
+                        Variable.project_id.in_(project_ids),
+                        Variable.key == rollup.variable_key,
+                    )
+                ).all()
+            )
+            # Copy-on-write clones without their own row inherit the value
+            clones = db.execute(
+                select(ProjectCloneLink.project_id).where(
+                    ProjectCloneLink.project_id.in_(
+                        [pid for pid in project_ids if pid not in current]
+                    ),
+                    ProjectCloneLink.copy_on_write.is_(True),
+                )
+            ).scalars()
+            for clone_id in clones:
+                for key, value in self.clones.effective_columns(
+                    db, clone_id, [CURRENT_VALUE]
+                ):
+                    if key == rollup.variable_key:
+                        current[clone_id] = value
+
+        rows = [
+            {"rollup_id": rollup.id, "project_id": pid, "value": number}
+            for pid, value in current.items()
+            if (number := to_float(value)) is not None
+        ]
+        db.execute(
+            delete(PortfolioRollupContribution).where(
+                PortfolioRollupContribution.rollup_id == rollup.id
+            )
+        )
+        if rows:
+            db.execute(insert(PortfolioRollupContribution), rows)
+
+        numbers = [row["value"] for row in rows]
+        rollup.value_sum = math.fsum(numbers)
+        rollup.value_count = len(numbers)
+        rollup.value_min = min(numbers, default=None)
+        rollup.value_max = max(numbers, default=None)
+
+    def _inheriting(self, db: Session, project_id: UUID, key: str) -> List[UUID]:
+        """Copy-on-write descendants that read `key` from this project."""
+        found: List[UUID] = []
+        frontier = [project_id]
+        for _ in range(ProjectCloneService.MAX_CLONE_DEPTH):
+            if not frontier:
+                break
+            children = db.execute(
+                select(ProjectCloneLink.project_id).where(
+                    ProjectCloneLink.parent_project_id.in_(frontier),
+                    ProjectCloneLink.copy_on_write.is_(True),
+                )
+            ).scalars().all()
+            if not children:
+                break
+            overridden = set(
+                db.execute(
+                    select(Variable.project_id).where(
+                        Variable.project_id.in_(children), Variable.key == key
+                    )
+                ).scalars()
+            )
+            frontier = [child for child in children if child not in overridden]
+            found.extend(frontier)
+        return found
+
+    @staticmethod
+    def _includes(rollup: PortfolioRollup, project_id: UUID) -> bool:
+        return rollup.project_ids is None or str(project_id) in rollup.project_ids
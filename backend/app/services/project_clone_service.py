@@ -0,0 +1,339 @@
+"""Project cloning - full copies and copy-on-write clones."""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.project import Project
+from app.models.project_clone import ProjectCloneLink
+from app.models.variable import Variable
+
+logger = logging.getLogger(__name__)
+
+# Copied as-is from the source variable (id and project_id are remapped)
+COPY_COLUMNS = (
+    "key",
+    "label",
+    "value_type",
+    "category",
+    "raw_value",
+    "calculated_value",
+    "formula",
+    "depends_on",
+    "display_order",
+    "description",
+    "unit",
+    "validation_rules",
+)
+
+# {{<variable uuid>}} references inside formulas
+ID_REF_PATTERN = re.compile(r"\{\{([0-9a-fA-F]{8}-[0-9a-fA-F-]{27})\}\}")
+
+
+class ProjectCloneService:
+    """
+    Clones projects without re-evaluating them.
+
+    A full clone copies all variables with one column query and batched
+    bulk INSERTs, remapping ids in `depends_on` and in {{id}} formula
+    references, and keeps every calculated value. A copy-on-write clone
+    copies nothing: variables are read from the parent (matched by key)
+    until they are written, at which point `materialize_variable` copies
+    just that variable into the clone.
+    """
+
+    INSERT_BATCH_SIZE = 5000
+    MAX_CLONE_DEPTH = 20
+
+    async def clone_project(
+        self,
+        db: Session,
+        source: Project,
+        name: Optional[str] = None,
+        copy_on_write: bool = False,
+        created_by: Optional[int] = None,
+    ) -> Tuple[Project, int]:
+        """Clone a project. Returns (clone, number of variables copied)."""
+        clone = Project(
+            tenant_id=source.tenant_id,
+            client_id=source.client_id,
+            name=name or f"{source.name} (copy)",
+            description=source.description,
+            status=source.status,
+            created_by=created_by,
+        )
+        db.add(clone)
+        db.flush()
+
+        copied = 0
+        try:
+            if not copy_on_write:
+                rows, aliases = self._effective_rows(db, source.id)
+                id_map = {str(row["id"]): uuid4() for row in rows}
+                for alias, row_id in aliases.items():
+                    id_map[alias] = id_map[str(row_id)]
+                new_rows = [
+                    {
+                        **self._remap(row, id_map),
+                        "id": id_map[str(row["id"])],
+                        "project_id": clone.id,
+                    }
+                    for row in rows
+                ]
+                self._bulk_insert(db, new_rows)
+                copied = len(new_rows)
+
+            db.add(
+                ProjectCloneLink(
+                    project_id=clone.id,
+                    parent_project_id=source.id,
+                    copy_on_write=copy_on_write,
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.refresh(clone)
+
+        logger.info(
+            "Project cloned source_id=%s clone_id=%s copy_on_write=%s variables=%d",
+            source.id,
+            clone.id,
+            copy_on_write,
+            copied,
+        )
+
+        return clone, copied
+
+    def effective_variables(
+        self, db: Session, project_id: UUID
+    ) -> Tuple[List[Variable], Dict[str, UUID]]:
+        """
+        Variables visible in a project: its own rows plus, for copy-on-write
+        clones, the parent's rows for keys the clone has not overridden.
+
+        Also returns {parent_variable_id: own_variable_id} for overridden
+        variables, so {{id}} references written against the parent still
+        resolve (see ModelEvaluator `aliases`).
+        """
+        return self._effective_variables(db, project_id, depth=0)
+
+    def _effective_variables(
+        self, db: Session, project_id: UUID, depth: int
+    ) -> Tuple[List[Variable], Dict[str, UUID]]:
+        own = db.query(Variable).filter(Variable.project_id == project_id).all()
+        link = self._parent_link(db, project_id, depth)
+        if link is None:
+            return own, {}
+
+        parent_vars, parent_aliases = self._effective_variables(
+            db, link.parent_project_id, depth + 1
+        )
+        own_by_key = {var.key: var for var in own}
+        inherited = [var for var in parent_vars if var.key not in own_by_key]
+        aliases = {
+            str(var.id): own_by_key[var.key].id for var in parent_vars if var.key in own_by_key
+        }
+        for alias, target in parent_aliases.items():
+            target_var = next((v for v in parent_vars if v.id == target), None)
+            if target_var is not None and target_var.key in own_by_key:
+                aliases[alias] = own_by_key[target_var.key].id
+        return own + inherited, aliases
+
+    def effective_columns(
+        self, db: Session, project_id: UUID, columns: Sequence[Any], depth: int = 0
+    ) -> List[Row]:
+        """
+        Column-restricted version of `effective_variables`.
+
+        Returns rows of (key, *columns) without loading Variable objects.
+        """
+        own = db.execute(
+            select(Variable.key, *columns).where(Variable.project_id == project_id)
+        ).all()
+        link = self._parent_link(db, project_id, depth)
+        if link is None:
+            return own
+
+        own_keys = {row[0] for row in own}
+        parent_rows = self.effective_columns(db, link.parent_project_id, columns, depth + 1)
+        return own + [row for row in parent_rows if row[0] not in own_keys]
+
+    def materialize_variable(self, db: Session, project_id: UUID, variable: Variable) -> Variable:
+        """
+        Return the project's own copy of `variable`, copying it on first write.
+
+        Adds the copy to the session without committing.
+        """
+        if variable.project_id == project_id:
+            return variable
+        copy = Variable(
+            id=uuid4(),
+            project_id=project_id,
+            **{column: getattr(variable, column) for column in COPY_COLUMNS},
+        )
+        db.add(copy)
+        return copy
+
+    def detach(self, db: Session, project_id: UUID) -> int:
+        """
+        Turn a copy-on-write clone into a full copy of its current view.
+
+        Inherited variables are copied in bulk and references to parent ids
+        are remapped. Returns the number of variables copied.
+        """
+        link = self._cow_link(db, project_id)
+        if link is None:
+            return 0
+
+        rows, aliases = self._effective_rows(db, project_id)
+        id_map: Dict[str, UUID] = {}
+        inherited = []
+        for row in rows:
+            if row["project_id"] == project_id:
+                continue
+            new_id = uuid4()
+            id_map[str(row["id"])] = new_id
+            inherited.append({**row, "id": new_id})
+        for alias, row_id in aliases.items():
+            id_map[alias] = id_map.get(str(row_id), row_id)
+
+        try:
+            self._bulk_insert(
+                db,
+                [
+                    {**self._remap(row, id_map), "id": row["id"], "project_id": project_id}
+                    for row in inherited
+                ],
+            )
+            own_updates = [
+                {"id": row["id"], **self._remap(row, id_map)}
+                for row in rows
+                if row["project_id"] == project_id and self._references_any(row, id_map)
+            ]
+            if own_updates:
+                db.execute(
+                    update(Variable),
+                    [
+                        {"id": row["id"], "formula": row["formula"], "depends_on": row["depends_on"]}
+                        for row in own_updates
+                    ],
+                )
+            link.copy_on_write = False
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(
+            "Project detached project_id=%s parent_id=%s variables=%d",
+            project_id,
+            link.parent_project_id,
+            len(inherited),
+        )
+        return len(inherited)
+
+    def detach_children(self, db: Session, parent_project_id: UUID) -> int:
+        """
+        Detach every copy-on-write clone of a project and drop the links of
+        all its clones (before deleting it). Does not commit the link removal.
+        """
+        children = (
+            db.execute(
+                select(ProjectCloneLink.project_id).where(
+                    ProjectCloneLink.parent_project_id == parent_project_id,
+                    ProjectCloneLink.copy_on_write.is_(True),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for child_id in children:
+            self.detach(db, child_id)
+        db.execute(
+            delete(ProjectCloneLink).where(ProjectCloneLink.parent_project_id == parent_project_id)
+        )
+        return len(children)
+
+    def _effective_rows(
+        self, db: Session, project_id: UUID, depth: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, UUID]]:
+        """Column-only version of `effective_variables` used for bulk copies."""
+        columns = [getattr(Variable, column) for column in COPY_COLUMNS]
+        own = [
+            dict(row._mapping)
+            for row in db.execute(
+                select(Variable.id, Variable.project_id, *columns).where(
+                    Variable.project_id == project_id
+                )
+            )
+        ]
+        link = self._parent_link(db, project_id, depth)
+        if link is None:
+            return own, {}
+
+        parent_rows, parent_aliases = self._effective_rows(
+            db, link.parent_project_id, depth + 1
+        )
+        own_by_key = {row["key"]: row for row in own}
+        parent_keys = {str(row["id"]): row["key"] for row in parent_rows}
+        inherited = [row for row in parent_rows if row["key"] not in own_by_key]
+        aliases = {
+            str(row["id"]): own_by_key[row["key"]]["id"]
+            for row in parent_rows
+            if row["key"] in own_by_key
+        }
+        for alias, target in parent_aliases.items():
+            key = parent_keys.get(str(target))
+            if key in own_by_key:
+                aliases[alias] = own_by_key[key]["id"]
+        return own + inherited, aliases
+
+    def _parent_link(
+        self, db: Session, project_id: UUID, depth: int
+    ) -> Optional[ProjectCloneLink]:
+        link = self._cow_link(db, project_id)
+        # Guards against accidental link cycles between projects
+        if link is not None and depth >= self.MAX_CLONE_DEPTH:
+            raise ValueError("Project clone chain is too deep")
+        return link
+
+    @staticmethod
+    def _cow_link(db: Session, project_id: UUID) -> Optional[ProjectCloneLink]:
+        link = db.get(ProjectCloneLink, project_id)
+        return link if link is not None and link.copy_on_write else None
+
+    def _bulk_insert(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            db.execute(
+                insert(Variable).execution_options(render_nulls=True),
+                rows[start : start + self.INSERT_BATCH_SIZE],
+            )
+
+    @staticmethod
+    def _remap(row: Dict[str, Any], id_map: Dict[str, UUID]) -> Dict[str, Any]:
+        """Copy columns, pointing {{id}} references and depends_on at new ids."""
+        values = {column: row[column] for column in COPY_COLUMNS}
+        if values["formula"]:
+            values["formula"] = ID_REF_PATTERN.sub(
+                lambda m: f"{{{{{id_map.get(m.group(1).lower(), m.group(1))}}}}}",
+                values["formula"],
+            )
+        if values["depends_on"]:
+            values["depends_on"] = [id_map.get(str(dep), dep) for dep in values["depends_on"]]
+        return values
+
+    @staticmethod
+    def _references_any(row: Dict[str, Any], id_map: Dict[str, UUID]) -> bool:
+        if any(str(dep) in id_map for dep in row["depends_on"] or ()):
+            return True
+        return any(
+            ref.lower() in id_map for ref in ID_REF_PATTERN.findall(row["formula"] or "")
+        )
@@ -0,0 +1,202 @@
+"""Tracked Loom recalculation jobs with Server-Sent Events progress."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.loom_engine import LoomEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RecalculationJob:
+    """State of one level-by-level recalculation."""
+
+    id: str
+    project_id: UUID
+    tenant_id: int
+    status: str = "pending"
+    level: int = 0
+    levels: int = 0
+    done: int = 0
+    total: int = 0
+    errors: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # (sequence number, event name, payload); bounded so memory stays flat
+    events: Deque[Tuple[int, str, Dict[str, Any]]] = field(default_factory=deque)
+    last_seq: int = 0
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "project_id": str(self.project_id),
+            "status": self.status,
+            "level": self.level,
+            "levels": self.levels,
+            "done": self.done,
+            "total": self.total,
+            "errors": self.errors,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        self.last_seq += 1
+        self.events.append((self.last_seq, event, data))
+        # Wake every waiting subscriber, then re-arm
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class RecalculationJobManager:
+    """
+    Runs recalculations as background tasks and fans their progress out.
+
+    Jobs live in this process only. Each job keeps its last
+    `event_buffer_size` events, so a slow or reconnecting subscriber
+    (Last-Event-ID) may miss intermediate levels but always sees the
+    final "completed"/"failed" event and can read the job summary.
+    """
+
+    HEARTBEAT_SECONDS = 15.0
+    FINISHED_JOB_TTL_SECONDS = 3600.0
+
+    def __init__(self, event_buffer_size: int = 200, chunk_size: int = 1000):
+        self.event_buffer_size = event_buffer_size
+        self.chunk_size = chunk_size
+        self._jobs: Dict[str, RecalculationJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(
+        self, project_id: UUID, tenant_id: int, db_factory: Callable[[], Session]
+    ) -> RecalculationJob:
+        """Start a job, or return the one already running for the project."""
+        self._prune()
+        for job in self._jobs.values():
+            if job.project_id == project_id and not job.finished:
+                return job
+
+        job = RecalculationJob(
+            id=uuid4().hex,
+            project_id=project_id,
+            tenant_id=tenant_id,
+            events=deque(maxlen=self.event_buffer_size),
+        )
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, db_factory))
+        return job
+
+    def get(self, job_id: str) -> Optional[RecalculationJob]:
+        return self._jobs.get(job_id)
+
+    async def stream(self, job: RecalculationJob, last_event_id: int = 0) -> AsyncIterator[str]:
+        """Yield the job's events in SSE wire format until it finishes."""
+        seq = last_event_id
+        while True:
+            waiter = job.changed
+            for event_seq, event, data in list(job.events):
+                if event_seq > seq:
+                    seq = event_seq
+                    yield f"id: {event_seq}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            if job.finished and seq >= job.last_seq:
+                return
+            try:
+                await asyncio.wait_for(waiter.wait(), self.HEARTBEAT_SECONDS)
+            except TimeoutError:
+                # SSE comment, keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    async def _run(self, job: RecalculationJob, db_factory: Callable[[], Session]) -> None:
+        job.status = "running"
+        job.publish("started", job.summary())
+        try:
+            await asyncio.to_thread(
+                self._calculate, job, db_factory, asyncio.get_running_loop()
+            )
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception("Recalculation job failed id=%s project_id=%s", job.id, job.project_id)
+        finally:
+            job.finished_at = time.time()
+            job.publish(job.status, job.summary())
+            self._tasks.pop(job.id, None)
+
+        logger.info(
+            "Recalculation job finished id=%s project_id=%s status=%s variables=%d",
+            job.id,
+            job.project_id,
+            job.status,
+            job.done,
+        )
+
+    def _calculate(
+        self,
+        job: RecalculationJob,
+        db_factory: Callable[[], Session],
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        """
+        Evaluate the levels in a worker thread, with its own session and
+        event loop, so a large model never blocks the API's loop. Each
+        level is handed back to `loop` for publishing.
+        """
+        db = db_factory()
+        try:
+            asyncio.run(self._calculate_levels(job, db, loop))
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _calculate_levels(
+        self, job: RecalculationJob, db: Session, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        engine = LoomEngine(db)
+        async for level in engine.calculate_in_levels(job.project_id, self.chunk_size):
+            loop.call_soon_threadsafe(self._publish_level, job, level)
+
+    @staticmethod
+    def _publish_level(job: RecalculationJob, level: Dict[str, Any]) -> None:
+        job.level = level["level"]
+        job.levels = level["levels"]
+        job.done = level["done"]
+        job.total = level["total"]
+        job.errors += len(level["errors"])
+        job.publish("level", level)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.FINISHED_JOB_TTL_SECONDS
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.finished and job.finished_at is not None and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+
+recalculation_jobs = RecalculationJobManager(
+    event_buffer_size=settings.loom_recalc_event_buffer_size,
+    chunk_size=settings.loom_recalc_chunk_size,
+)
@@ -6,16 +6,22 @@ import json
 import logging
 import os
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
 from anthropic import AsyncAnthropic, APIStatusError
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.project import Project
 from app.models.risk_alert import AlertType, RiskAlert, RiskSeverity, RiskStatus
+from app.models.risk_keyword import RiskKeyword
 from app.services.document_processor import extract_text
+from app.services.document_storage import DocumentStorage
+from app.services.keyword_matcher import MATCH_MODES, Keyword, KeywordMatcher, KeywordMatcherCache
 
 logger = logging.getLogger(__name__)
 
@@ -85,12 +91,32 @@ class RiskScannerService:
         4. Use Claude API to validate and analyze risks
         5. Create RiskAlert records in database
         6. Return list of created alerts
+
+        Findings cached on the document's blob for the same keyword
+        taxonomy are reused as-is, so a duplicate upload costs no Claude calls.
         """
         document = db.query(Document).filter(Document.id == document_id).first()
         if not document:
             logger.warning("Document not found: %s", document_id)
             return []
 
+        # Findings depend on the content and the tenant's taxonomy, so they
+        # are shared per blob and keyed by the taxonomy fingerprint
+        matcher = RiskKeywordService().matcher(db, document.project_id)
+        blob = DocumentStorage().get(db, document)
+        cached = (blob.risk_findings or {}).get(matcher.fingerprint) if blob is not None else None
+        if cached is not None:
+            alerts = [self._alert(document, finding) for finding in cached]
+            db.add_all(alerts)
+            db.commit()
+            logger.info(
+                "Risk findings reused document_id=%s sha256=%s alerts=%d",
+                document_id,
+                blob.sha256,
+                len(alerts),
+            )
+            return alerts
+
         # Get document text
         if document.extracted_text:
             text = document.extracted_text
@@ -101,15 +127,25 @@ class RiskScannerService:
                 logger.warning("Could not extract text from document: %s", document_id)
                 return []
 
-        # Detect keywords
-        keyword_matches = self._detect_keywords(text)
+        # Detect keywords, unless ingestion already did with the same taxonomy
+        meta = document.meta_data or {}
+        keyword_matches = None
+        if document.extracted_text and meta.get("risk_keywords_taxonomy") == matcher.fingerprint:
+            keyword_matches = meta.get("risk_keywords")
+        if keyword_matches is None:
+            keyword_matches = matcher.find(text)
 
         if not keyword_matches:
             logger.info("No risk keywords found in document: %s", document_id)
+            if blob is not None:
+                self._cache_findings(blob, matcher.fingerprint, [])
+                db.commit()
             return []
 
         # Analyze each match with Claude
         alerts: List[RiskAlert] = []
+        findings: List[Dict] = []
+        complete = True
         for category, matches in keyword_matches.items():
             for match_info in matches:
                 keyword = match_info["keyword"]
@@ -122,17 +158,16 @@ class RiskScannerService:
                     )
 
                     if analysis.get("is_risk", False):
-                        alert = RiskAlert(
-                            project_id=document.project_id,
-                            document_id=document.id,
-                            alert_type=AlertType(category),
-                            severity=RiskSeverity(analysis.get("severity", "medium")),
-                            title=analysis.get("title", f"{category} risk detected"),
-                            description=analysis.get("description"),
-                            source_text=context,
-                            recommendation=analysis.get("recommendation"),
-                            status=RiskStatus.NEW,
-                        )
+                        finding = {
+                            "category": category,
+                            "severity": analysis.get("severity", "medium"),
+                            "title": analysis.get("title", f"{category} risk detected"),
+                            "description": analysis.get("description"),
+                            "source_text": context,
+                            "recommendation": analysis.get("recommendation"),
+                        }
+                        alert = self._alert(document, finding)
+                        findings.append(finding)
                         db.add(alert)
                         alerts.append(alert)
                         logger.info(
@@ -144,11 +179,35 @@ class RiskScannerService:
                     logger.error(
                         "Error analyzing risk with Claude: %s - %s", category, e
                     )
+                    complete = False
                     continue
 
+        # A scan with failed analyses is retried for the next duplicate
+        if blob is not None and complete:
+            self._cache_findings(blob, matcher.fingerprint, findings)
         db.commit()
         return alerts
 
+    @staticmethod
+    def _cache_findings(blob: DocumentBlob, fingerprint: str, findings: List[Dict]) -> None:
+        # Reassign so the JSON column is flagged as changed
+        blob.risk_findings = {**(blob.risk_findings or {}), fingerprint: findings}
+
+    @staticmethod
+    def _alert(document: Document, finding: Dict) -> RiskAlert:
+        """Build an alert for a document from one (possibly cached) finding."""
+        return RiskAlert(
+            project_id=document.project_id,
+            document_id=document.id,
+            alert_type=AlertType(finding["category"]),
+            severity=RiskSeverity(finding["severity"]),
+            title=finding["title"],
+            description=finding.get("description"),
+            source_text=finding.get("source_text"),
+            recommendation=finding.get("recommendation"),
+            status=RiskStatus.NEW,
+        )
+
     async def scan_project(
         self, db: Session, project_id: UUID
     ) -> List[RiskAlert]:
@@ -172,22 +231,7 @@ class RiskScannerService:
 
         Returns dict mapping category to list of matches with position.
         """
-        text_lower = text.lower()
-        matches: Dict[str, List[Dict[str, int]]] = {}
-
-        for category, keywords in self.RISK_KEYWORDS.items():
-            category_matches: List[Dict[str, int]] = []
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                # Find all occurrences
-                for match in re.finditer(re.escape(keyword_lower), text_lower):
-                    category_matches.append(
-                        {"keyword": keyword, "position": match.start()}
-                    )
-            if category_matches:
-                matches[category] = category_matches
-
-        return matches
+        return detect_risk_keywords(text)
 
     def _extract_context(self, text: str, position: int, window: int = 200) -> str:
         """Extract surrounding context from text around a position."""
@@ -274,3 +318,98 @@ If it's not a real risk, return {{"is_risk": false}}."""
             logger.error("Unexpected error in Claude analysis: %s", e)
             return {"is_risk": False}
 
+
+class RiskKeywordService:
+    """
+    Per-tenant risk keyword taxonomies.
+
+    Tenants without keywords of their own use `RiskScannerService.RISK_KEYWORDS`.
+    Matchers are compiled once per distinct taxonomy and shared by every
+    scan in the process; a taxonomy edited from another process is picked
+    up on the next scan, since the cache is keyed by content.
+    """
+
+    _matchers = KeywordMatcherCache()
+
+    def matcher(
+        self, db: Optional[Session] = None, project_id: Optional[UUID] = None
+    ) -> KeywordMatcher:
+        """The matcher for a project's tenant (built-in keywords without a project)."""
+        keywords: List[Keyword] = []
+        if db is not None and project_id is not None:
+            tenant_id = select(Project.tenant_id).where(Project.id == project_id).scalar_subquery()
+            keywords = self._load(db, RiskKeyword.tenant_id == tenant_id)
+        return self._matchers.get(keywords or default_risk_keywords())
+
+    def taxonomy(self, db: Session, tenant_id: int) -> Tuple[bool, List[Keyword]]:
+        """(whether the tenant has its own keywords, the keywords in effect)."""
+        keywords = self._load(db, RiskKeyword.tenant_id == tenant_id)
+        return bool(keywords), keywords or default_risk_keywords()
+
+    def replace(self, db: Session, tenant_id: int, keywords: Sequence[Keyword]) -> List[Keyword]:
+        """
+        Replace a tenant's taxonomy; an empty list restores the built-in one.
+
+        Raises ValueError for unknown categories or match modes.
+        """
+        unique: Dict[Tuple[str, str], Keyword] = {}
+        for kw in keywords:
+            text = kw.text.strip()
+            if not text:
+                continue
+            try:
+                AlertType(kw.category)
+            except ValueError:
+                raise ValueError(f"Unknown risk category: {kw.category}")
+            if kw.mode not in MATCH_MODES:
+                raise ValueError(f"Unknown keyword match mode: {kw.mode}")
+            unique.setdefault((kw.category, text.lower()), Keyword(kw.category, text, kw.mode))
+
+        db.execute(delete(RiskKeyword).where(RiskKeyword.tenant_id == tenant_id))
+        if unique:
+            db.execute(
+                insert(RiskKeyword),
+                [
+                    {
+                        "tenant_id": tenant_id,
+                        "category": kw.category,
+                        "keyword": kw.text,
+                        "match_mode": kw.mode,
+                    }
+                    for kw in unique.values()
+                ],
+            )
+        db.commit()
+        logger.info("Risk keywords replaced tenant_id=%s keywords=%d", tenant_id, len(unique))
+        return sorted(unique.values())
+
+    @staticmethod
+    def _load(db: Session, condition) -> List[Keyword]:
+        rows = db.execute(
+            select(RiskKeyword.category, RiskKeyword.keyword, RiskKeyword.match_mode).where(
+                condition
+            )
+        ).all()
+        return sorted(Keyword(category, keyword, mode) for category, keyword, mode in rows)
+
+
+def default_risk_keywords() -> List[Keyword]:
+    """The built-in taxonomy; keywords match from a word start ("delay" finds "delays")."""
+    return [
+        Keyword(category, keyword)
+        for category, keywords in RiskScannerService.RISK_KEYWORDS.items()
+        for keyword in keywords
+    ]
+
+
+def detect_risk_keywords(
+    text: str, offset: int = 0, matcher: Optional[KeywordMatcher] = None
+) -> Dict[str, List[Dict[str, int]]]:
+    """
+    Find all risk keyword matches in `text` and their positions.
+
+    Positions are shifted by `offset`, so a document can be scanned page
+    by page with positions into its full text. Uses the built-in keywords
+    unless a matcher is given.
+    """
+    return (matcher or RiskKeywordService().matcher()).find(text, offset)
@@ -0,0 +1,251 @@
+"""What-if scenarios stored as sparse overlays on a base project."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Any, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.scenario import Scenario
+from app.services.model_evaluator import ModelEvaluator, to_number
+from app.services.project_clone_service import ProjectCloneService
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioService:
+    """
+    Manages scenarios on top of a project's variables.
+
+    A scenario stores only its overridden input values. Evaluation reads
+    every other value from the base project and recomputes just the
+    formulas downstream of the overrides; those results are cached on the
+    scenario together with a fingerprint of the base project, so the cache
+    is reused until the base model changes.
+    """
+
+    def __init__(self) -> None:
+        self.clones = ProjectCloneService()
+
+    async def create(
+        self,
+        db: Session,
+        project_id: UUID,
+        name: str,
+        overrides: Mapping[str, Any],
+        description: Optional[str] = None,
+        created_by: Optional[int] = None,
+    ) -> Scenario:
+        """Create a scenario; override keys may be variable ids, keys or labels."""
+        exists = (
+            db.query(Scenario.id)
+            .filter(Scenario.project_id == project_id, Scenario.name == name)
+            .first()
+        )
+        if exists:
+            raise ValueError(f"Scenario name already exists: {name}")
+
+        evaluator, _ = self._snapshot(db, project_id)
+        scenario = Scenario(
+            project_id=project_id,
+            name=name,
+            description=description,
+            overrides=self._normalize(evaluator, overrides),
+            created_by_id=created_by,
+        )
+        db.add(scenario)
+        db.commit()
+        db.refresh(scenario)
+
+        logger.info(
+            "Scenario created id=%s project_id=%s overrides=%d",
+            scenario.id,
+            project_id,
+            len(scenario.overrides),
+        )
+        return scenario
+
+    async def update(
+        self,
+        db: Session,
+        scenario: Scenario,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        overrides: Optional[Mapping[str, Any]] = None,
+    ) -> Scenario:
+        """
+        Rename a scenario or change its overrides.
+
+        `overrides` are merged into the existing ones; a null value removes
+        that override.
+        """
+        if name is not None and name != scenario.name:
+            exists = (
+                db.query(Scenario.id)
+                .filter(Scenario.project_id == scenario.project_id, Scenario.name == name)
+                .first()
+            )
+            if exists:
+                raise ValueError(f"Scenario name already exists: {name}")
+            scenario.name = name
+        if description is not None:
+            scenario.description = description
+        if overrides:
+            evaluator, _ = self._snapshot(db, scenario.project_id)
+            merged = dict(scenario.overrides or {})
+            for var_id, value in self._normalize(evaluator, overrides, allow_null=True).items():
+                if value is None:
+                    merged.pop(var_id, None)
+                else:
+                    merged[var_id] = value
+            # Reassign so the JSON column is marked dirty
+            scenario.overrides = merged
+            scenario.cached_results = None
+            scenario.cached_fingerprint = None
+        db.commit()
+        db.refresh(scenario)
+        return scenario
+
+    async def values(
+        self,
+        db: Session,
+        scenario: Scenario,
+        keys: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Values of the project as seen through a scenario: {key: value}.
+
+        Only overridden inputs and the formulas downstream of them differ
+        from the base project's stored values.
+        """
+        snapshot = self._snapshot(db, scenario.project_id)
+        return self._overlay(db, scenario, snapshot, keys)
+
+    async def compare(
+        self,
+        db: Session,
+        project_id: UUID,
+        keys: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Base and scenario values side by side.
+
+        Returns: {
+            "base": {key: value},
+            "scenarios": {scenario_name: {key: value}}
+        }
+        """
+        snapshot = self._snapshot(db, project_id)
+        evaluator, _ = snapshot
+        scenarios = (
+            db.query(Scenario)
+            .filter(Scenario.project_id == project_id)
+            .order_by(Scenario.name)
+            .all()
+        )
+        return {
+            "base": self._select(
+                {node.key: node.value for node in evaluator.nodes.values()}, keys
+            ),
+            "scenarios": {
+                scenario.name: self._overlay(db, scenario, snapshot, keys)
+                for scenario in scenarios
+            },
+        }
+
+    def evaluate(
+        self, db: Session, scenario: Scenario, snapshot: Tuple[ModelEvaluator, str]
+    ) -> Dict[str, Any]:
+        """
+        Results of the formulas downstream of the overrides, {variable_id: value}.
+
+        Served from the scenario's cache while the base project is unchanged;
+        otherwise recomputed over the downstream closure only and cached.
+        Raises ValueError on circular dependencies.
+        """
+        evaluator, fingerprint = snapshot
+        if scenario.cached_fingerprint == fingerprint and scenario.cached_results is not None:
+            return scenario.cached_results
+
+        overrides: Dict[Hashable, float] = {}
+        for var_id, value in (scenario.overrides or {}).items():
+            node_id = evaluator.resolve(var_id)
+            if node_id is not None:
+                overrides[node_id] = to_number(value)
+
+        results = evaluator.evaluate(
+            evaluator.downstream_order(overrides), overrides=overrides
+        )
+        cached = {str(node_id): to_number(value) for node_id, value in results.items()}
+
+        scenario.cached_results = cached
+        scenario.cached_fingerprint = fingerprint
+        db.commit()
+
+        logger.info(
+            "Scenario evaluated id=%s overrides=%d recalculated=%d",
+            scenario.id,
+            len(overrides),
+            len(cached),
+        )
+        return cached
+
+    def _snapshot(self, db: Session, project_id: UUID) -> Tuple[ModelEvaluator, str]:
+        """The base project's evaluator plus a fingerprint of its formulas and values."""
+        variables, aliases = self.clones.effective_variables(db, project_id)
+        evaluator = ModelEvaluator.from_variables(variables, aliases=aliases)
+
+        digest = hashlib.blake2b(digest_size=32)
+        for node in sorted(evaluator.nodes.values(), key=lambda n: str(n.id)):
+            digest.update(f"{node.id}\0{node.formula}\0{node.value}\0".encode())
+        # Aliases change what formulas resolve to in copy-on-write clones
+        for ref, node_id in sorted(aliases.items()):
+            digest.update(f"{ref}\0{node_id}\0".encode())
+        return evaluator, digest.hexdigest()
+
+    def _overlay(
+        self,
+        db: Session,
+        scenario: Scenario,
+        snapshot: Tuple[ModelEvaluator, str],
+        keys: Optional[Sequence[str]],
+    ) -> Dict[str, Any]:
+        evaluator, _ = snapshot
+        changed = dict(self.evaluate(db, scenario, snapshot))
+        for var_id, value in (scenario.overrides or {}).items():
+            node_id = evaluator.resolve(var_id)
+            if node_id is not None:
+                changed[str(node_id)] = value
+
+        values: Dict[str, Any] = {}
+        for node in evaluator.nodes.values():
+            var_id = str(node.id)
+            values[node.key] = changed[var_id] if var_id in changed else node.value
+        return self._select(values, keys)
+
+    @staticmethod
+    def _normalize(
+        evaluator: ModelEvaluator, overrides: Mapping[str, Any], allow_null: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Map override references to variable ids. Overriding a formula pins
+        its value for the scenario.
+        """
+        normalized: Dict[str, Any] = {}
+        for ref, value in overrides.items():
+            node_id = evaluator.resolve(str(ref))
+            if node_id is None:
+                raise ValueError(f"Variable not found: {ref}")
+            if value is None and not allow_null:
+                raise ValueError(f"Override value is required: {ref}")
+            normalized[str(node_id)] = value
+        return normalized
+
+    @staticmethod
+    def _select(values: Dict[str, Any], keys: Optional[Sequence[str]]) -> Dict[str, Any]:
+        if not keys:
+            return values
+        return {key: values[key] for key in keys if key in values}
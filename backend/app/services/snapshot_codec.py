@@ -0,0 +1,193 @@
+"""Compact encoding of Loom variable state for versions and history."""
+
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, Iterable, List
+
+from app.models.variable import Variable
+
+# Persisted variable fields, in column order
+VARIABLE_FIELDS = (
+    "key",
+    "label",
+    "value_type",
+    "category",
+    "raw_value",
+    "calculated_value",
+    "formula",
+    "depends_on",
+    "display_order",
+    "description",
+    "unit",
+    "validation_rules",
+)
+
+# {variable_id (str): {field: json-safe value}}
+State = Dict[str, Dict[str, Any]]
+
+_COMPRESSION_LEVEL = 6
+
+
+def variable_state(variable: Variable) -> Dict[str, Any]:
+    """Convert a Variable row into a JSON-safe field dict."""
+    return {
+        "key": variable.key,
+        "label": variable.label,
+        "value_type": variable.value_type.value,
+        "category": variable.category.value,
+        "raw_value": variable.raw_value,
+        "calculated_value": variable.calculated_value,
+        "formula": variable.formula,
+        "depends_on": [str(d) for d in variable.depends_on] if variable.depends_on else None,
+        "display_order": variable.display_order,
+        "description": variable.description,
+        "unit": variable.unit,
+        "validation_rules": variable.validation_rules,
+    }
+
+
+def project_state(variables: Iterable[Variable]) -> State:
+    """Build a state dict for all given variables."""
+    return {str(var.id): variable_state(var) for var in variables}
+
+
+def _pack(payload: Dict[str, Any]) -> bytes:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return zlib.compress(raw.encode("utf-8"), _COMPRESSION_LEVEL)
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def encode_snapshot(state: State) -> bytes:
+    """
+    Encode a full state column-wise.
+
+    Storing one list per field (instead of one object per variable) keeps
+    repeated values such as categories adjacent, which compresses far better.
+    """
+    ids = list(state)
+    columns = {field: [state[vid].get(field) for vid in ids] for field in VARIABLE_FIELDS}
+    return _pack({"ids": ids, "columns": columns})
+
+
+def decode_snapshot(blob: bytes) -> State:
+    """Decode a snapshot produced by `encode_snapshot`."""
+    payload = _unpack(blob)
+    ids: List[str] = payload["ids"]
+    columns: Dict[str, List[Any]] = payload["columns"]
+    state: State = {vid: {} for vid in ids}
+    for field, values in columns.items():
+        for vid, value in zip(ids, values, strict=True):
+            state[vid][field] = value
+    return state
+
+
+def diff_states(old: State, new: State) -> Dict[str, Any]:
+    """
+    Compute a sparse delta that turns `old` into `new`.
+
+    Returns: {
+        "added": {id: full_fields},
+        "changed": {id: changed_fields_only},
+        "removed": [id, ...]
+    }
+    """
+    added: State = {}
+    changed: State = {}
+    for vid, fields in new.items():
+        previous = old.get(vid)
+        if previous is None:
+            added[vid] = dict(fields)
+            continue
+        diff = {f: v for f, v in fields.items() if previous.get(f) != v}
+        if diff:
+            changed[vid] = diff
+    removed = [vid for vid in old if vid not in new]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+def delta_size(delta: Dict[str, Any]) -> int:
+    """Number of variables touched by a delta."""
+    return len(delta["added"]) + len(delta["changed"]) + len(delta["removed"])
+
+
+def apply_delta(state: State, delta: Dict[str, Any]) -> State:
+    """Apply a delta to `state` in place and return it."""
+    for vid in delta["removed"]:
+        state.pop(vid, None)
+    for vid, fields in delta["added"].items():
+        state[vid] = dict(fields)
+    for vid, fields in delta["changed"].items():
+        state.setdefault(vid, {}).update(fields)
+    return state
+
+
+def compose_deltas(deltas: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold consecutive deltas into one equivalent delta.
+
+    Cost is proportional to the total size of the deltas, not of the project.
+    """
+    added: State = {}
+    changed: State = {}
+    removed: Dict[str, None] = {}
+
+    for delta in deltas:
+        for vid in delta["removed"]:
+            if added.pop(vid, None) is None:
+                changed.pop(vid, None)
+                removed[vid] = None
+        for vid, fields in delta["added"].items():
+            if vid in removed:
+                # Existed before the range, was removed and came back
+                del removed[vid]
+                changed[vid] = dict(fields)
+            else:
+                added[vid] = dict(fields)
+        for vid, fields in delta["changed"].items():
+            if vid in added:
+                added[vid].update(fields)
+            else:
+                changed.setdefault(vid, {}).update(fields)
+
+    return {"added": added, "changed": changed, "removed": list(removed)}
+
+
+def invert_delta(delta: Dict[str, Any], old: State) -> Dict[str, Any]:
+    """
+    The delta that undoes `delta`, given the state `old` it was applied to.
+
+    Only the variables the delta touches are read from `old`.
+    """
+    return {
+        "added": {vid: dict(old[vid]) for vid in delta["removed"]},
+        "changed": {
+            vid: {f: old[vid].get(f) for f in fields} for vid, fields in delta["changed"].items()
+        },
+        "removed": list(delta["added"]),
+    }
+
+
+def encode_values(values: Dict[str, Any]) -> bytes:
+    """Encode a flat {variable_id: value} map as two parallel columns."""
+    return _pack({"ids": list(values), "values": list(values.values())})
+
+
+def decode_values(blob: bytes) -> Dict[str, Any]:
+    """Decode a map produced by `encode_values`."""
+    payload = _unpack(blob)
+    return dict(zip(payload["ids"], payload["values"], strict=True))
+
+
+def encode_delta(delta: Dict[str, Any]) -> bytes:
+    """Encode a delta produced by `diff_states`/`compose_deltas`."""
+    return _pack(delta)
+
+
+def decode_delta(blob: bytes) -> Dict[str, Any]:
+    """Decode a delta produced by `encode_delta`."""
+    return _unpack(blob)
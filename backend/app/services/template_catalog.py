@@ -0,0 +1,181 @@
+"""In-process catalog of compiled model templates."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.model_template import ModelTemplate
+from app.services.dependency_resolver import GroupRef, variable_tags
+from app.services.formula_parser import CompiledFormula
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    A template with everything needed to instantiate it without evaluation.
+
+    `order` is the dependency order of variable keys, `depends_on` maps each
+    key to the keys it references and `default_values` holds the calculated
+    value of every formula for the template's default inputs.
+    """
+
+    template_id: str
+    name: str
+    fingerprint: str
+    variables: Tuple[Dict[str, Any], ...]
+    order: Tuple[str, ...]
+    formulas: Dict[str, CompiledFormula]
+    depends_on: Dict[str, Tuple[str, ...]]
+    default_values: Dict[str, str]
+    compiled_at: float
+
+
+class TemplateCatalog:
+    """
+    Compiles templates once and serves them from memory.
+
+    Built-in templates never change and stay cached for the life of the
+    process. Stored templates are invalidated on update/delete of their row
+    (see `invalidate`) and expire after `DB_TEMPLATE_TTL_SECONDS` so changes
+    made by other workers are picked up as well.
+    """
+
+    DB_TEMPLATE_TTL_SECONDS = 300
+
+    def __init__(self, builtin_templates: Mapping[str, Dict[str, Any]]):
+        self.builtin_templates = builtin_templates
+        self._entries: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, template_id: str) -> CompiledTemplate:
+        """
+        Return the compiled template, compiling it on first use.
+
+        Raises ValueError if the template does not exist.
+        """
+        entry = self._entries.get(template_id)
+        if entry is not None and self._is_fresh(entry):
+            return entry
+
+        if template_id in self.builtin_templates:
+            data = self.builtin_templates[template_id]
+            name, var_defs = data["name"], data["variables"]
+        else:
+            template = self._load_template(db, template_id)
+            name, var_defs = template.name, template.variables_schema or []
+
+        fingerprint = self._fingerprint(name, var_defs)
+        if entry is not None and entry.fingerprint == fingerprint:
+            # Expired but unchanged - renew without recompiling
+            entry = replace(entry, compiled_at=time.monotonic())
+        else:
+            entry = self._compile(template_id, name, var_defs, fingerprint)
+            logger.info(
+                "Template compiled template_id=%s variables=%d formulas=%d",
+                template_id,
+                len(entry.variables),
+                len(entry.formulas),
+            )
+
+        with self._lock:
+            self._entries[template_id] = entry
+        return entry
+
+    def warm(self) -> None:
+        """Compile all built-in templates ahead of the first request."""
+        for template_id, data in self.builtin_templates.items():
+            if template_id not in self._entries:
+                fingerprint = self._fingerprint(data["name"], data["variables"])
+                entry = self._compile(template_id, data["name"], data["variables"], fingerprint)
+                with self._lock:
+                    self._entries[template_id] = entry
+
+    def invalidate(self, template_id: Optional[str] = None) -> None:
+        """Drop one compiled template (or all of them)."""
+        with self._lock:
+            if template_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(template_id, None)
+
+    def _is_fresh(self, entry: CompiledTemplate) -> bool:
+        if entry.template_id in self.builtin_templates:
+            return True
+        return time.monotonic() - entry.compiled_at < self.DB_TEMPLATE_TTL_SECONDS
+
+    @staticmethod
+    def _load_template(db: Session, template_id: str) -> ModelTemplate:
+        try:
+            template_uuid = UUID(template_id)
+        except ValueError as e:
+            raise ValueError(f"Template not found: {template_id}") from e
+        template = db.query(ModelTemplate).filter(ModelTemplate.id == template_uuid).first()
+        if not template:
+            raise ValueError(f"Template not found: {template_id}")
+        return template
+
+    @staticmethod
+    def _fingerprint(name: str, var_defs: List[Dict[str, Any]]) -> str:
+        raw = json.dumps({"name": name, "variables": var_defs}, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _compile(
+        template_id: str,
+        name: str,
+        var_defs: List[Dict[str, Any]],
+        fingerprint: str,
+    ) -> CompiledTemplate:
+        """Resolve dependency order and compute default values in memory."""
+        evaluator = ModelEvaluator(
+            ModelNode(
+                id=var_def["key"],
+                key=var_def["key"],
+                label=var_def.get("label"),
+                formula=var_def.get("formula") if var_def["value_type"] == "formula" else None,
+                value=var_def.get("raw_value"),
+                category=var_def.get("category"),
+                tags=tuple(variable_tags(var_def.get("validation_rules"))),
+                display_order=var_def.get("display_order", 0),
+            )
+            for var_def in var_defs
+        )
+
+        try:
+            order = evaluator.calculation_order()
+            results = evaluator.evaluate(order)
+        except ValueError as e:
+            logger.error("Template %s has circular dependencies: %s", template_id, e)
+            order, results = [], {}
+
+        for key, error in evaluator.errors.items():
+            logger.warning("Template %s variable %s not calculated: %s", template_id, key, error)
+
+        return CompiledTemplate(
+            template_id=template_id,
+            name=name,
+            fingerprint=fingerprint,
+            variables=tuple(var_defs),
+            order=tuple(key for key in order if not isinstance(key, GroupRef)),
+            formulas=dict(evaluator.compiled),
+            # Group members are resolved from the formula, not stored as edges
+            depends_on={
+                key: tuple(sorted(dep for dep in deps if not isinstance(dep, GroupRef)))
+                for key, deps in evaluator.graph.items()
+                if not isinstance(key, GroupRef)
+            },
+            default_values={key: str(value) for key, value in results.items()},
+            compiled_at=time.monotonic(),
+        )
@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
-from uuid import UUID
+from typing import Any, Dict, List
+from uuid import UUID, uuid4
 
+from sqlalchemy import event, insert
 from sqlalchemy.orm import Session
 
 from app.models.model_template import ModelTemplate
 from app.models.variable import Variable, VariableCategory, ValueType
+from app.services.portfolio_service import PortfolioService
+from app.services.template_catalog import CompiledTemplate, TemplateCatalog
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,9 @@ logger = logging.getLogger(__name__)
 class TemplateService:
     """Manages model templates"""
 
+    # Rows per INSERT statement when instantiating into many projects
+    BULK_INSERT_BATCH_SIZE = 5000
+
     BUILTIN_TEMPLATES: Dict[str, Dict[str, Any]] = {
         "financial_projection": {
             "name": "Financial Projection (5 Years)",
@@ -194,84 +200,102 @@ class TemplateService:
     async def apply_template(
         self, db: Session, project_id: UUID, template_id: str
     ) -> Dict[str, Any]:
-        """Apply template to project - creates all variables"""
-        if template_id not in self.BUILTIN_TEMPLATES:
-            # Try to load from database
-            template = (
-                db.query(ModelTemplate)
-                .filter(ModelTemplate.id == UUID(template_id))
-                .first()
-            )
-            if not template:
-                raise ValueError(f"Template not found: {template_id}")
-            template_data = {
-                "name": template.name,
-                "variables": template.variables_schema or [],
-            }
-        else:
-            template_data = self.BUILTIN_TEMPLATES[template_id]
+        """
+        Apply template to project - creates all variables.
 
-        created_variables = []
-        variable_map: Dict[str, UUID] = {}  # Map key -> id for dependencies
+        The template comes precompiled from the catalog with its dependencies
+        and default values resolved, so no formula is evaluated here; the
+        variables are written with a single bulk INSERT and one commit.
+        """
+        compiled = template_catalog.get(db, template_id)
 
-        # Create variables in order
-        for var_def in template_data["variables"]:
-            var = Variable(
-                project_id=project_id,
-                key=var_def["key"],
-                label=var_def.get("label", var_def["key"]),
-                value_type=ValueType(var_def["value_type"]),
-                category=VariableCategory(var_def["category"]),
-                raw_value=var_def.get("raw_value", ""),
-                formula=var_def.get("formula"),
-                display_order=var_def.get("display_order", 0),
-                description=var_def.get("description"),
-                unit=var_def.get("unit"),
-            )
-
-            db.add(var)
-            db.flush()  # Get the ID
-            variable_map[var_def["key"]] = var.id
-            created_variables.append(var)
+        rows = self._build_rows(compiled, project_id)
+        if rows:
+            db.execute(insert(Variable).execution_options(render_nulls=True), rows)
+            # Bulk-inserted values never pass through the engine's change tracking
+            await PortfolioService().refresh_project(db, project_id)
+        db.commit()
 
-        # Update depends_on for formula variables
-        for i, var_def in enumerate(template_data["variables"]):
-            if var_def.get("formula"):
-                depends_on = []
-                # Extract dependencies from formula
-                from app.services.formula_parser import FormulaParser
+        logger.info(
+            "Template applied template_id=%s project_id=%s variables=%d",
+            template_id,
+            project_id,
+            len(rows),
+        )
 
-                parser = FormulaParser()
-                parse_result = parser.parse_formula(var_def["formula"])
-                if parse_result["valid"]:
-                    for dep_ref in parse_result["variables"]:
-                        if dep_ref in variable_map:
-                            depends_on.append(variable_map[dep_ref])
+        return {
+            "template_id": template_id,
+            "template_name": compiled.name,
+            "variables_created": len(rows),
+            "variables": [row["key"] for row in rows],
+        }
 
-                created_variables[i].depends_on = depends_on if depends_on else None
+    async def apply_template_to_projects(
+        self, db: Session, project_ids: List[UUID], template_id: str
+    ) -> Dict[str, Any]:
+        """
+        Instantiate one template into many projects in a single transaction.
 
-        db.commit()
+        The compiled template is shared by all projects; every project gets
+        its own ids and the rows go out in bulk INSERT batches.
+        """
+        compiled = template_catalog.get(db, template_id)
 
-        # Calculate formula variables
-        from app.services.loom_engine import LoomEngine
+        rows: List[Dict[str, Any]] = []
+        for project_id in project_ids:
+            rows.extend(self._build_rows(compiled, project_id))
 
-        engine = LoomEngine(db)
-        await engine.calculate_all(project_id)
+        statement = insert(Variable).execution_options(render_nulls=True)
+        for start in range(0, len(rows), self.BULK_INSERT_BATCH_SIZE):
+            db.execute(statement, rows[start : start + self.BULK_INSERT_BATCH_SIZE])
+        if rows:
+            portfolio = PortfolioService()
+            for project_id in project_ids:
+                await portfolio.refresh_project(db, project_id)
+        db.commit()
 
         logger.info(
-            "Template applied template_id=%s project_id=%s variables=%d",
+            "Template applied to projects template_id=%s projects=%d variables=%d",
             template_id,
-            project_id,
-            len(created_variables),
+            len(project_ids),
+            len(rows),
         )
 
         return {
             "template_id": template_id,
-            "template_name": template_data["name"],
-            "variables_created": len(created_variables),
-            "variables": [v.key for v in created_variables],
+            "template_name": compiled.name,
+            "projects": [str(pid) for pid in project_ids],
+            "variables_per_project": len(compiled.variables),
+            "variables_created": len(rows),
         }
 
+    @staticmethod
+    def _build_rows(compiled: CompiledTemplate, project_id: UUID) -> List[Dict[str, Any]]:
+        """Build INSERT rows with pre-generated ids for one project."""
+        ids = {var_def["key"]: uuid4() for var_def in compiled.variables}
+        rows = []
+        for var_def in compiled.variables:
+            key = var_def["key"]
+            depends_on = [ids[dep] for dep in compiled.depends_on.get(key, ())]
+            rows.append(
+                {
+                    "id": ids[key],
+                    "project_id": project_id,
+                    "key": key,
+                    "label": var_def.get("label", key),
+                    "value_type": ValueType(var_def["value_type"]),
+                    "category": VariableCategory(var_def["category"]),
+                    "raw_value": var_def.get("raw_value", ""),
+                    "calculated_value": compiled.default_values.get(key),
+                    "formula": var_def.get("formula"),
+                    "depends_on": depends_on if depends_on else None,
+                    "display_order": var_def.get("display_order", 0),
+                    "description": var_def.get("description"),
+                    "unit": var_def.get("unit"),
+                }
+            )
+        return rows
+
     async def create_template_from_project(
         self,
         db: Session,
@@ -322,3 +346,13 @@ class TemplateService:
 
         return template
 
+
+# Compiled built-in and stored templates, shared by the whole process
+template_catalog = TemplateCatalog(TemplateService.BUILTIN_TEMPLATES)
+
+
+@event.listens_for(ModelTemplate, "after_update")
+@event.listens_for(ModelTemplate, "after_delete")
+def _invalidate_compiled_template(mapper, connection, target: ModelTemplate) -> None:
+    """Drop the compiled copy whenever a stored template row changes."""
+    template_catalog.invalidate(str(target.id))
@@ -0,0 +1,89 @@
+"""Streaming storage of uploaded files."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """The upload exceeds the configured size limit."""
+
+
+@dataclass
+class StoredUpload:
+    """A file written to its final location."""
+
+    path: Path
+    size: int
+    sha256: str
+
+
+def safe_filename(filename: str | None) -> str:
+    """Base name of a client-supplied file name, so it cannot escape the target directory."""
+    name = Path((filename or "").replace("\\", "/")).name.strip()
+    if name in ("", ".", ".."):
+        raise ValueError("Upload has no file name")
+    return name
+
+
+async def save_upload(
+    upload: UploadFile, target_path: Path, max_bytes: int, chunk_size: int
+) -> StoredUpload:
+    """
+    Stream an upload to `target_path` without holding it in memory.
+
+    Chunks go to a temporary file in the target directory (writes run in
+    the threadpool, off the event loop) while the SHA-256 is computed on
+    the fly; the file is moved into place with an atomic rename once
+    complete. Nothing is left behind when the upload fails or exceeds
+    `max_bytes` (UploadTooLargeError).
+    """
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    handle = await run_in_threadpool(
+        tempfile.NamedTemporaryFile,
+        dir=target_path.parent,
+        prefix=".upload-",
+        suffix=".part",
+        delete=False,
+    )
+    temp_path = Path(handle.name)
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"File exceeds the upload limit of {max_bytes} bytes")
+            digest.update(chunk)
+            await run_in_threadpool(handle.write, chunk)
+        await run_in_threadpool(_finish, handle)
+        await run_in_threadpool(os.replace, temp_path, target_path)
+    except BaseException:
+        handle.close()
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    logger.info("Upload stored path=%s bytes=%d", target_path, size)
+    return StoredUpload(path=target_path, size=size, sha256=digest.hexdigest())
+
+
+def _finish(handle: BinaryIO) -> None:
+    # Data must be on disk before the rename makes the file visible
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
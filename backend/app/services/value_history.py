@@ -0,0 +1,227 @@
+"""Append-only history of calculated Loom values."""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.variable import Variable
+from app.models.variable_value_history import VariableValueHistory
+from app.services import snapshot_codec
+
+logger = logging.getLogger(__name__)
+
+# {variable_id: (old_value, new_value)}
+ValueChanges = Dict[UUID, Tuple[Any, Any]]
+
+
+class ValueHistoryService:
+    """
+    Records value changes as compressed batches and answers as-of reads.
+
+    Every engine run appends one row holding only the values it changed.
+    Checkpoint rows hold the full value map of a project: one is written
+    before the first batch and `compact` folds old batches into new ones, so
+    an as-of read replays at most the batches since the last checkpoint.
+    """
+
+    async def record(self, db: Session, project_id: UUID, changes: ValueChanges) -> None:
+        """
+        Append a batch of changed values to the session.
+
+        Does not commit - the caller commits the batch together with the
+        values it describes.
+        """
+        if not changes:
+            return
+
+        now = datetime.now(timezone.utc)
+        has_history = db.execute(
+            select(VariableValueHistory.id)
+            .where(VariableValueHistory.project_id == project_id)
+            .limit(1)
+        ).first()
+        if has_history is None:
+            # Baseline: the state right before this first change
+            baseline = self._current_values(db, project_id)
+            baseline.update({str(vid): old for vid, (old, _) in changes.items()})
+            db.add(self._row(project_id, now, baseline, is_checkpoint=True))
+
+        batch = {str(vid): new for vid, (_, new) in changes.items()}
+        db.add(self._row(project_id, now, batch, is_checkpoint=False))
+
+    async def values_as_of(
+        self, db: Session, project_id: UUID, as_of: datetime
+    ) -> Dict[str, Any]:
+        """
+        Return {variable_id: value} for the project as it was at `as_of`.
+
+        Reads the latest checkpoint at or before `as_of` and the batches
+        after it in a single query. Returns an empty dict if no history
+        reaches back that far.
+        """
+        rows = db.execute(
+            select(VariableValueHistory.is_checkpoint, VariableValueHistory.payload)
+            .where(
+                VariableValueHistory.project_id == project_id,
+                self._since_checkpoint(project_id, as_of),
+                VariableValueHistory.recorded_at <= as_of,
+            )
+            .order_by(VariableValueHistory.recorded_at, VariableValueHistory.id)
+        ).all()
+        return self._fold(rows)
+
+    async def history(
+        self,
+        db: Session,
+        variable_id: UUID,
+        project_id: UUID,
+        start: datetime,
+        end: datetime,
+    ) -> List[Dict[str, Any]]:
+        """
+        Values of one variable between `start` and `end`.
+
+        The first point is the value at `start` (if known), followed by one
+        point per recorded change.
+        """
+        key = str(variable_id)
+        rows = db.execute(
+            select(
+                VariableValueHistory.recorded_at,
+                (VariableValueHistory.recorded_at <= start).label("before_start"),
+                VariableValueHistory.payload,
+            )
+            .where(
+                VariableValueHistory.project_id == project_id,
+                self._since_checkpoint(project_id, start),
+                VariableValueHistory.recorded_at <= end,
+            )
+            .order_by(VariableValueHistory.recorded_at, VariableValueHistory.id)
+        ).all()
+
+        start_value: Optional[Any] = None
+        changes: List[Tuple[datetime, Any]] = []
+        for row in rows:
+            values = snapshot_codec.decode_values(row.payload)
+            if key not in values:
+                continue
+            if row.before_start:
+                start_value = values[key]
+            else:
+                changes.append((row.recorded_at, values[key]))
+
+        points: List[Dict[str, Any]] = []
+        if start_value is not None:
+            points.append({"recorded_at": start, "value": start_value})
+        for recorded_at, value in changes:
+            if not points or points[-1]["value"] != value:
+                points.append({"recorded_at": recorded_at, "value": value})
+        return points
+
+    async def compact(
+        self, db: Session, older_than: datetime, project_id: Optional[UUID] = None
+    ) -> Dict[str, int]:
+        """
+        Fold all rows recorded before `older_than` into one checkpoint per project.
+
+        As-of reads after `older_than` are unaffected; finer-grained history
+        before it is dropped.
+        """
+        query = select(VariableValueHistory.project_id).where(
+            VariableValueHistory.recorded_at < older_than
+        )
+        if project_id is not None:
+            query = query.where(VariableValueHistory.project_id == project_id)
+        project_ids = db.execute(query.distinct()).scalars().all()
+
+        projects_compacted = 0
+        rows_removed = 0
+        for pid in project_ids:
+            rows = db.execute(
+                select(
+                    VariableValueHistory.id,
+                    VariableValueHistory.recorded_at,
+                    VariableValueHistory.is_checkpoint,
+                    VariableValueHistory.payload,
+                )
+                .where(
+                    VariableValueHistory.project_id == pid,
+                    VariableValueHistory.recorded_at < older_than,
+                )
+                .order_by(VariableValueHistory.recorded_at, VariableValueHistory.id)
+            ).all()
+            if len(rows) == 1 and rows[0].is_checkpoint:
+                continue
+
+            db.execute(
+                delete(VariableValueHistory).where(
+                    VariableValueHistory.id.in_([row.id for row in rows])
+                )
+            )
+            db.add(self._row(pid, rows[-1].recorded_at, self._fold(rows), is_checkpoint=True))
+            projects_compacted += 1
+            rows_removed += len(rows) - 1
+
+        db.commit()
+
+        logger.info(
+            "Value history compacted projects=%d rows_removed=%d older_than=%s",
+            projects_compacted,
+            rows_removed,
+            older_than.isoformat(),
+        )
+
+        return {"projects_compacted": projects_compacted, "rows_removed": rows_removed}
+
+    @staticmethod
+    def _since_checkpoint(project_id: UUID, moment: datetime):
+        """Filter rows to those at or after the latest checkpoint before `moment`."""
+        checkpoint_at = (
+            select(func.max(VariableValueHistory.recorded_at))
+            .where(
+                VariableValueHistory.project_id == project_id,
+                VariableValueHistory.is_checkpoint.is_(True),
+                VariableValueHistory.recorded_at <= moment,
+            )
+            .scalar_subquery()
+        )
+        # No checkpoint yet: history starts after `moment`, read from the beginning
+        return or_(checkpoint_at.is_(None), VariableValueHistory.recorded_at >= checkpoint_at)
+
+    @staticmethod
+    def _fold(rows) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for row in rows:
+            decoded = snapshot_codec.decode_values(row.payload)
+            if row.is_checkpoint:
+                values = decoded
+            else:
+                values.update(decoded)
+        return values
+
+    @staticmethod
+    def _current_values(db: Session, project_id: UUID) -> Dict[str, Any]:
+        rows = db.execute(
+            select(Variable.id, Variable.calculated_value, Variable.raw_value).where(
+                Variable.project_id == project_id
+            )
+        ).all()
+        return {str(row.id): row.calculated_value or row.raw_value for row in rows}
+
+    @staticmethod
+    def _row(
+        project_id: UUID, recorded_at: datetime, values: Dict[str, Any], is_checkpoint: bool
+    ) -> VariableValueHistory:
+        return VariableValueHistory(
+            project_id=project_id,
+            recorded_at=recorded_at,
+            is_checkpoint=is_checkpoint,
+            entries_count=len(values),
+            payload=snapshot_codec.encode_values(values),
+        )
@@ -0,0 +1,299 @@
+"""Bulk import of Loom variables from CSV and XLSX files."""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.schemas.variable import VariableCreate
+from app.services.formula_parser import FormulaParser, parse_group_ref
+from app.services.loom_engine import LoomEngine
+from app.services.portfolio_service import PortfolioService
+from app.services.project_clone_service import ProjectCloneService
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+# Header aliases accepted in uploaded files
+COLUMN_ALIASES = {
+    "value": "raw_value",
+    "type": "value_type",
+}
+
+
+class VariableImportService:
+    """
+    Streams variables out of a spreadsheet into a project.
+
+    Rows are parsed one at a time and validated against an in-memory index
+    of the project's keys, labels and ids (existing variables plus rows
+    already imported), so no per-row queries are made. Valid rows are
+    bulk-inserted in batches, invalid rows are reported by row number
+    without aborting the import, and the project is recalculated once at
+    the end.
+    """
+
+    BATCH_SIZE = 1000
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self) -> None:
+        self.parser = FormulaParser()
+
+    async def import_file(
+        self, db: Session, project_id: UUID, stream: BinaryIO, filename: str
+    ) -> Dict[str, Any]:
+        """
+        Import variables from a CSV or XLSX file.
+
+        The first row holds the headers (key, label, value_type, category,
+        raw_value/value, formula, description, unit, display_order). Formula
+        references may point at existing variables or at any row of the file.
+
+        Returns: {
+            "imported": int,
+            "failed": int,
+            "errors": [{"row": int, "key": str, "error": str}],
+            "variables_calculated": int,
+            "calculation_error": str | None
+        }
+
+        Raises ValueError for unsupported or unreadable files.
+        """
+        rows = self.iter_rows(stream, filename)
+
+        variables, aliases = ProjectCloneService().effective_variables(db, project_id)
+        index: Dict[str, UUID] = dict(aliases)
+        for var in variables:
+            index[var.key] = var.id
+            index[var.label] = var.id
+            index[str(var.id)] = var.id
+        taken_keys: Set[str] = {var.key for var in variables}
+
+        errors: List[Dict[str, Any]] = []
+        failed = 0
+        batch: List[Dict[str, Any]] = []
+        imported = 0
+        # Rows whose references may be defined further down the file
+        pending: List[Tuple[int, Dict[str, Any], List[str]]] = []
+
+        def fail(row_number: int, key: Optional[str], error: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < self.MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "key": key, "error": error})
+
+        def accept(values: Dict[str, Any], refs: List[str]) -> None:
+            nonlocal imported
+            index.setdefault(values["key"], values["id"])
+            index.setdefault(values["label"], values["id"])
+            values["depends_on"] = list(dict.fromkeys(index[ref] for ref in refs))
+            batch.append(values)
+            imported += 1
+            if len(batch) >= self.BATCH_SIZE:
+                self._flush(db, batch)
+
+        try:
+            for row_number, row in rows:
+                try:
+                    values, refs = self._build_row(project_id, row, row_number)
+                except ValueError as e:
+                    fail(row_number, row.get("key") or None, str(e))
+                    continue
+
+                key = values["key"]
+                if key in taken_keys:
+                    fail(row_number, key, f"Variable key already exists: {key}")
+                    continue
+                taken_keys.add(key)
+
+                if all(ref in index for ref in refs):
+                    accept(values, refs)
+                else:
+                    pending.append((row_number, values, refs))
+
+            # Forward references are known once the whole file has been read;
+            # repeat while rows keep resolving (they may reference each other)
+            while pending:
+                unresolved = []
+                for row_number, values, refs in pending:
+                    if all(ref in index for ref in refs):
+                        accept(values, refs)
+                    else:
+                        unresolved.append((row_number, values, refs))
+                if len(unresolved) == len(pending):
+                    break
+                pending = unresolved
+            for row_number, values, refs in pending:
+                missing = [ref for ref in refs if ref not in index]
+                skipped = [ref for ref in missing if ref in taken_keys]
+                if skipped:
+                    error = f"Depends on rows that could not be imported: {', '.join(skipped)}"
+                else:
+                    error = f"Variables not found: {', '.join(missing)}"
+                fail(row_number, values["key"], error)
+            self._flush(db, batch)
+            # Imported inputs never pass through the engine's change tracking
+            await PortfolioService().refresh_project(db, project_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(
+            "Variables imported project_id=%s file=%s imported=%d failed=%d",
+            project_id,
+            filename,
+            imported,
+            failed,
+        )
+
+        calculated = 0
+        calculation_error = None
+        if imported:
+            try:
+                summary = await LoomEngine(db).calculate_all(project_id)
+                calculated = summary["variables_calculated"]
+            except ValueError as e:
+                calculation_error = str(e)
+
+        return {
+            "imported": imported,
+            "failed": failed,
+            "errors": sorted(errors, key=lambda error: error["row"]),
+            "variables_calculated": calculated,
+            "calculation_error": calculation_error,
+        }
+
+    def iter_rows(self, stream: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (row number, {column: value}) for each non-empty data row."""
+        extension = Path(filename or "").suffix.lower()
+        if extension == ".csv":
+            raw_rows = self._iter_csv(stream)
+        elif extension == ".xlsx":
+            raw_rows = self._iter_xlsx(stream)
+        else:
+            raise ValueError(
+                f"Unsupported file type: {extension or filename}. "
+                f"Use one of: {', '.join(SUPPORTED_EXTENSIONS)}"
+            )
+
+        header = next(raw_rows, None)
+        if not header:
+            raise ValueError("File is empty")
+        columns = [self._column_name(name) for name in header]
+        if "key" not in columns:
+            raise ValueError("Missing required column: key")
+
+        # Row 1 is the header, as in a spreadsheet
+        for row_number, raw in enumerate(raw_rows, start=2):
+            row = {
+                column: value
+                # Rows may be shorter or longer than the header
+                for column, value in zip(columns, raw, strict=False)
+                if column and value is not None and str(value).strip() != ""
+            }
+            if row:
+                yield row_number, row
+
+    def _build_row(
+        self, project_id: UUID, row: Dict[str, Any], row_number: int
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Validate one row; returns insert values and its formula references."""
+        values = {column: self._text(value) for column, value in row.items()}
+        values.setdefault("label", values.get("key"))
+        formula = values.get("formula")
+        values["value_type"] = (
+            values.get("value_type", ValueType.FORMULA.value if formula else ValueType.NUMBER.value)
+        ).lower()
+        values.setdefault("category", VariableCategory.INPUT.value)
+        values["category"] = values["category"].lower()
+        values.setdefault("display_order", row_number)
+
+        try:
+            variable = VariableCreate(project_id=project_id, **values)
+        except ValidationError as e:
+            raise ValueError(
+                "; ".join(
+                    f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                )
+            ) from e
+
+        refs: List[str] = []
+        if variable.formula:
+            compiled = self.parser.compile_formula(variable.formula)
+            refs = [ref for ref in compiled.references if not parse_group_ref(ref)]
+
+        return (
+            {
+                "id": uuid4(),
+                "project_id": project_id,
+                "key": variable.key,
+                "label": variable.label,
+                "value_type": variable.value_type,
+                "category": variable.category,
+                "raw_value": variable.raw_value or "",
+                "calculated_value": None if variable.formula else variable.raw_value,
+                "formula": variable.formula,
+                "display_order": variable.display_order,
+                "description": variable.description,
+                "unit": variable.unit,
+                "validation_rules": None,
+            },
+            refs,
+        )
+
+    @staticmethod
+    def _flush(db: Session, batch: List[Dict[str, Any]]) -> None:
+        if batch:
+            db.execute(insert(Variable).execution_options(render_nulls=True), batch)
+            batch.clear()
+
+    @staticmethod
+    def _iter_csv(stream: BinaryIO) -> Iterator[List[Any]]:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(text)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ValueError(f"Could not read CSV file: {e}") from e
+        finally:
+            # Leave the underlying upload open for its owner
+            text.detach()
+
+    @staticmethod
+    def _iter_xlsx(stream: BinaryIO) -> Iterator[List[Any]]:
+        try:
+            from openpyxl import load_workbook
+        except ImportError as e:
+            raise ValueError("XLSX import requires the openpyxl package") from e
+
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Could not read XLSX file: {e}") from e
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _column_name(name: Any) -> str:
+        column = str(name or "").strip().lower().replace(" ", "_")
+        return COLUMN_ALIASES.get(column, column)
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        # Spreadsheet numbers arrive as floats; keep whole numbers integral
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value).strip()
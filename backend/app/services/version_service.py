@@ -0,0 +1,284 @@
+"""Version service - compact snapshots, deltas and restore for Loom projects."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session, load_only
+
+from app.crud import variable as variable_crud
+from app.models.model_version import ModelVersion
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.services import snapshot_codec
+from app.services.portfolio_service import PortfolioService
+from app.services.snapshot_codec import State
+from app.services.value_history import ValueChanges, ValueHistoryService
+
+logger = logging.getLogger(__name__)
+
+
+class VersionService:
+    """
+    Saves and restores project versions.
+
+    Each version stores a sparse delta against its predecessor, and every
+    `FULL_SNAPSHOT_INTERVAL` versions a full columnar snapshot is stored as
+    well. Restoring replays at most `FULL_SNAPSHOT_INTERVAL - 1` deltas on top
+    of the nearest snapshot; diffing two versions only reads the deltas
+    between them.
+    """
+
+    FULL_SNAPSHOT_INTERVAL = 10
+
+    async def save_version(
+        self,
+        db: Session,
+        project_id: UUID,
+        change_summary: str | None = None,
+        created_by_id: int | None = None,
+    ) -> ModelVersion:
+        """Save the current state of all project variables as a new version."""
+        variables = variable_crud.list_variables_for_project(db, project_id=project_id)
+        state = snapshot_codec.project_state(variables)
+
+        last_number = db.execute(
+            select(func.max(ModelVersion.version_number)).where(
+                ModelVersion.project_id == project_id
+            )
+        ).scalar()
+        version_number = (last_number or 0) + 1
+
+        delta_blob = None
+        changes_count = len(state)
+        store_snapshot = last_number is None
+        if last_number is not None:
+            previous = self._materialize_state(db, project_id, last_number)
+            delta = snapshot_codec.diff_states(previous, state)
+            delta_blob = snapshot_codec.encode_delta(delta)
+            changes_count = snapshot_codec.delta_size(delta)
+            # Start a new snapshot on the interval, or when the delta touches
+            # most of the model and would not be any smaller than a snapshot
+            store_snapshot = (
+                (version_number - 1) % self.FULL_SNAPSHOT_INTERVAL == 0
+                or changes_count * 2 > len(state)
+            )
+
+        version = ModelVersion(
+            project_id=project_id,
+            version_number=version_number,
+            snapshot=snapshot_codec.encode_snapshot(state) if store_snapshot else None,
+            delta=delta_blob,
+            variables_count=len(state),
+            changes_count=changes_count,
+            change_summary=change_summary,
+            created_by_id=created_by_id,
+        )
+        db.add(version)
+        db.commit()
+        db.refresh(version)
+
+        logger.info(
+            "Model version saved project_id=%s version=%d snapshot=%s changes=%d",
+            project_id,
+            version_number,
+            store_snapshot,
+            changes_count,
+        )
+
+        return version
+
+    async def list_versions(self, db: Session, project_id: UUID) -> List[ModelVersion]:
+        """List project versions, newest first, without loading payloads."""
+        return (
+            db.query(ModelVersion)
+            .options(
+                load_only(
+                    ModelVersion.id,
+                    ModelVersion.project_id,
+                    ModelVersion.version_number,
+                    ModelVersion.variables_count,
+                    ModelVersion.changes_count,
+                    ModelVersion.change_summary,
+                    ModelVersion.created_by_id,
+                    ModelVersion.created_at,
+                )
+            )
+            .filter(ModelVersion.project_id == project_id)
+            .order_by(ModelVersion.version_number.desc())
+            .all()
+        )
+
+    async def diff_versions(
+        self,
+        db: Session,
+        project_id: UUID,
+        from_version: int,
+        to_version: int,
+    ) -> Dict[str, Any]:
+        """
+        Diff two versions by composing the deltas between them.
+
+        The diff turns `from_version` into `to_version`; a reverse diff
+        (from a later version to an earlier one) inverts the forward delta
+        using the earlier version's state.
+
+        Returns: {
+            "from_version": int,
+            "to_version": int,
+            "added": {variable_id: fields},
+            "changed": {variable_id: changed_fields},
+            "removed": [variable_id, ...]
+        }
+        """
+        low, high = sorted((from_version, to_version))
+        rows = db.execute(
+            select(ModelVersion.version_number, ModelVersion.delta)
+            .where(
+                ModelVersion.project_id == project_id,
+                ModelVersion.version_number > low,
+                ModelVersion.version_number <= high,
+            )
+            .order_by(ModelVersion.version_number)
+        ).all()
+
+        if len(rows) != high - low:
+            raise ValueError(f"Versions {low}..{high} not found for project")
+
+        composed = snapshot_codec.compose_deltas(
+            snapshot_codec.decode_delta(row.delta) for row in rows
+        )
+        if from_version > to_version:
+            earlier = self._materialize_state(db, project_id, low)
+            composed = snapshot_codec.invert_delta(composed, earlier)
+        return {"from_version": from_version, "to_version": to_version, **composed}
+
+    async def restore_version(
+        self, db: Session, project_id: UUID, version_id: UUID
+    ) -> Dict[str, Any]:
+        """
+        Restore project variables to the given version in a single transaction.
+
+        Only rows that differ from the version are written, using one bulk
+        DELETE, one bulk UPDATE and one bulk INSERT. Restored calculated
+        values are appended to the value history in the same transaction.
+        """
+        version_number = db.execute(
+            select(ModelVersion.version_number).where(
+                ModelVersion.id == version_id,
+                ModelVersion.project_id == project_id,
+            )
+        ).scalar()
+        if version_number is None:
+            raise ValueError("Version not found")
+
+        target = self._materialize_state(db, project_id, version_number)
+        current = snapshot_codec.project_state(
+            variable_crud.list_variables_for_project(db, project_id=project_id)
+        )
+        delta = snapshot_codec.diff_states(current, target)
+
+        try:
+            # Before the writes, so a first history baseline sees the old values
+            await ValueHistoryService().record(
+                db, project_id, self._value_changes(current, target, delta)
+            )
+            if delta["removed"]:
+                db.execute(
+                    delete(Variable).where(
+                        Variable.id.in_([UUID(vid) for vid in delta["removed"]])
+                    )
+                )
+            if delta["changed"]:
+                db.execute(
+                    update(Variable),
+                    [
+                        {"id": UUID(vid), **self._column_values(fields)}
+                        for vid, fields in delta["changed"].items()
+                    ],
+                )
+            if delta["added"]:
+                db.execute(
+                    insert(Variable).execution_options(render_nulls=True),
+                    [
+                        {"id": UUID(vid), "project_id": project_id, **self._column_values(fields)}
+                        for vid, fields in delta["added"].items()
+                    ],
+                )
+            if snapshot_codec.delta_size(delta):
+                # Bulk writes bypass the engine's change tracking
+                await PortfolioService().refresh_project(db, project_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        logger.info(
+            "Model version restored project_id=%s version=%d changed=%d",
+            project_id,
+            version_number,
+            snapshot_codec.delta_size(delta),
+        )
+
+        return {
+            "version_id": version_id,
+            "version_number": version_number,
+            "variables_added": len(delta["added"]),
+            "variables_updated": len(delta["changed"]),
+            "variables_removed": len(delta["removed"]),
+        }
+
+    def _materialize_state(self, db: Session, project_id: UUID, version_number: int) -> State:
+        """Rebuild a version from its nearest snapshot plus following deltas."""
+        base_number = (
+            select(func.max(ModelVersion.version_number))
+            .where(
+                ModelVersion.project_id == project_id,
+                ModelVersion.snapshot.is_not(None),
+                ModelVersion.version_number <= version_number,
+            )
+            .scalar_subquery()
+        )
+        rows = db.execute(
+            select(ModelVersion.version_number, ModelVersion.snapshot, ModelVersion.delta)
+            .where(
+                ModelVersion.project_id == project_id,
+                ModelVersion.version_number >= base_number,
+                ModelVersion.version_number <= version_number,
+            )
+            .order_by(ModelVersion.version_number)
+        ).all()
+
+        if not rows or rows[0].snapshot is None:
+            raise ValueError(f"No snapshot found for version {version_number}")
+
+        state = snapshot_codec.decode_snapshot(rows[0].snapshot)
+        for row in rows[1:]:
+            snapshot_codec.apply_delta(state, snapshot_codec.decode_delta(row.delta))
+        return state
+
+    @staticmethod
+    def _value_changes(current: State, target: State, delta: Dict[str, Any]) -> ValueChanges:
+        """Calculated values a restore changes, as {variable_id: (old, new)}."""
+        changes: ValueChanges = {}
+        for vid in (*delta["added"], *delta["changed"], *delta["removed"]):
+            old = current.get(vid, {}).get("calculated_value")
+            new = target.get(vid, {}).get("calculated_value")
+            if old != new:
+                changes[UUID(vid)] = (old, new)
+        return changes
+
+    @staticmethod
+    def _column_values(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert JSON-safe snapshot fields back into column values."""
+        values = dict(fields)
+        if "value_type" in values:
+            values["value_type"] = ValueType(values["value_type"])
+        if "category" in values:
+            values["category"] = VariableCategory(values["category"])
+        if "depends_on" in values:
+            deps = values["depends_on"]
+            values["depends_on"] = [UUID(d) for d in deps] if deps else None
+        return values
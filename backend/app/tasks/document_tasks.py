@@ -4,17 +4,37 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Callable, Optional
+import os
+import tempfile
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.document import Document, DocumentStatus
-from app.services.document_processor import extract_text
+from app.services.document_chunks import DocumentChunkService
+from app.services.document_processor import (
+    PAGE_BREAK,
+    TEXT_BLOCK_CHARS,
+    Page,
+    PdfExtractionError,
+    iter_pages,
+)
+from app.services.document_storage import DocumentStorage
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.notification_service import NotificationService
+from app.services.risk_scanner import RiskKeywordService, RiskScannerService
 
 
 logger = logging.getLogger(__name__)
 
 
+# Job kinds a new upload goes through, in order. Extraction, chunking and
+# indexing share one streaming pass over the pages (see `_ingest`)
+DOCUMENT_PIPELINE = ("document.ingest", "document.risk_scan")
+
+
 async def process_document(
     db_factory: Callable[[], Session],
     document_id: str,
@@ -27,35 +47,142 @@ async def process_document(
     db: Optional[Session] = None
     try:
         db = db_factory()
-        doc: Document | None = db.query(Document).filter(Document.id == document_id).first()
-        if not doc:
-            return
-
-        doc.status = DocumentStatus.PROCESSING
-        db.add(doc)
-        db.commit()
-
-        text = await extract_text(doc.file_path)
-        if text:
-            doc.status = DocumentStatus.READY
-            doc.extracted_text = text
-        else:
-            doc.status = DocumentStatus.ERROR
-
-        db.add(doc)
-        db.commit()
+        await ingest_document(db, {"document_id": str(document_id)})
     except Exception as exc:
         if db is not None:
-            doc = db.query(Document).filter(Document.id == document_id).first()
-            if doc:
-                doc.status = DocumentStatus.ERROR
-                db.add(doc)
-                db.commit()
+            # Drop chunks written before the failure
+            db.rollback()
+            mark_document_failed(db, {"document_id": str(document_id)})
         logger.exception("Document processing failed for id=%s: %s", document_id, exc)
     finally:
         if db is not None:
             db.close()
 
 
+async def ingest_document(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The "document.ingest" job: extract, chunk and index a document.
+
+    A document that yields no text ends in ERROR. Unexpected errors
+    propagate so that the queue retries the job.
+    """
+    doc = db.get(Document, UUID(payload["document_id"]))
+    if not doc:
+        return {"skipped": "document not found"}
+
+    doc.status = DocumentStatus.PROCESSING
+    db.add(doc)
+    db.commit()
+
+    # Extraction depends only on the content, so it is shared per blob
+    chunks = DocumentChunkService()
+    matcher = RiskKeywordService().matcher(db, doc.project_id)
+    blob = DocumentStorage().get(db, doc)
+    if blob is not None and blob.extracted_text is not None:
+        text = blob.extracted_text
+        keywords = matcher.find(text)
+        if text:
+            chunks.store(db, doc, text)
+    else:
+        try:
+            text, keywords = await _ingest(db, doc, chunks, matcher)
+        except PdfExtractionError as e:
+            logger.warning("%s", e)
+            db.rollback()
+            text, keywords = "", {}
+        if blob is not None and text:
+            blob.extracted_text = text
+    if text:
+        doc.status = DocumentStatus.READY
+        doc.extracted_text = text
+        # Read by the risk scan instead of searching the text again
+        doc.meta_data = {
+            **(doc.meta_data or {}),
+            "risk_keywords": keywords,
+            "risk_keywords_taxonomy": matcher.fingerprint,
+        }
+    else:
+        doc.status = DocumentStatus.ERROR
+
+    db.add(doc)
+    db.commit()
+    # Re-ingestion leaves the replaced chunks' vectors behind
+    chunks.compact_vectors(db, doc.project_id)
+    return {"status": doc.status.value, "characters": len(text)}
+
+
+def mark_document_failed(db: Session, payload: Dict[str, Any]) -> None:
+    """Set a document to ERROR once its ingestion has run out of attempts."""
+    doc = db.get(Document, UUID(payload["document_id"]))
+    if doc:
+        doc.status = DocumentStatus.ERROR
+        db.add(doc)
+        db.commit()
 
 
+async def scan_document_risks(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The "document.risk_scan" job: scan a processed document and notify its uploader.
+
+    Runs after "document.ingest", so the scan reads the stored text and
+    keyword matches instead of extracting the file again.
+    """
+    api_key = os.getenv("ANTHROPIC_API_KEY", "") or getattr(settings, "anthropic_api_key", "")
+    if not api_key:
+        logger.warning("Claude API key not configured, skipping risk scan")
+        return {"skipped": "Claude API key not configured"}
+
+    document_id = UUID(payload["document_id"])
+    doc = db.get(Document, document_id)
+    if not doc or doc.status != DocumentStatus.READY:
+        return {"skipped": "document not ready"}
+
+    scanner = RiskScannerService(api_key=api_key)
+    risks = await scanner.scan_document(db, document_id)
+
+    notify_user_id = payload.get("notify_user_id")
+    if risks and notify_user_id is not None:
+        notif_service = NotificationService()
+        for risk in risks:
+            # Alerts are committed; a failed notification must not rerun the scan
+            try:
+                await notif_service.notify_risk_detected(db, risk, notify_user_id)
+            except Exception as e:
+                logger.error("Error sending risk notification: %s", e)
+
+    logger.info("Risk scan completed document_id=%s risks=%d", document_id, len(risks))
+    return {"risks": len(risks)}
+
+
+async def _ingest(
+    db: Session, doc: Document, chunks: DocumentChunkService, matcher: KeywordMatcher
+) -> Tuple[str, Dict[str, List[Dict[str, int]]]]:
+    """
+    Stream a document's pages through chunking, indexing and keyword detection.
+
+    Each page is chunked, indexed and scanned as it arrives, so only a
+    window of pages and one batch of chunks is in memory. The text is
+    spooled to a temporary file meanwhile and read back once at the end:
+    the full text is held a single time, after the streaming pass, and
+    only for storing it on the document. Returns (extracted text,
+    keyword matches).
+    """
+    keywords: Dict[str, List[Dict[str, int]]] = {}
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=TEXT_BLOCK_CHARS, mode="w+", encoding="utf-8"
+    ) as spool:
+
+        async def pages() -> AsyncIterator[Page]:
+            async for page in iter_pages(doc.file_path):
+                if page.number is not None and page.number > 1:
+                    spool.write(PAGE_BREAK)
+                spool.write(page.text)
+                for category, matches in matcher.find(page.text, page.offset).items():
+                    keywords.setdefault(category, []).extend(matches)
+                yield page
+
+        await chunks.store_pages(db, doc, pages())
+        spool.seek(0)
+        text = await asyncio.to_thread(spool.read)
+    return text, keywords
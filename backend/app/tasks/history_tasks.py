@@ -0,0 +1,38 @@
+"""Background tasks for Loom value history maintenance."""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.value_history import ValueHistoryService
+
+
+logger = logging.getLogger(__name__)
+
+
+async def compact_value_history(
+    db_factory: Callable[[], Session],
+    retention_days: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Fold value history older than the retention window into checkpoints.
+
+    Designed to run periodically (cron or scheduler).
+    """
+    days = retention_days if retention_days is not None else settings.value_history_retention_days
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    db = db_factory()
+    try:
+        return await ValueHistoryService().compact(db, older_than=cutoff)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Value history compaction failed: %s", exc)
+        raise
+    finally:
+        db.close()
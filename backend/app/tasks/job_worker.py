@@ -0,0 +1,298 @@
+"""
+Worker pool for the persistent job queue.
+
+Runs inside the API process (started from the app lifespan) or on its
+own with `python -m app.tasks.job_worker`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import Job
+from app.services.job_queue import JobQueue
+from app.tasks.document_tasks import ingest_document, mark_document_failed, scan_document_risks
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobHandler:
+    """How to run one kind of job."""
+
+    run: Callable[[Session, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+    # Jobs of this kind running at once in this worker
+    concurrency: int = 1
+    # Called once the job has failed its last attempt
+    on_failure: Optional[Callable[[Session, Dict[str, Any]], None]] = None
+
+
+class _JobThread:
+    """
+    Runs one job's coroutine on a private event loop in a worker thread.
+
+    Handlers do blocking work between their awaits (bulk inserts,
+    embeddings, keyword scans), so running them on the worker's loop
+    would stall it, and the API with it when the worker runs in-process.
+    `cancel` may be called from any thread; the job sees CancelledError
+    at its next await.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._cancelled = False
+
+    def run(self, coro: Coroutine[Any, Any, None]) -> None:
+        asyncio.run(self._main(coro))
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            if self._task is not None:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+
+    async def _main(self, coro: Coroutine[Any, Any, None]) -> None:
+        with self._lock:
+            if self._cancelled:
+                coro.close()
+                return
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+        try:
+            await coro
+        except asyncio.CancelledError:
+            if not self._cancelled:
+                raise
+        finally:
+            with self._lock:
+                self._task = None
+
+
+class JobWorker:
+    """
+    Claims queued jobs and runs each on its own thread and event loop.
+
+    Each kind has its own concurrency limit, so a burst of slow
+    extractions cannot starve the risk scans (or the other way round).
+    The worker polls every `poll_interval` seconds and immediately when
+    `notify` is called or one of its jobs finishes. Several times per
+    lease it renews the leases of its running jobs and requeues those of
+    workers that died.
+    """
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        handlers: Dict[str, JobHandler],
+        queue: Optional[JobQueue] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.db_factory = db_factory
+        self.handlers = handlers
+        self.queue = queue or JobQueue()
+        self.poll_interval = poll_interval or settings.job_poll_interval_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._running: Dict[str, Dict[asyncio.Task, UUID]] = {kind: {} for kind in handlers}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        # Leases are renewed well before they can expire
+        self.lease_interval = self.queue.lease_seconds / 3
+        self._maintained_at = 0.0
+
+    async def start(self) -> None:
+        """Requeue jobs abandoned by dead workers, then start polling."""
+        if self._loop_task is not None:
+            return
+        self._maintain()
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._loop())
+        logger.info("Job worker started id=%s kinds=%s", self.worker_id, ",".join(self.handlers))
+
+    async def stop(self) -> None:
+        """Stop polling, cancel running jobs and hand them back to the queue."""
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        tasks: Set[asyncio.Task] = set()
+        job_ids = []
+        for running in self._running.values():
+            tasks.update(running)
+            job_ids.extend(running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._loop_task, *tasks, return_exceptions=True)
+        self._loop_task = None
+
+        db = self.db_factory()
+        try:
+            self.queue.release(db, job_ids)
+        finally:
+            db.close()
+        logger.info("Job worker stopped id=%s released=%d", self.worker_id, len(job_ids))
+
+    def notify(self) -> None:
+        """Look for new jobs now instead of at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run_forever(self) -> None:
+        await self.start()
+        try:
+            await self._loop_task
+        finally:
+            await self.stop()
+
+    async def _loop(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                if time.monotonic() - self._maintained_at >= self.lease_interval:
+                    self._maintain()
+                self._dispatch()
+            except Exception:
+                logger.exception("Job dispatch failed")
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), min(self.poll_interval, self.lease_interval)
+                )
+            except TimeoutError:
+                pass
+
+    def _maintain(self) -> None:
+        """Renew the leases of running jobs, requeue expired ones or fail them."""
+        self._maintained_at = time.monotonic()
+        job_ids = [job_id for running in self._running.values() for job_id in running.values()]
+        db = self.db_factory()
+        try:
+            self.queue.renew(db, job_ids, self.worker_id)
+            for job in self.queue.fail_expired(db):
+                logger.warning("Job failed id=%s kind=%s error=lease expired", job.id, job.kind)
+                handler = self.handlers.get(job.kind)
+                if handler is not None:
+                    self._on_failure(db, handler, job)
+            self.queue.recover(db)
+        finally:
+            db.close()
+
+    def _dispatch(self) -> None:
+        db = self.db_factory()
+        try:
+            for kind, handler in self.handlers.items():
+                running = self._running[kind]
+                for job in self.queue.claim(
+                    db, kind, handler.concurrency - len(running), self.worker_id
+                ):
+                    task = asyncio.create_task(self._run(handler, job.id, job.kind))
+                    running[task] = job.id
+                    task.add_done_callback(self._finished)
+        finally:
+            db.close()
+
+    def _finished(self, task: asyncio.Task) -> None:
+        for running in self._running.values():
+            running.pop(task, None)
+        # A slot is free and the next stage may be queued
+        self.notify()
+
+    async def _run(self, handler: JobHandler, job_id: UUID, kind: str) -> None:
+        thread = _JobThread()
+        done = asyncio.ensure_future(
+            asyncio.to_thread(thread.run, self._execute(handler, job_id, kind))
+        )
+        try:
+            await asyncio.shield(done)
+        except asyncio.CancelledError:
+            # Interrupt the job and let it roll back before its release
+            thread.cancel()
+            await asyncio.gather(done, return_exceptions=True)
+            raise
+
+    async def _execute(self, handler: JobHandler, job_id: UUID, kind: str) -> None:
+        """Run a job and settle it; runs on the job's own thread and loop."""
+        db = self.db_factory()
+        try:
+            job = db.get(Job, job_id)
+            try:
+                result = await handler.run(db, job.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                db.rollback()
+                job = db.get(Job, job_id)
+                retry = self.queue.fail(db, job, f"{type(e).__name__}: {e}")
+                logger.warning(
+                    "Job failed id=%s kind=%s attempt=%d/%d retry=%s error=%s",
+                    job_id,
+                    kind,
+                    job.attempts,
+                    job.max_attempts,
+                    retry,
+                    e,
+                )
+                if not retry:
+                    self._on_failure(db, handler, job)
+                return
+
+            follow_up = self.queue.complete(db, job, result)
+            logger.info(
+                "Job succeeded id=%s kind=%s attempt=%d next=%s",
+                job_id,
+                kind,
+                job.attempts,
+                follow_up.kind if follow_up is not None else None,
+            )
+        except asyncio.CancelledError:
+            db.rollback()
+            raise
+        except Exception:
+            db.rollback()
+            logger.exception("Job bookkeeping failed id=%s kind=%s", job_id, kind)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _on_failure(db: Session, handler: JobHandler, job: Job) -> None:
+        """Run the handler's hook for a job that has failed its last attempt."""
+        if handler.on_failure is None:
+            return
+        try:
+            handler.on_failure(db, job.payload)
+        except Exception:
+            db.rollback()
+            logger.exception("Job failure hook failed id=%s kind=%s", job.id, job.kind)
+
+
+job_worker = JobWorker(
+    SessionLocal,
+    {
+        "document.ingest": JobHandler(
+            ingest_document,
+            concurrency=settings.job_concurrency_ingest,
+            on_failure=mark_document_failed,
+        ),
+        "document.risk_scan": JobHandler(
+            scan_document_risks,
+            concurrency=settings.job_concurrency_risk_scan,
+        ),
+    },
+)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(job_worker.run_forever())
@@ -0,0 +1,78 @@
+"""
+PDF page extraction run inside worker processes.
+
+Kept free of application imports so that spawning a worker stays cheap
+and fits under the worker memory cap.
+"""
+
+from __future__ import annotations
+
+import signal
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import PyPDF2
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def init_pdf_worker(memory_mb: int) -> None:
+    """Cap the worker's address space; runs once in every worker process."""
+    if resource is not None and memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def pdf_page_count(path: str, seconds: float) -> int:
+    """
+    Number of pages of a PDF.
+
+    Parsing an uploaded file is as risky as extracting it, so this runs
+    on the pool too. Raises TimeoutError when `seconds` run out.
+    """
+    with _deadline(seconds), open(path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def extract_pdf_pages(path: str, start: int, end: int, seconds: float) -> List[str]:
+    """
+    Text of pages [start, end), one string per page.
+
+    Raises TimeoutError when `seconds` run out before the range is done.
+    """
+    with _deadline(seconds):
+        texts: List[str] = []
+        with open(path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            for number in range(start, end):
+                try:
+                    texts.append(reader.pages[number].extract_text() or "")
+                except (TimeoutError, MemoryError):
+                    raise
+                except Exception:
+                    # Keep page numbering aligned
+                    texts.append("")
+        return texts
+
+
+@contextmanager
+def _deadline(seconds: float) -> Iterator[None]:
+    if seconds <= 0:
+        raise TimeoutError("PDF extraction deadline passed")
+    alarm = hasattr(signal, "SIGALRM")
+    if alarm:
+        # A page that never finishes must not hold the worker forever
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise TimeoutError("PDF extraction deadline passed")
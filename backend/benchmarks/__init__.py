@@ -0,0 +1,16 @@
+"""
+Performance benchmarks for the Loom engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                      # 100, 1k and 10k variables
+    python -m benchmarks.run --sizes 100,1000,10000,100000
+    python -m benchmarks.run --save-baseline      # store the current run as baseline
+
+Results are written as JSON; the run exits with status 1 if any timing
+regresses past the stored baseline by more than the tolerance. The
+committed baseline.json was recorded with the default sizes; re-save it
+on the machine that runs the comparison, as timings are not portable.
+
+    python -m benchmarks.keyword_matcher          # risk keyword matching
+"""
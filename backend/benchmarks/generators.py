@@ -0,0 +1,129 @@
+"""Synthetic Loom model generators for benchmarks."""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Callable, Dict, List
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.variable import ValueType, Variable, VariableCategory
+
+# Variable definitions in template form plus "deps": [keys]
+VarDef = Dict[str, Any]
+
+INSERT_BATCH_SIZE = 5000
+
+
+def _input(key: str, value: float, order: int) -> VarDef:
+    return {
+        "key": key,
+        "value_type": "number",
+        "category": "input",
+        "raw_value": str(value),
+        "formula": None,
+        "deps": [],
+        "display_order": order,
+    }
+
+
+def _formula(key: str, formula: str, deps: List[str], order: int) -> VarDef:
+    return {
+        "key": key,
+        "value_type": "formula",
+        "category": "calculation",
+        "raw_value": "",
+        "formula": formula,
+        "deps": deps,
+        "display_order": order,
+    }
+
+
+def chain(size: int) -> List[VarDef]:
+    """x0 -> x1 -> ... -> x{n-1}: the longest possible cascade."""
+    defs = [_input("x0", 1, 0)]
+    for i in range(1, size):
+        prev = f"x{i - 1}"
+        defs.append(_formula(f"x{i}", f"{{{{{prev}}}}} + 1", [prev], i))
+    return defs
+
+
+def fan_out(size: int) -> List[VarDef]:
+    """One input feeding every other variable directly."""
+    defs = [_input("root", 2, 0)]
+    for i in range(1, size):
+        defs.append(_formula(f"f{i}", f"{{{{root}}}} * {i % 97 + 1}", ["root"], i))
+    return defs
+
+
+def diamond(size: int) -> List[VarDef]:
+    """Stacked diamonds a -> (b, c) -> d, each d being the next a."""
+    defs = [_input("d0", 1, 0)]
+    top = "d0"
+    layer = 0
+    while len(defs) + 3 <= size:
+        layer += 1
+        left, right, bottom = f"l{layer}", f"r{layer}", f"d{layer}"
+        defs.append(_formula(left, f"{{{{{top}}}}} * 2", [top], len(defs)))
+        defs.append(_formula(right, f"{{{{{top}}}}} + 1", [top], len(defs)))
+        defs.append(
+            _formula(
+                bottom, f"({{{{{left}}}}} + {{{{{right}}}}}) / 3", [left, right], len(defs)
+            )
+        )
+        top = bottom
+    while len(defs) < size:
+        defs.append(_input(f"pad{len(defs)}", 0, len(defs)))
+    return defs
+
+
+def random_dag(size: int, seed: int = 42, max_deps: int = 3, input_ratio: float = 0.1) -> List[VarDef]:
+    """Random DAG: each formula averages 1..max_deps earlier variables."""
+    rng = random.Random(seed)
+    inputs = max(1, int(size * input_ratio))
+    defs = [_input(f"i{i}", rng.randint(1, 100), i) for i in range(inputs)]
+    for i in range(inputs, size):
+        deps = sorted({defs[rng.randrange(i)]["key"] for _ in range(rng.randint(1, max_deps))})
+        refs = " + ".join(f"{{{{{dep}}}}}" for dep in deps)
+        defs.append(_formula(f"n{i}", f"({refs}) / {len(deps)} + 1", deps, i))
+    return defs
+
+
+GENERATORS: Dict[str, Callable[[int], List[VarDef]]] = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamond": diamond,
+    "random_dag": random_dag,
+}
+
+
+def insert_model(db: Session, project_id: UUID, defs: List[VarDef]) -> Dict[str, UUID]:
+    """Bulk insert generated variables into a project. Returns {key: id}."""
+    ids = {var_def["key"]: uuid4() for var_def in defs}
+    rows = [
+        {
+            "id": ids[var_def["key"]],
+            "project_id": project_id,
+            "key": var_def["key"],
+            "label": var_def["key"],
+            "value_type": ValueType(var_def["value_type"]),
+            "category": VariableCategory(var_def["category"]),
+            "raw_value": var_def["raw_value"],
+            "calculated_value": var_def["raw_value"] if var_def["formula"] is None else None,
+            "formula": var_def["formula"],
+            "depends_on": [ids[dep] for dep in var_def["deps"]] or None,
+            "display_order": var_def["display_order"],
+            "description": None,
+            "unit": None,
+        }
+        for var_def in defs
+    ]
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(
+            insert(Variable).execution_options(render_nulls=True),
+            rows[start : start + INSERT_BATCH_SIZE],
+        )
+    db.commit()
+    return ids
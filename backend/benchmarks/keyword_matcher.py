@@ -0,0 +1,88 @@
+"""
+Risk keyword matching benchmark.
+
+Compares KeywordMatcher (a trie-shaped regex to find candidate starts,
+then a trie walk from each) with a flat regex alternation of the same
+keywords, on synthetic text with the built-in taxonomy and with larger
+tenant taxonomies. Run from the backend directory:
+
+    python -m benchmarks.keyword_matcher
+    python -m benchmarks.keyword_matcher --megabytes 4 --keywords 31,300,3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from typing import Callable, List
+
+
+def _parse_args(argv: List[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark risk keyword matching")
+    parser.add_argument("--megabytes", type=float, default=1.0, help="size of the scanned text")
+    parser.add_argument(
+        "--keywords", default="31,300,3000", help="comma-separated taxonomy sizes"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best is kept)")
+    return parser.parse_args(argv)
+
+
+def _best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    from app.services.keyword_matcher import Keyword, KeywordMatcher
+    from app.services.risk_scanner import default_risk_keywords
+
+    rng = random.Random(42)
+    vocabulary = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10)))
+        for _ in range(20_000)
+    ]
+    builtin = default_risk_keywords()
+
+    # Prose-like text with a built-in keyword every ~500 words
+    words: List[str] = []
+    size = 0
+    while size < args.megabytes * (1 << 20):
+        word = rng.choice(builtin).text if rng.random() < 0.002 else rng.choice(vocabulary)
+        words.append(word)
+        size += len(word) + 1
+    text = " ".join(words)
+
+    print(f"{'keywords':>8} {'trie+walk':>12} {'flat regex':>12} {'matches':>9}")
+    for count in (int(value) for value in args.keywords.split(",")):
+        extra = rng.sample(vocabulary, max(0, count - len(builtin)))
+        matcher = KeywordMatcher(builtin + [Keyword("operational", word) for word in extra])
+        flat = re.compile(
+            "(?=(?:"
+            + "|".join(
+                re.escape(kw.text.lower())
+                for kw in sorted(matcher.keywords, key=lambda kw: -len(kw.text))
+            )
+            + "))"
+        )
+
+        trie_walk_s = _best_of(args.repeat, lambda matcher=matcher: matcher.find(text))
+        flat_s = _best_of(
+            args.repeat, lambda flat=flat: sum(1 for _ in flat.finditer(text.lower()))
+        )
+        found = sum(len(found) for found in matcher.find(text).values())
+        print(f"{len(matcher.keywords):>8} {trie_walk_s:>11.3f}s {flat_s:>11.3f}s {found:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
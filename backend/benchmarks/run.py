@@ -0,0 +1,224 @@
+"""Loom engine benchmark runner (see benchmarks/__init__.py for usage)."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_SIZES = "100,1000,10000"
+
+# Timings below this are dominated by noise and never count as regressions
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def _parse_args(argv: List[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Loom engine on SQLite")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated variable counts")
+    parser.add_argument(
+        "--shapes",
+        default="chain,fan_out,diamond,random_dag",
+        help="comma-separated model shapes",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best is kept)")
+    parser.add_argument("--output", default="benchmark_results.json", help="results JSON path")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown vs baseline (0.25 = 25%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def _best_of(repeat: int, func: Callable[[], Any], setup: Callable[[], Any] | None = None) -> float:
+    """Best wall time of `repeat` runs; `setup` runs untimed before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _bench_model(shape: str, size: int, repeat: int, session_factory) -> List[Dict[str, Any]]:
+    from sqlalchemy import update
+
+    from app.models.project import Project
+    from app.models.variable import Variable
+    from app.services.dependency_resolver import DependencyResolver
+    from app.services.formula_parser import FormulaParser, _compile_formula
+    from app.services.loom_engine import LoomEngine
+    from app.services.model_evaluator import ModelEvaluator
+    from benchmarks.generators import GENERATORS, insert_model
+
+    defs = GENERATORS[shape](size)
+    formulas = [d["formula"] for d in defs if d["formula"]]
+    db = session_factory()
+    try:
+        project = Project(tenant_id=1, client_id=1, name=f"bench {shape} {size}")
+        db.add(project)
+        db.commit()
+        project_id = project.id
+
+        started = time.perf_counter()
+        ids = insert_model(db, project_id, defs)
+        insert_s = time.perf_counter() - started
+        root_id = ids[defs[0]["key"]]
+
+        parser = FormulaParser()
+
+        def parse_all() -> None:
+            for formula in formulas:
+                parser.parse_formula(formula)
+
+        def compile_all() -> None:
+            for formula in formulas:
+                parser.compile_formula(formula)
+
+        def build_graph() -> None:
+            resolver = DependencyResolver(db)
+            resolver.topological_sort(resolver.build_dependency_graph(project_id))
+
+        variables = db.query(Variable).filter(Variable.project_id == project_id).all()
+        evaluator = ModelEvaluator.from_variables(variables)
+        order = evaluator.calculation_order()
+
+        def reset_values() -> None:
+            db.execute(
+                update(Variable)
+                .where(Variable.project_id == project_id, Variable.formula.is_not(None))
+                .values(calculated_value=None)
+            )
+            db.commit()
+            db.expire_all()
+
+        def calculate_all() -> None:
+            asyncio.run(LoomEngine(db).calculate_all(project_id))
+
+        edits = iter(range(2, 2 + repeat))
+
+        def edit_root() -> None:
+            asyncio.run(LoomEngine(db).update_variable(root_id, next(edits)))
+
+        timings = {
+            "insert": insert_s,
+            "parse": _best_of(repeat, parse_all),
+            "compile_cold": _best_of(repeat, compile_all, _compile_formula.cache_clear),
+            "evaluate_in_memory": _best_of(repeat, lambda: evaluator.evaluate(order)),
+            "graph_build": _best_of(repeat, build_graph),
+            "calculate_all": _best_of(repeat, calculate_all, reset_values),
+            "edit_cascade": _best_of(repeat, edit_root, db.expire_all),
+        }
+    finally:
+        db.close()
+
+    per_item = {"parse": len(formulas), "compile_cold": len(formulas), "evaluate_in_memory": len(formulas)}
+    return [
+        {
+            "shape": shape,
+            "size": size,
+            "metric": metric,
+            "seconds": round(seconds, 6),
+            "ops_per_sec": round(per_item[metric] / seconds, 1)
+            if metric in per_item and seconds > 0
+            else None,
+        }
+        for metric, seconds in timings.items()
+    ]
+
+
+def _compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a message per metric slower than baseline * (1 + tolerance)."""
+    previous = {
+        (r["shape"], r["size"], r["metric"]): r["seconds"] for r in baseline.get("results", [])
+    }
+    regressions = []
+    for result in results:
+        key = (result["shape"], result["size"], result["metric"])
+        if key not in previous or result["metric"] == "insert":
+            continue
+        before, now = previous[key], result["seconds"]
+        if now > before * (1 + tolerance) and now - before > NOISE_FLOOR_SECONDS:
+            regressions.append(
+                f"{result['shape']}/{result['size']}/{result['metric']}: "
+                f"{before:.4f}s -> {now:.4f}s (+{(now / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = _parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    shapes = [shape.strip() for shape in args.shapes.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="loom-bench-")
+    # Must be set before the app settings are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    logging.basicConfig(level=logging.WARNING)
+
+    import app.main  # noqa: F401  (registers every model on Base.metadata)
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+
+    results: List[Dict[str, Any]] = []
+    for shape in shapes:
+        for size in sizes:
+            print(f"Benchmarking {shape} with {size} variables...")
+            rows = _bench_model(shape, size, args.repeat, SessionLocal)
+            for row in rows:
+                print(f"  {row['metric']:<20} {row['seconds']:.4f}s")
+            results.extend(rows)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print("No baseline found, skipping regression check (use --save-baseline)")
+        return 0
+
+    regressions = _compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    if regressions:
+        print("Performance regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import sys
+from uuid import UUID
+
+from app.db.session import SessionLocal
+from app.services.document_chunks import DocumentChunkService
+
+
+def main():
+    project_id = UUID(sys.argv[1]) if len(sys.argv) > 1 else None
+    print("Chunking documents processed before chunks were stored...")
+    db = SessionLocal()
+    try:
+        count = DocumentChunkService().backfill(db, project_id)
+    finally:
+        db.close()
+    print(f"Documents chunked: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import asyncio
+import sys
+
+from app.db.session import SessionLocal
+from app.tasks.history_tasks import compact_value_history
+
+
+def main():
+    retention_days = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print("Compacting Loom value history...")
+    result = asyncio.run(compact_value_history(SessionLocal, retention_days))
+    print(f"Projects compacted: {result['projects_compacted']}")
+    print(f"History rows removed: {result['rows_removed']}")
+
+
+if __name__ == "__main__":
+    main()
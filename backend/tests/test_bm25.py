@@ -0,0 +1,33 @@
+"""
+Tests for BM25 chunk scoring.
+"""
+
+from app.ml.bm25 import BM25Scorer, Posting, term_frequencies, tokenize
+
+
+def test_tokenize_drops_stop_words_and_keeps_cyrillic():
+    """Test that index terms are lower-cased words without stop words."""
+    assert tokenize("The Supplier's risk и Договор, a 5") == ["supplier", "risk", "договор"]
+
+
+def test_rare_terms_outweigh_common_ones():
+    """Test that a chunk matching a rare query term ranks first."""
+    chunks = {
+        "a": term_frequencies("payment terms and payment schedule"),
+        "b": term_frequencies("termination clause with payment"),
+        "c": term_frequencies("payment history"),
+    }
+    query = term_frequencies("termination payment")
+    postings = [
+        Posting(chunk_id, term, tf, sum(terms.values()))
+        for chunk_id, terms in chunks.items()
+        for term, tf in terms.items()
+        if term in query
+    ]
+    df = {"payment": 3, "termination": 1}
+    scorer = BM25Scorer()
+
+    scores = scorer.score(postings, n_chunks=3, avg_length=3.0, df=df, query_terms=query)
+
+    assert [chunk_id for chunk_id, _ in scorer.top(scores, 2)][0] == "b"
+    assert all(score > 0 for score in scores.values())
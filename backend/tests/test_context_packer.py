@@ -0,0 +1,46 @@
+"""
+Tests for token-budgeted context packing.
+"""
+
+from app.ml.context_packer import ScoredChunk, pack_context
+
+
+def _chunk(chunk_id, document_id, start, end, score, tokens, text=None):
+    return ScoredChunk(
+        chunk_id=chunk_id,
+        document_id=document_id,
+        text=text or f"text of {chunk_id}",
+        start_offset=start,
+        end_offset=end,
+        score=score,
+        token_count=tokens,
+    )
+
+
+def test_pack_context_skips_chunks_that_do_not_fit_and_tries_smaller_ones():
+    """Test that a large chunk over budget does not stop packing."""
+    chunks = [
+        _chunk("big", "d1", 0, 4000, score=0.9, tokens=1000),
+        _chunk("small", "d1", 4000, 4400, score=0.5, tokens=100),
+        _chunk("tiny", "d2", 0, 200, score=0.2, tokens=50),
+    ]
+
+    packed = pack_context(chunks, budget_tokens=200)
+
+    assert [chunk.chunk_id for chunk in packed.chunks] == ["small", "tiny"]
+    assert packed.tokens <= 200
+
+
+def test_pack_context_drops_overlaps_and_duplicates_and_keeps_offsets():
+    """Test that overlapping ranges and repeated text are packed once, in source order."""
+    chunks = [
+        _chunk("b", "d1", 1000, 2000, score=0.8, tokens=250),
+        _chunk("a", "d1", 0, 1000, score=0.7, tokens=250),
+        _chunk("overlap", "d1", 1500, 2500, score=0.6, tokens=250),
+        _chunk("copy", "d2", 0, 1000, score=0.5, tokens=250, text="text of a"),
+    ]
+
+    packed = pack_context(chunks, budget_tokens=10_000)
+
+    assert [chunk.chunk_id for chunk in packed.chunks] == ["a", "b"]
+    assert [(s["start_offset"], s["end_offset"]) for s in packed.sources] == [(0, 1000), (1000, 2000)]
@@ -0,0 +1,37 @@
+"""
+Tests for dependency ordering of Loom variables.
+"""
+
+import pytest
+
+from app.services.dependency_resolver import DependencyResolver
+
+
+def test_topological_sort_puts_dependencies_first():
+    """Test that every variable comes after the variables it depends on."""
+    graph = {
+        "profit": {"revenue", "costs"},
+        "costs": {"revenue", "cost_pct"},
+        "revenue": set(),
+        "cost_pct": set(),
+    }
+    order = DependencyResolver.topological_sort(graph)
+    position = {node: i for i, node in enumerate(order)}
+    assert len(order) == 4
+    for node, deps in graph.items():
+        for dep in deps:
+            assert position[dep] < position[node]
+
+
+def test_topological_sort_detects_cycles():
+    """Test that circular references are rejected."""
+    graph = {"a": {"b"}, "b": {"c"}, "c": {"a"}}
+    with pytest.raises(ValueError):
+        DependencyResolver.topological_sort(graph)
+
+
+def test_get_affected_variables_is_transitive():
+    """Test that downstream variables are found through intermediate ones."""
+    graph = {"a": set(), "b": {"a"}, "c": {"b"}, "d": set()}
+    resolver = DependencyResolver(db=None)
+    assert resolver.get_affected_variables("a", graph) == {"b", "c"}
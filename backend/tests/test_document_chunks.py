@@ -0,0 +1,49 @@
+"""
+Tests for stored document chunks.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.models.document import Document, DocumentStatus
+from app.models.document_chunk import DocumentChunk
+from app.models.project import Project
+from app.services.document_chunks import DocumentChunkService
+
+
+def test_backfill_chunks_legacy_documents_once_and_for_project_orders_them(db_session, tmp_path):
+    """Test that unchunked documents are chunked once and listed newest first."""
+    project = Project(tenant_id=1, client_id=1, name="plant")
+    db_session.add(project)
+    db_session.flush()
+    now = datetime.now(timezone.utc)
+    older, newer, empty = (
+        Document(
+            project_id=project.id,
+            file_name=f"{name}.txt",
+            file_path=f"/tmp/{name}.txt",
+            file_type="text/plain",
+            status=DocumentStatus.READY,
+            extracted_text=text,
+            created_at=now - timedelta(days=age),
+        )
+        for name, text, age in (
+            ("older", "first " * 50, 2),
+            ("newer", "second " * 50, 1),
+            ("empty", None, 0),
+        )
+    )
+    db_session.add_all([older, newer, empty])
+    db_session.commit()
+    service = DocumentChunkService(chunk_size=100, index_dir=tmp_path)
+
+    assert service.backfill(db_session) == 2
+    assert service.backfill(db_session) == 0
+
+    chunks = service.for_project(db_session, project.id)
+    document_ids = [chunk.document_id for chunk in chunks]
+    assert document_ids == sorted(document_ids, key=[newer.id, older.id].index)
+    assert [chunk.ordinal for chunk in chunks if chunk.document_id == older.id] == list(
+        range(document_ids.count(older.id))
+    )
+    assert len(service.for_project(db_session, project.id, limit=2)) == 2
+    assert db_session.query(DocumentChunk).count() == len(chunks)
@@ -0,0 +1,56 @@
+"""
+Tests for document text chunking.
+"""
+
+import asyncio
+
+from app.ml.context_packer import estimate_tokens
+from app.services.document_processor import PAGE_BREAK, iter_chunks, split_chunks, text_pages
+
+
+def test_split_chunks_keeps_offsets_and_pages():
+    """Test that chunks map back into the text and never span a page break."""
+    text = "alpha beta " * 300 + PAGE_BREAK + "second page\n\nclosing words " * 40
+
+    chunks = split_chunks(text, chunk_size=500)
+
+    assert [chunk.ordinal for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert text[chunk.start_offset : chunk.end_offset] == chunk.text
+        assert PAGE_BREAK not in chunk.text
+        assert chunk.char_count <= 500
+    assert chunks[0].page_number == 1
+    assert chunks[-1].page_number == 2
+
+
+def test_split_chunks_without_pages():
+    """Test that plain text chunks carry no page number."""
+    chunks = split_chunks("short text", chunk_size=500)
+
+    assert len(chunks) == 1
+    assert chunks[0].page_number is None
+    assert chunks[0].token_count == estimate_tokens("short text") == 3
+    assert split_chunks("") == []
+
+
+def test_iter_chunks_matches_split_chunks_across_blocks():
+    """Test that streamed blocks chunk exactly like the joined text."""
+    text = "".join(f"line {i} with some words\n" for i in range(400))
+    blocks = [text[i : i + 700] for i in range(0, len(text), 700)]
+
+    async def pages():
+        offset = 0
+        for block in blocks:
+            for page in text_pages(block):
+                page.offset += offset
+                yield page
+            offset += len(block)
+
+    async def collect():
+        return [chunk async for chunk in iter_chunks(pages(), chunk_size=500)]
+
+    streamed = asyncio.run(collect())
+
+    assert [(c.ordinal, c.start_offset, c.end_offset) for c in streamed] == [
+        (c.ordinal, c.start_offset, c.end_offset) for c in split_chunks(text, chunk_size=500)
+    ]
@@ -0,0 +1,91 @@
+"""
+Tests for content-addressed document storage.
+"""
+
+import asyncio
+import io
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.project import Project
+from app.services.document_storage import DocumentStorage, document_sha256
+
+
+def test_document_sha256_reads_blob_hash_from_metadata():
+    """Test that documents point at their blob through the metadata hash."""
+    assert document_sha256(Document(meta_data={"sha256": "ab" * 32, "size": 3})) == "ab" * 32
+    assert document_sha256(Document(meta_data=None)) is None
+
+
+def test_release_deletes_own_file_of_documents_without_blob(tmp_path):
+    """Test that uploads from before deduplication still delete their own file."""
+    path = tmp_path / "legacy.pdf"
+    path.write_bytes(b"%PDF")
+    storage = DocumentStorage(root=tmp_path)
+
+    released = storage.release(None, Document(file_path=str(path)))
+    assert path.exists()
+    storage.delete_files(released)
+
+    assert not path.exists()
+
+
+def _upload(db, storage, tenant_id, data=b"%PDF shared"):
+    project = Project(tenant_id=tenant_id, client_id=1, name="plant")
+    db.add(project)
+    db.flush()
+    blob, deduplicated = asyncio.run(
+        storage.store(
+            db,
+            UploadFile(io.BytesIO(data), filename="report.pdf"),
+            "report.pdf",
+            tenant_id=tenant_id,
+            max_bytes=1024,
+            chunk_size=256,
+        )
+    )
+    document = Document(
+        project_id=project.id,
+        file_name="report.pdf",
+        file_path=blob.storage_path,
+        file_type="application/pdf",
+        meta_data={"sha256": blob.sha256},
+    )
+    db.add(document)
+    db.commit()
+    return document, deduplicated
+
+
+def test_store_reports_duplicates_only_within_the_tenant(db_session, tmp_path):
+    """Test that content uploaded by another tenant is not reported as a duplicate."""
+    storage = DocumentStorage(root=tmp_path)
+
+    first, first_dedup = _upload(db_session, storage, tenant_id=1)
+    other, other_dedup = _upload(db_session, storage, tenant_id=2)
+    again, again_dedup = _upload(db_session, storage, tenant_id=1)
+
+    assert (first_dedup, other_dedup, again_dedup) == (False, False, True)
+    assert db_session.get(DocumentBlob, document_sha256(first)).ref_count == 3
+
+    # Once the tenant's documents are gone it no longer holds the content
+    for document in (first, again):
+        storage.release(db_session, document)
+    db_session.commit()
+    assert _upload(db_session, storage, tenant_id=1)[1] is False
+
+
+def test_release_keeps_the_file_until_committed(db_session, tmp_path):
+    """Test that a rolled back release leaves the blob's file in place."""
+    storage = DocumentStorage(root=tmp_path)
+    document, _ = _upload(db_session, storage, tenant_id=1)
+    path = Path(document.file_path)
+
+    released = storage.release(db_session, document)
+    db_session.rollback()
+
+    assert released == [path]
+    assert path.exists()
+    assert db_session.get(DocumentBlob, document_sha256(document)).ref_count == 1
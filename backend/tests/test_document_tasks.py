@@ -0,0 +1,69 @@
+"""
+Tests for the document ingestion job.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.models.document import Document, DocumentStatus
+from app.models.document_chunk import DocumentChunk
+from app.models.project import Project
+from app.services.document_chunks import DocumentChunkService
+from app.services.document_processor import TEXT_BLOCK_CHARS
+from app.tasks.document_tasks import ingest_document
+
+
+def test_ingest_document_stores_text_spanning_several_blocks(db_session, tmp_path, monkeypatch):
+    """Test that text read in several blocks is stored whole with its keyword matches."""
+    monkeypatch.setattr(settings, "vector_index_dir", str(tmp_path / "indexes"))
+    line = "quarterly report, nothing unusual here\n"
+    text = line * (TEXT_BLOCK_CHARS // len(line)) + "the supplier announced a delay\n"
+    path = tmp_path / "report.txt"
+    path.write_text(text, encoding="utf-8")
+    project = Project(tenant_id=1, client_id=1, name="plant")
+    db_session.add(project)
+    db_session.flush()
+    document = Document(
+        project_id=project.id,
+        file_name="report.txt",
+        file_path=str(path),
+        file_type="text/plain",
+    )
+    db_session.add(document)
+    db_session.commit()
+
+    result = asyncio.run(ingest_document(db_session, {"document_id": str(document.id)}))
+
+    assert result == {"status": "ready", "characters": len(text)}
+    assert document.status == DocumentStatus.READY
+    assert document.extracted_text == text
+    assert document.meta_data["risk_keywords"]["operational"] == [
+        {"keyword": "delay", "position": text.index("delay")}
+    ]
+
+
+def test_reingestion_compacts_replaced_vectors(db_session, tmp_path, monkeypatch):
+    """Test that vectors of replaced chunks are dropped once they outnumber live ones."""
+    monkeypatch.setattr(settings, "vector_index_dir", str(tmp_path / "indexes"))
+    path = tmp_path / "report.txt"
+    path.write_text("the supplier announced a delay\n", encoding="utf-8")
+    project = Project(tenant_id=1, client_id=1, name="plant")
+    db_session.add(project)
+    db_session.flush()
+    document = Document(
+        project_id=project.id,
+        file_name="report.txt",
+        file_path=str(path),
+        file_type="text/plain",
+    )
+    db_session.add(document)
+    db_session.commit()
+    vectors = DocumentChunkService().vectors(project.id)
+
+    for _ in range(3):
+        asyncio.run(ingest_document(db_session, {"document_id": str(document.id)}))
+
+    # Two ingestions leave one stale vector; the third compacts the file
+    assert len(vectors) == 1
+    chunk = db_session.query(DocumentChunk).filter(DocumentChunk.project_id == project.id).one()
+    assert vectors.search(DocumentChunkService().embedder.embed(["delay"]), 1)[0][0][0] == chunk.id
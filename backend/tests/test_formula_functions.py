@@ -0,0 +1,40 @@
+"""
+Tests for aggregate and financial formula functions.
+"""
+
+import pytest
+
+from app.services import formula_functions as ff
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+
+
+def test_financial_functions_match_reference_values():
+    """Test that NPV, IRR and PMT agree with spreadsheet results."""
+    assert ff.npv(0.1, [-100, 60, 60]) == pytest.approx(4.1322314)
+    assert ff.irr(-100, 60, 60) == pytest.approx(0.1306624)
+    assert ff.pmt(0.05 / 12, 360, 200000) == pytest.approx(-1073.6432460)
+    assert ff.pmt(0, 10, 1000) == pytest.approx(-100)
+
+
+def test_irr_requires_sign_change():
+    """Test that IRR of all-positive cash flows is rejected."""
+    with pytest.raises(ValueError):
+        ff.irr(100, 50, 25)
+
+
+def test_group_reference_aggregates_members_once():
+    """Test that a tag aggregate uses one group node and skips its own referrer."""
+    nodes = [
+        ModelNode(id=f"c{i}", key=f"c{i}", value=str(i + 1), tags=("opex",), display_order=i)
+        for i in range(4)
+    ]
+    nodes.append(ModelNode(id="total", key="total", formula="sum({{tag:opex}})", tags=("opex",)))
+    nodes.append(ModelNode(id="mean", key="mean", formula="avg({{tag:opex}})"))
+    evaluator = ModelEvaluator(nodes)
+
+    results = evaluator.evaluate()
+    assert results["total"] == 10
+    assert results["mean"] == 2.5
+    group = next(node for node in evaluator.graph if not isinstance(node, str))
+    assert evaluator.graph["total"] == {group}
+    assert len(evaluator.graph[group]) == 4
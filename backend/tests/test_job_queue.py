@@ -0,0 +1,221 @@
+"""
+Tests for the persistent job queue.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.services.job_queue import JobQueue, retry_delay
+from app.tasks.job_worker import JobHandler, JobWorker
+from tests.conftest import TestingSessionLocal
+
+
+def test_retry_delay_grows_and_is_capped():
+    """Test that retries back off exponentially, with jitter, up to the cap."""
+    for attempts, low, high in ((1, 2.5, 5), (2, 5, 10), (3, 10, 20), (10, 30, 60)):
+        for _ in range(50):
+            assert low <= retry_delay(attempts, base=5, cap=60) <= high
+
+
+def test_claim_runs_each_job_once_in_order(db_session):
+    """Test that due jobs are claimed oldest first and never by two workers."""
+    queue = JobQueue(max_attempts=3)
+    first = queue.enqueue(db_session, "document.ingest", {"n": 1})
+    second = queue.enqueue(db_session, "document.ingest", {"n": 2})
+    later = queue.enqueue(db_session, "document.ingest", {"n": 3})
+    later.run_after = datetime.now(timezone.utc) + timedelta(hours=1)
+    queue.enqueue(db_session, "document.risk_scan", {"n": 4})
+    db_session.commit()
+
+    claimed = queue.claim(db_session, "document.ingest", 5, "worker-a")
+
+    assert [job.id for job in claimed] == [first.id, second.id]
+    assert all(job.status == "running" and job.locked_by == "worker-a" for job in claimed)
+    assert all(job.attempts == 1 for job in claimed)
+    assert queue.claim(db_session, "document.ingest", 5, "worker-b") == []
+
+
+def test_complete_queues_the_next_pipeline_stage(db_session):
+    """Test that a finished stage enqueues the next one with the same payload."""
+    queue = JobQueue()
+    document_id = uuid4()
+    queue.enqueue_pipeline(
+        db_session,
+        ["document.ingest", "document.risk_scan"],
+        {"document_id": str(document_id)},
+        document_id=document_id,
+    )
+    db_session.commit()
+    (job,) = queue.claim(db_session, "document.ingest", 1, "worker-a")
+
+    follow_up = queue.complete(db_session, job, {"chunks": 3})
+
+    assert (job.status, job.result, job.locked_by) == ("succeeded", {"chunks": 3}, None)
+    assert follow_up.kind == "document.risk_scan"
+    assert follow_up.payload == {"document_id": str(document_id)}
+    assert follow_up.pipeline is None
+    assert [j.kind for j in queue.for_document(db_session, document_id)] == [
+        "document.ingest",
+        "document.risk_scan",
+    ]
+
+
+def test_fail_retries_until_attempts_are_used(db_session):
+    """Test that failed attempts back off and the last one marks the job failed."""
+    queue = JobQueue(max_attempts=2, retry_base_seconds=60, retry_max_seconds=60)
+    job = queue.enqueue(db_session, "document.ingest", {})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, "worker-a")
+
+    assert queue.fail(db_session, job, "boom") is True
+    assert (job.status, job.last_error, job.locked_by) == ("queued", "boom", None)
+    # Not due until the backoff has passed
+    assert queue.claim(db_session, "document.ingest", 1, "worker-a") == []
+
+    job.run_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, "worker-a")
+
+    assert queue.fail(db_session, job, "boom again") is False
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.finished_at is not None
+
+
+def test_release_requeues_without_counting_the_attempt(db_session):
+    """Test that jobs interrupted by a shutdown keep their attempt count."""
+    queue = JobQueue()
+    job = queue.enqueue(db_session, "document.ingest", {})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, "worker-a")
+
+    queue.release(db_session, [job.id])
+    db_session.refresh(job)
+
+    assert (job.status, job.attempts, job.locked_by) == ("queued", 0, None)
+
+
+def test_recover_requeues_only_expired_leases(db_session):
+    """Test that renewed leases survive recovery and expired ones are requeued."""
+    queue = JobQueue(lease_seconds=60)
+    alive = queue.enqueue(db_session, "document.ingest", {})
+    dead = queue.enqueue(db_session, "document.ingest", {})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 2, "worker-a")
+    stale = datetime.now(timezone.utc) - timedelta(seconds=120)
+    alive.locked_at = dead.locked_at = stale
+    db_session.commit()
+
+    assert queue.renew(db_session, [alive.id], "worker-b") == 0
+    assert queue.renew(db_session, [alive.id], "worker-a") == 1
+    assert queue.recover(db_session) == 1
+    db_session.refresh(alive)
+    db_session.refresh(dead)
+
+    assert (alive.status, alive.locked_by) == ("running", "worker-a")
+    assert (dead.status, dead.locked_by) == ("queued", None)
+
+
+def test_recover_fails_expired_jobs_without_attempts_left(db_session):
+    """Test that a job whose worker died on its last attempt is not requeued."""
+    queue = JobQueue(max_attempts=1, lease_seconds=60)
+    job = queue.enqueue(db_session, "document.ingest", {})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, "worker-a")
+    job.locked_at = datetime.now(timezone.utc) - timedelta(seconds=120)
+    db_session.commit()
+
+    assert queue.recover(db_session) == 0
+    db_session.refresh(job)
+
+    assert (job.status, job.locked_by) == ("failed", None)
+    assert job.last_error.startswith("Lease expired")
+    assert job.finished_at is not None
+
+
+def test_worker_keeps_leases_of_running_jobs(db_session):
+    """Test that a worker renews its own leases and requeues expired ones."""
+    queue = JobQueue(lease_seconds=60)
+    worker = JobWorker(TestingSessionLocal, {"document.ingest": JobHandler(run=None)}, queue=queue)
+    mine = queue.enqueue(db_session, "document.ingest", {})
+    orphan = queue.enqueue(db_session, "document.ingest", {})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, worker.worker_id)
+    queue.claim(db_session, "document.ingest", 1, "dead-worker")
+    mine.locked_at = orphan.locked_at = datetime.now(timezone.utc) - timedelta(seconds=120)
+    db_session.commit()
+    worker._running["document.ingest"][object()] = mine.id
+
+    worker._maintain()
+    db_session.refresh(mine)
+    db_session.refresh(orphan)
+
+    assert (mine.status, mine.locked_by) == ("running", worker.worker_id)
+    assert (orphan.status, orphan.locked_by) == ("queued", None)
+
+
+def test_worker_runs_failure_hook_of_jobs_failed_by_lease_expiry(db_session):
+    """Test that a job that killed its worker on its last attempt runs its hook."""
+    queue = JobQueue(max_attempts=1, lease_seconds=60)
+    failed = []
+    handler = JobHandler(run=None, on_failure=lambda db, payload: failed.append(payload))
+    worker = JobWorker(TestingSessionLocal, {"document.ingest": handler}, queue=queue)
+    job = queue.enqueue(db_session, "document.ingest", {"document_id": "d1"})
+    db_session.commit()
+    queue.claim(db_session, "document.ingest", 1, "dead-worker")
+    job.locked_at = datetime.now(timezone.utc) - timedelta(seconds=120)
+    db_session.commit()
+
+    worker._maintain()
+    db_session.refresh(job)
+
+    assert job.status == "failed"
+    assert failed == [{"document_id": "d1"}]
+
+
+def test_worker_runs_handlers_off_its_event_loop(db_session):
+    """Test that a blocking handler runs on its own thread and cancels on stop."""
+    queue = JobQueue()
+    loop_threads = []
+    cancelled = threading.Event()
+    started = threading.Event()
+
+    async def finishes(db, payload):
+        loop_threads.append(threading.get_ident())
+        return {"ok": True}
+
+    async def hangs(db, payload):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    worker = JobWorker(
+        TestingSessionLocal,
+        {"document.ingest": JobHandler(finishes), "document.risk_scan": JobHandler(hangs)},
+        queue=queue,
+        poll_interval=0.05,
+    )
+    done = queue.enqueue(db_session, "document.ingest", {})
+    hung = queue.enqueue(db_session, "document.risk_scan", {})
+    db_session.commit()
+
+    async def run():
+        await worker.start()
+        while not loop_threads or not started.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        await worker.stop()
+        return threading.get_ident()
+
+    main_thread = asyncio.run(run())
+
+    assert loop_threads and loop_threads[0] != main_thread
+    assert cancelled.is_set()
+    db_session.refresh(done)
+    db_session.refresh(hung)
+    assert done.status == "succeeded"
+    assert (hung.status, hung.attempts) == ("queued", 0)
@@ -0,0 +1,55 @@
+"""
+Tests for the keyword matcher.
+"""
+
+from app.services.keyword_matcher import Keyword, KeywordMatcher, KeywordMatcherCache
+
+
+def test_finds_overlapping_keywords_in_one_pass():
+    """Test that nested and overlapping keywords are all reported with positions."""
+    matcher = KeywordMatcher(
+        [
+            Keyword("financial_risk", "payment default", "substring"),
+            Keyword("financial_risk", "default", "substring"),
+            Keyword("operational", "he", "substring"),
+            Keyword("operational", "she", "substring"),
+        ]
+    )
+
+    matches = matcher.find("She missed a PAYMENT DEFAULT", offset=100)
+
+    assert matches["financial_risk"] == [
+        {"keyword": "payment default", "position": 113},
+        {"keyword": "default", "position": 121},
+    ]
+    assert matches["operational"] == [
+        {"keyword": "she", "position": 100},
+        {"keyword": "he", "position": 101},
+    ]
+
+
+def test_match_modes_respect_word_boundaries():
+    """Test that word, prefix and substring keywords differ at word edges."""
+    text = "debts, indebted; audit auditor"
+    matcher = KeywordMatcher(
+        [
+            Keyword("a", "debt", "prefix"),
+            Keyword("b", "debt", "substring"),
+            Keyword("c", "audit", "word"),
+        ]
+    )
+
+    matches = matcher.find(text)
+
+    assert [m["position"] for m in matches["a"]] == [0]
+    assert [m["position"] for m in matches["b"]] == [0, 9]
+    assert [m["position"] for m in matches["c"]] == [17]
+
+
+def test_cache_compiles_each_taxonomy_once():
+    """Test that the same keywords, in any order, share one compiled matcher."""
+    cache = KeywordMatcherCache()
+    first = cache.get([Keyword("a", "x"), Keyword("b", "y")])
+
+    assert cache.get([Keyword("b", "y"), Keyword("a", "x")]) is first
+    assert cache.get([Keyword("a", "x")]) is not first
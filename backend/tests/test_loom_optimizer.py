@@ -0,0 +1,52 @@
+"""
+Tests for constrained optimization of Loom models.
+"""
+
+import pytest
+
+from app.services.loom_optimizer import Constraint, DecisionVariable, LoomOptimizer
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+
+
+def _pricing_model():
+    return ModelEvaluator(
+        [
+            ModelNode(id="price", key="price", value="30"),
+            ModelNode(id="volume", key="volume", formula="1000 - 20 * {{price}}"),
+            ModelNode(id="profit", key="profit", formula="({{price}} - 12) * {{volume}}"),
+            ModelNode(id="cost_pct", key="cost_pct", formula="12 / {{price}} * 100"),
+        ],
+        lazy=True,
+    )
+
+
+def test_optimize_finds_unconstrained_maximum():
+    """Test that the optimizer finds the profit-maximizing price."""
+    result = LoomOptimizer(_pricing_model()).optimize(
+        "profit", [DecisionVariable("price", 10, 45)]
+    )
+    assert result.status == "converged"
+    assert result.inputs["price"] == pytest.approx(31, rel=1e-4)
+    assert result.objective_value == pytest.approx(7220)
+    assert result.trajectory
+
+
+def test_optimize_respects_constraints():
+    """Test that a binding constraint moves the optimum onto its boundary."""
+    result = LoomOptimizer(_pricing_model()).optimize(
+        "profit",
+        [DecisionVariable("price", 10, 45)],
+        [Constraint("cost_pct", lower=50)],
+    )
+    assert result.feasible
+    assert result.inputs["price"] == pytest.approx(24, rel=1e-4)
+
+
+def test_optimize_checks_every_constraint_on_the_same_variable():
+    """Test that an unreachable second bound on a variable is reported infeasible."""
+    result = LoomOptimizer(_pricing_model()).optimize(
+        "profit",
+        [DecisionVariable("price", 10, 45)],
+        [Constraint("cost_pct", upper=100), Constraint("cost_pct", upper=10)],
+    )
+    assert not result.feasible
@@ -0,0 +1,45 @@
+"""
+Tests for Loom formula profiling.
+"""
+
+from uuid import uuid4
+
+from app.services.loom_profiler import LoomProfiler, critical_path
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+
+
+def _chain_with_branch():
+    return ModelEvaluator(
+        [
+            ModelNode(id="a", key="a", value="1"),
+            ModelNode(id="b", key="b", formula="{{a}} + 1"),
+            ModelNode(id="c", key="c", formula="{{b}} + 1"),
+            ModelNode(id="d", key="d", formula="{{c}} + 1"),
+            ModelNode(id="slow", key="slow", formula="{{a}} * 2"),
+        ]
+    )
+
+
+def test_profiler_buffer_is_bounded():
+    """Test that old samples are dropped once the ring buffer is full."""
+    profiler = LoomProfiler(enabled=True, buffer_size=20)
+    project_id = uuid4()
+    evaluator = _chain_with_branch()
+    evaluator.profile = True
+    for _ in range(6):
+        evaluator.evaluate()
+        profiler.record_run(project_id, "calculate_all", evaluator, 0.01)
+
+    slowest = profiler.slowest(project_id, limit=10)
+    assert sum(entry["samples"] for entry in slowest) == 20
+    assert len(profiler.runs(project_id)) == 2
+
+
+def test_critical_path_uses_depth_and_weights():
+    """Test that the deepest chain is reported and weights pick the heaviest."""
+    evaluator = _chain_with_branch()
+    assert critical_path(evaluator)["length"] == 3
+
+    weighted = critical_path(evaluator, {"b": 1.0, "c": 1.0, "d": 1.0, "slow": 10.0})
+    assert weighted["variables"] == ["slow"]
+    assert weighted["ms"] == 10.0
@@ -0,0 +1,73 @@
+"""
+Tests for Loom variable endpoints.
+"""
+
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+
+
+def _project_with_variables(db):
+    project = Project(tenant_id=1, client_id=1, name="routes")
+    db.add(project)
+    db.commit()
+    rate = Variable(
+        project_id=project.id,
+        key="rate",
+        label="Rate",
+        value_type=ValueType.NUMBER,
+        category=VariableCategory.INPUT,
+        raw_value="10",
+    )
+    total = Variable(
+        project_id=project.id,
+        key="total",
+        label="Total",
+        value_type=ValueType.FORMULA,
+        category=VariableCategory.CALCULATION,
+        raw_value="",
+    )
+    db.add_all([rate, total])
+    db.commit()
+    return project, rate, total
+
+
+def test_set_variable_formula(api_client, db_session):
+    """Test that setting a formula validates it and stores the calculated value."""
+    project, _, total = _project_with_variables(db_session)
+
+    response = api_client.post(
+        f"/api/v1/loom/variables/{total.id}/formula", json={"formula": "{{rate}} * 2"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["formula"] == "{{rate}} * 2"
+    assert float(data["calculated_value"]) == 20
+
+
+def test_set_variable_formula_rejects_unknown_references(api_client, db_session):
+    """Test that a formula referencing a missing variable is rejected."""
+    _, _, total = _project_with_variables(db_session)
+
+    response = api_client.post(
+        f"/api/v1/loom/variables/{total.id}/formula", json={"formula": "{{missing}} * 2"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_import_variables_from_csv(api_client, db_session):
+    """Test that an uploaded CSV is imported and recalculated."""
+    project, _, _ = _project_with_variables(db_session)
+    csv = "key,label,formula\ndouble,Double,{{rate}} * 2\n"
+
+    response = api_client.post(
+        f"/api/v1/loom/projects/{project.id}/variables/import",
+        files={"file": ("model.csv", csv.encode(), "text/csv")},
+    )
+
+    assert response.status_code == 200
+    assert (response.json()["imported"], response.json()["failed"]) == (1, 0)
+    double = db_session.query(Variable).filter(Variable.key == "double").one()
+    db_session.refresh(double)
+    assert float(double.calculated_value) == 20
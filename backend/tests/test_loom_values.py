@@ -0,0 +1,55 @@
+"""
+Tests for the Loom values endpoint.
+"""
+
+from app.api.v1.routers.loom import _etag_matches
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+
+
+def test_etag_matching():
+    """Test that If-None-Match accepts lists, weak tags and the wildcard."""
+    etag = '"abc123"'
+
+    assert _etag_matches('"abc123"', etag)
+    assert _etag_matches('"other", W/"abc123"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
+    assert not _etag_matches("abc123", etag)
+
+
+def test_values_fall_back_to_raw_values(api_client, db_session):
+    """Test that inputs never calculated report their raw value."""
+    project = Project(tenant_id=1, client_id=1, name="values")
+    db_session.add(project)
+    db_session.commit()
+    db_session.add_all(
+        [
+            Variable(
+                project_id=project.id,
+                key="rate",
+                label="Rate",
+                value_type=ValueType.NUMBER,
+                category=VariableCategory.INPUT,
+                raw_value="10",
+                display_order=1,
+            ),
+            Variable(
+                project_id=project.id,
+                key="total",
+                label="Total",
+                value_type=ValueType.FORMULA,
+                category=VariableCategory.OUTPUT,
+                raw_value="",
+                formula="{{rate}} * 2",
+                calculated_value="20",
+                display_order=2,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    response = api_client.get(f"/api/v1/loom/projects/{project.id}/values")
+
+    assert response.status_code == 200
+    assert response.json() == {"rate": "10", "total": "20"}
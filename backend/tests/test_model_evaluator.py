@@ -0,0 +1,68 @@
+"""
+Tests for in-memory evaluation of Loom models.
+"""
+
+import pytest
+
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+
+
+def test_evaluate_requested_only_computes_upstream_closure():
+    """Test that lazy evaluation skips formulas the requested outputs do not need."""
+    nodes = [
+        ModelNode(id="price", key="price", value="10"),
+        ModelNode(id="volume", key="volume", value="3"),
+        ModelNode(id="revenue", key="revenue", formula="{{price}} * {{volume}}"),
+        ModelNode(id="profit", key="profit", formula="{{revenue}} - 5"),
+        ModelNode(id="side", key="side", formula="{{price}} / 0"),
+    ]
+    evaluator = ModelEvaluator(nodes, lazy=True)
+
+    results = evaluator.evaluate_requested(["profit"])
+    assert results == {"revenue": 30.0, "profit": 25.0}
+    assert "side" not in evaluator.compiled
+    assert evaluator.errors == {}
+
+
+def test_upstream_order_detects_cycles():
+    """Test that a cycle in the requested closure is rejected."""
+    nodes = [
+        ModelNode(id="a", key="a", formula="{{b}} + 1"),
+        ModelNode(id="b", key="b", formula="{{a}} + 1"),
+    ]
+    with pytest.raises(ValueError):
+        ModelEvaluator(nodes, lazy=True).upstream_order(["a"])
+
+
+def test_calculation_levels_group_formulas_by_depth():
+    """Test that each level only depends on inputs and earlier levels."""
+    nodes = [
+        ModelNode(id="a", key="a", value="1", category="inputs"),
+        ModelNode(id="b", key="b", formula="{{a}} + 1", category="calculations"),
+        ModelNode(id="c", key="c", formula="{{a}} * 2", category="calculations"),
+        ModelNode(id="d", key="d", formula="{{b}} + {{c}}", category="outputs"),
+        ModelNode(id="total", key="total", formula="sum({{category:calculations}})"),
+    ]
+
+    levels = ModelEvaluator(nodes).calculation_levels()
+
+    assert [sorted(level) for level in levels] == [["b", "c"], ["d", "total"]]
+
+
+def test_downstream_order_only_covers_dependents_of_overrides():
+    """Test that overriding an input re-evaluates just its dependents."""
+    nodes = [
+        ModelNode(id="price", key="price", value="10"),
+        ModelNode(id="volume", key="volume", value="3"),
+        ModelNode(id="revenue", key="revenue", formula="{{price}} * {{volume}}"),
+        ModelNode(id="tax", key="tax", formula="{{price}} * 0.2"),
+        ModelNode(id="profit", key="profit", formula="{{revenue}} - 5"),
+    ]
+    evaluator = ModelEvaluator(nodes)
+
+    order = evaluator.downstream_order(["volume"])
+    assert order == ["revenue", "profit"]
+    assert evaluator.evaluate(order, overrides={"volume": 4.0}) == {
+        "revenue": 40.0,
+        "profit": 35.0,
+    }
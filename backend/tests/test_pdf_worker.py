@@ -0,0 +1,43 @@
+"""
+Tests for PDF page-range extraction.
+"""
+
+import PyPDF2
+import pytest
+
+from app.tasks.pdf_worker import extract_pdf_pages, pdf_page_count
+
+
+def _blank_pdf(path, pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_extract_pdf_pages_returns_one_entry_per_page(tmp_path):
+    """Test that a range yields exactly one text per page, so ranges reassemble in order."""
+    path = tmp_path / "report.pdf"
+    _blank_pdf(path, 7)
+
+    assert extract_pdf_pages(str(path), 2, 7, seconds=30) == [""] * 5
+
+
+def test_extract_pdf_pages_refuses_work_after_the_deadline(tmp_path):
+    """Test that a range queued past the document deadline is not started."""
+    path = tmp_path / "report.pdf"
+    _blank_pdf(path, 1)
+
+    with pytest.raises(TimeoutError):
+        extract_pdf_pages(str(path), 0, 1, seconds=0)
+
+
+def test_pdf_page_count_is_bounded_by_the_deadline(tmp_path):
+    """Test that pages are counted in the worker under the same deadline."""
+    path = tmp_path / "report.pdf"
+    _blank_pdf(path, 3)
+
+    assert pdf_page_count(str(path), seconds=30) == 3
+    with pytest.raises(TimeoutError):
+        pdf_page_count(str(path), seconds=0)
@@ -0,0 +1,55 @@
+"""
+Tests for the public podium endpoint.
+"""
+
+import asyncio
+
+from app.models.podium_access import PodiumAccess
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.services.project_clone_service import ProjectCloneService
+
+
+def test_podium_view_of_copy_on_write_clone(api_client, db_session):
+    """Test that a clone's podium shows inherited variables and its own overrides."""
+    parent = Project(tenant_id=1, client_id=1, name="plant")
+    db_session.add(parent)
+    db_session.commit()
+    rate = Variable(
+        project_id=parent.id,
+        key="rate",
+        label="Rate",
+        value_type=ValueType.NUMBER,
+        category=VariableCategory.INPUT,
+        raw_value="10",
+        depends_on=[],
+    )
+    db_session.add(rate)
+    db_session.flush()
+    db_session.add(
+        Variable(
+            project_id=parent.id,
+            key="total",
+            label="Total",
+            value_type=ValueType.FORMULA,
+            category=VariableCategory.OUTPUT,
+            raw_value="",
+            formula=f"{{{{{rate.id}}}}} * 2",
+            depends_on=[rate.id],
+        )
+    )
+    db_session.commit()
+
+    clones = ProjectCloneService()
+    clone, _ = asyncio.run(clones.clone_project(db_session, parent, copy_on_write=True))
+    clones.materialize_variable(db_session, clone.id, rate).raw_value = "50"
+    db_session.add(PodiumAccess(project_id=clone.id, access_token="clone-token", is_active=True))
+    db_session.commit()
+
+    response = api_client.get("/api/v1/podium/clone-token")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(v["key"] for v in data["variables"]) == ["rate", "total"]
+    assert data["charts_data"]["variables_count"] == 2
+    assert float(data["charts_data"]["outputs"]["total"]) == 100
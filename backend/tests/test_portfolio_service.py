@@ -0,0 +1,121 @@
+"""
+Tests for portfolio rollup values.
+"""
+
+import asyncio
+
+from app.models.portfolio_rollup import PortfolioRollup, PortfolioRollupContribution
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.services.portfolio_service import PortfolioService, rollup_value, to_float
+from app.services.template_service import TemplateService
+
+
+def _projects_with_revenue(db, revenues):
+    projects = []
+    for index, revenue in enumerate(revenues):
+        project = Project(tenant_id=1, client_id=1, name=f"plant {index}")
+        db.add(project)
+        db.flush()
+        db.add(
+            Variable(
+                project_id=project.id,
+                key="revenue",
+                label="Revenue",
+                value_type=ValueType.NUMBER,
+                category=VariableCategory.OUTPUT,
+                raw_value="",
+                calculated_value=revenue,
+            )
+        )
+        projects.append(project)
+    db.commit()
+    return projects
+
+
+def test_rollup_value_from_materialized_columns():
+    """Test that each aggregate reads the right materialized column."""
+    rollup = PortfolioRollup(value_sum=60.0, value_count=3, value_min=10.0, value_max=30.0)
+    expected = {"sum": 60.0, "avg": 20.0, "min": 10.0, "max": 30.0, "count": 3.0}
+
+    for aggregate, value in expected.items():
+        rollup.aggregate = aggregate
+        assert rollup_value(rollup) == value
+
+    empty = PortfolioRollup(aggregate="avg", value_sum=0.0, value_count=0)
+    assert rollup_value(empty) is None
+
+
+def test_to_float_skips_non_numeric_values():
+    """Test that only finite numbers contribute to rollups."""
+    assert to_float("12.5") == 12.5
+    assert to_float(None) is None
+    assert to_float("") is None
+    assert to_float("n/a") is None
+    assert to_float("inf") is None
+
+
+def test_record_values_adjusts_aggregates_in_place(db_session):
+    """Test that a changed project value moves sum, count, min and max by its delta."""
+    first, second, _ = _projects_with_revenue(db_session, ["10", "20", "30"])
+    service = PortfolioService()
+    total = asyncio.run(service.create_rollup(db_session, 1, "total", "Total", "revenue", "sum"))
+    low = asyncio.run(service.create_rollup(db_session, 1, "low", "Low", "revenue", "min"))
+
+    asyncio.run(service.record_values(db_session, first.id, {"revenue": "50"}))
+    db_session.commit()
+
+    assert rollup_value(total) == 100.0
+    assert total.value_count == 3
+    assert rollup_value(low) == 20.0
+    assert db_session.get(PortfolioRollupContribution, (total.id, first.id)).value == 50.0
+
+    asyncio.run(service.record_values(db_session, second.id, {"revenue": "n/a"}))
+    db_session.commit()
+
+    assert rollup_value(total) == 80.0
+    assert total.value_count == 2
+    assert rollup_value(low) == 30.0
+    assert db_session.get(PortfolioRollupContribution, (total.id, second.id)) is None
+
+
+def test_apply_adds_and_removes_contributions(db_session):
+    """Test that applying a value to a new project adds it and None removes it."""
+    (first,) = _projects_with_revenue(db_session, ["10"])
+    project = Project(tenant_id=1, client_id=1, name="new plant")
+    db_session.add(project)
+    db_session.commit()
+    service = PortfolioService()
+    rollup = asyncio.run(service.create_rollup(db_session, 1, "top", "Top", "revenue", "max"))
+
+    service._apply(db_session, rollup, project.id, 25.0)
+    assert (rollup.value_sum, rollup.value_count, rollup.value_max) == (35.0, 2, 25.0)
+
+    service._apply(db_session, rollup, project.id, None)
+    assert (rollup.value_sum, rollup.value_count, rollup.value_max) == (10.0, 1, 10.0)
+
+    service._apply(db_session, rollup, first.id, 10.0)
+    assert (rollup.value_sum, rollup.value_count) == (10.0, 1)
+
+
+def test_applied_templates_are_rolled_up(db_session):
+    """Test that variables bulk-inserted from a template reach existing rollups."""
+    first = Project(tenant_id=1, client_id=1, name="first")
+    second = Project(tenant_id=1, client_id=1, name="second")
+    db_session.add_all([first, second])
+    db_session.commit()
+    rollup = asyncio.run(
+        PortfolioService().create_rollup(
+            db_session, 1, "revenue", "Revenue", "initial_revenue", "sum"
+        )
+    )
+    templates = TemplateService()
+
+    asyncio.run(templates.apply_template(db_session, first.id, "financial_projection"))
+    assert rollup_value(rollup) == 1_000_000.0
+
+    asyncio.run(
+        templates.apply_template_to_projects(db_session, [second.id], "financial_projection")
+    )
+    assert rollup_value(rollup) == 2_000_000.0
+    assert rollup.value_count == 2
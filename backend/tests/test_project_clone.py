@@ -0,0 +1,65 @@
+"""
+Tests for project cloning.
+"""
+
+import asyncio
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.models.project import Project
+from app.models.project_clone import ProjectCloneLink
+from app.services.model_evaluator import ModelEvaluator, ModelNode
+from app.services.project_clone_service import COPY_COLUMNS, ProjectCloneService
+
+
+def test_remap_rewrites_formula_and_dependency_ids():
+    """Test that cloned rows point at the new ids of their dependencies."""
+    old_a, old_b, new_a = uuid4(), uuid4(), uuid4()
+    row = dict.fromkeys(COPY_COLUMNS)
+    row.update(
+        key="c",
+        formula=f"{{{{{old_a}}}}} + {{{{{old_b}}}}} * {{{{rate}}}}",
+        depends_on=[old_a, old_b],
+    )
+
+    values = ProjectCloneService._remap(row, {str(old_a): new_a})
+
+    assert values["formula"] == f"{{{{{new_a}}}}} + {{{{{old_b}}}}} * {{{{rate}}}}"
+    assert values["depends_on"] == [new_a, old_b]
+    assert row["depends_on"] == [old_a, old_b]
+
+
+def test_aliases_resolve_overridden_parent_ids():
+    """Test that a clone's formulas written against parent ids use its own copies."""
+    parent_id = str(uuid4())
+    evaluator = ModelEvaluator(
+        [
+            ModelNode(id="own_a", key="a", value="10"),
+            ModelNode(id="b", key="b", formula=f"{{{{{parent_id}}}}} * 2"),
+        ],
+        aliases={parent_id: "own_a", "unknown": "missing"},
+    )
+
+    assert evaluator.evaluate() == {"b": 20}
+    assert evaluator.resolve("unknown") is None
+
+
+def test_delete_cloned_parent_drops_clone_links(api_client, db_session):
+    """Test that a project that was cloned can be deleted with its links enforced."""
+    db_session.execute(text("PRAGMA foreign_keys=ON"))
+    try:
+        parent = Project(tenant_id=1, client_id=1, name="plant")
+        db_session.add(parent)
+        db_session.commit()
+        clones = ProjectCloneService()
+        full, _ = asyncio.run(clones.clone_project(db_session, parent))
+        cow, _ = asyncio.run(clones.clone_project(db_session, parent, copy_on_write=True))
+
+        response = api_client.delete(f"/api/v1/projects/{parent.id}")
+
+        assert response.status_code == 204
+        assert db_session.query(ProjectCloneLink).count() == 0
+        assert {project.id for project in db_session.query(Project)} == {full.id, cow.id}
+    finally:
+        db_session.execute(text("PRAGMA foreign_keys=OFF"))
@@ -0,0 +1,73 @@
+"""
+Tests for tracked Loom recalculation jobs.
+"""
+
+import asyncio
+import threading
+
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.services.recalculation_jobs import RecalculationJobManager
+from tests.conftest import TestingSessionLocal
+
+
+def test_job_evaluates_off_the_event_loop_and_publishes_levels(db_session):
+    """Test that levels are evaluated in a worker thread and published in order."""
+    project = Project(tenant_id=1, client_id=1, name="recalc")
+    db_session.add(project)
+    db_session.commit()
+    db_session.add_all(
+        [
+            Variable(
+                project_id=project.id,
+                key="rate",
+                label="Rate",
+                value_type=ValueType.NUMBER,
+                category=VariableCategory.INPUT,
+                raw_value="10",
+            ),
+            Variable(
+                project_id=project.id,
+                key="double",
+                label="Double",
+                value_type=ValueType.FORMULA,
+                category=VariableCategory.CALCULATION,
+                formula="{{rate}} * 2",
+            ),
+            Variable(
+                project_id=project.id,
+                key="total",
+                label="Total",
+                value_type=ValueType.FORMULA,
+                category=VariableCategory.OUTPUT,
+                formula="{{double}} + 1",
+            ),
+        ]
+    )
+    db_session.commit()
+    threads = set()
+
+    def db_factory():
+        threads.add(threading.get_ident())
+        return TestingSessionLocal()
+
+    async def run():
+        manager = RecalculationJobManager()
+        job = manager.start(project.id, 1, db_factory)
+        events = [chunk async for chunk in manager.stream(job)]
+        return job, events
+
+    job, events = asyncio.run(run())
+
+    assert job.status == "completed"
+    assert (job.levels, job.done, job.total) == (2, 2, 2)
+    assert threading.get_ident() not in threads
+    assert [event.split("\n")[1] for event in events] == [
+        "event: started",
+        "event: level",
+        "event: level",
+        "event: completed",
+    ]
+    total = db_session.query(Variable).filter(Variable.key == "total").one()
+    db_session.refresh(total)
+    assert float(total.calculated_value) == 21
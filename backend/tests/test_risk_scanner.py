@@ -0,0 +1,90 @@
+"""
+Tests for the risk scanner's reuse of cached findings.
+"""
+
+import asyncio
+
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.models.project import Project
+from app.models.risk_keyword import RiskKeyword
+from app.services.risk_scanner import RiskKeywordService, RiskScannerService
+
+SHA256 = "ab" * 32
+FINDING = {
+    "category": "operational",
+    "severity": "high",
+    "title": "Supply delay",
+    "description": None,
+    "source_text": "shipments delayed",
+    "recommendation": None,
+}
+
+
+def _document(db, tenant_id, risk_findings):
+    project = Project(tenant_id=tenant_id, client_id=1, name="Plant")
+    db.add(project)
+    db.flush()
+    db.add(
+        DocumentBlob(
+            sha256=SHA256,
+            size=17,
+            storage_path="/tmp/blob.pdf",
+            ref_count=1,
+            extracted_text="shipments delayed",
+            risk_findings=risk_findings,
+        )
+    )
+    document = Document(
+        project_id=project.id,
+        file_name="report.pdf",
+        file_path="/tmp/blob.pdf",
+        file_type="application/pdf",
+        extracted_text="shipments delayed",
+        meta_data={"sha256": SHA256},
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+
+def test_scan_document_reuses_findings_of_the_same_taxonomy(db_session, monkeypatch):
+    """Test that a duplicate upload reuses findings cached for its taxonomy."""
+    fingerprint = RiskKeywordService().matcher().fingerprint
+    document = _document(db_session, 1, {fingerprint: [FINDING]})
+    scanner = RiskScannerService(api_key="test")
+
+    async def analyze(*args):
+        raise AssertionError("cached findings should not be analyzed again")
+
+    monkeypatch.setattr(scanner, "_analyze_with_claude", analyze)
+
+    alerts = asyncio.run(scanner.scan_document(db_session, document.id))
+
+    assert [alert.title for alert in alerts] == ["Supply delay"]
+
+
+def test_scan_document_ignores_findings_of_another_taxonomy(db_session, monkeypatch):
+    """Test that findings cached under another tenant's keywords are not reused."""
+    default_fingerprint = RiskKeywordService().matcher().fingerprint
+    document = _document(db_session, 2, {default_fingerprint: [FINDING]})
+    db_session.add(
+        RiskKeyword(tenant_id=2, category="operational", keyword="shipment", match_mode="prefix")
+    )
+    db_session.commit()
+    scanner = RiskScannerService(api_key="test")
+    analyzed = []
+
+    async def analyze(context, keyword, category):
+        analyzed.append(keyword)
+        return {"is_risk": False}
+
+    monkeypatch.setattr(scanner, "_analyze_with_claude", analyze)
+
+    alerts = asyncio.run(scanner.scan_document(db_session, document.id))
+
+    tenant_fingerprint = RiskKeywordService().matcher(db_session, document.project_id).fingerprint
+    blob = db_session.get(DocumentBlob, SHA256)
+    assert alerts == []
+    assert analyzed == ["shipment"]
+    assert blob.risk_findings == {default_fingerprint: [FINDING], tenant_fingerprint: []}
@@ -0,0 +1,142 @@
+"""
+Tests for what-if scenarios on a project.
+"""
+
+import asyncio
+
+import pytest
+
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.services.scenario_service import ScenarioService
+
+
+def _model(db):
+    """A project with rate -> double -> total and an unrelated fixed cost."""
+    project = Project(tenant_id=1, client_id=1, name="plant")
+    db.add(project)
+    db.commit()
+    rate = Variable(
+        project_id=project.id,
+        key="rate",
+        label="Rate",
+        value_type=ValueType.NUMBER,
+        category=VariableCategory.INPUT,
+        raw_value="10",
+    )
+    cost = Variable(
+        project_id=project.id,
+        key="cost",
+        label="Fixed cost",
+        value_type=ValueType.NUMBER,
+        category=VariableCategory.INPUT,
+        raw_value="3",
+    )
+    db.add_all([rate, cost])
+    db.flush()
+    double = Variable(
+        project_id=project.id,
+        key="double",
+        label="Double",
+        value_type=ValueType.FORMULA,
+        category=VariableCategory.CALCULATION,
+        formula="{{rate}} * 2",
+        calculated_value="20",
+        depends_on=[rate.id],
+    )
+    db.add(double)
+    db.flush()
+    db.add(
+        Variable(
+            project_id=project.id,
+            key="total",
+            label="Total",
+            value_type=ValueType.FORMULA,
+            category=VariableCategory.OUTPUT,
+            formula="{{double}} + 1",
+            calculated_value="21",
+            depends_on=[double.id],
+        )
+    )
+    db.commit()
+    return project, rate, cost
+
+
+def test_create_normalizes_override_references(db_session):
+    """Test that overrides given by key or label are stored by variable id."""
+    project, rate, cost = _model(db_session)
+    service = ScenarioService()
+
+    scenario = asyncio.run(
+        service.create(db_session, project.id, "high", {"rate": 50, "Fixed cost": 4})
+    )
+
+    assert scenario.overrides == {str(rate.id): 50, str(cost.id): 4}
+    with pytest.raises(ValueError, match="Variable not found"):
+        asyncio.run(service.create(db_session, project.id, "bad", {"missing": 1}))
+    with pytest.raises(ValueError, match="Override value is required"):
+        asyncio.run(service.create(db_session, project.id, "null", {"rate": None}))
+
+
+def test_update_merges_overrides_and_removes_nulls(db_session):
+    """Test that updated overrides are merged and a null value removes one."""
+    project, rate, cost = _model(db_session)
+    service = ScenarioService()
+    scenario = asyncio.run(service.create(db_session, project.id, "high", {"rate": 50}))
+    asyncio.run(service.values(db_session, scenario))
+    assert scenario.cached_results is not None
+
+    asyncio.run(service.update(db_session, scenario, overrides={"cost": 4}))
+    assert scenario.overrides == {str(rate.id): 50, str(cost.id): 4}
+    assert scenario.cached_results is None
+
+    asyncio.run(service.update(db_session, scenario, overrides={"rate": None}))
+    assert scenario.overrides == {str(cost.id): 4}
+    values = asyncio.run(service.values(db_session, scenario))
+    assert float(values["total"]) == 21
+
+
+def test_evaluate_reuses_cache_until_the_base_project_changes(db_session, monkeypatch):
+    """Test that cached results are served while the fingerprint matches."""
+    project, rate, cost = _model(db_session)
+    service = ScenarioService()
+    scenario = asyncio.run(service.create(db_session, project.id, "high", {"rate": 50}))
+
+    values = asyncio.run(service.values(db_session, scenario))
+    assert (float(values["double"]), float(values["total"])) == (100, 101)
+    fingerprint = scenario.cached_fingerprint
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached results should be reused")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("app.services.model_evaluator.ModelEvaluator.evaluate", fail)
+        assert asyncio.run(service.values(db_session, scenario)) == values
+
+    # Editing the base model invalidates the cache
+    db_session.query(Variable).filter(Variable.key == "total").one().formula = "{{double}} + 5"
+    db_session.commit()
+    values = asyncio.run(service.values(db_session, scenario))
+    assert float(values["total"]) == 105
+    assert scenario.cached_fingerprint != fingerprint
+
+
+def test_compare_lists_base_and_every_scenario(db_session):
+    """Test that compare returns base values and each scenario's values by name."""
+    project, rate, cost = _model(db_session)
+    service = ScenarioService()
+    asyncio.run(service.create(db_session, project.id, "low", {"rate": 1}))
+    asyncio.run(service.create(db_session, project.id, "high", {"rate": 50, "cost": 9}))
+
+    result = asyncio.run(service.compare(db_session, project.id, keys=["total", "cost"]))
+
+    assert list(result["scenarios"]) == ["high", "low"]
+    assert {key: float(value) for key, value in result["base"].items()} == {
+        "total": 21,
+        "cost": 3,
+    }
+    assert {key: float(value) for key, value in result["scenarios"]["high"].items()} == {
+        "total": 101,
+        "cost": 9,
+    }
+    assert float(result["scenarios"]["low"]["total"]) == 3
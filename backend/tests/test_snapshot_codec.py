@@ -0,0 +1,53 @@
+"""
+Tests for compact version snapshot and delta encoding.
+"""
+
+from app.services import snapshot_codec
+
+
+def _row(key, raw_value):
+    return {"key": key, "label": key.title(), "raw_value": raw_value}
+
+
+def test_snapshot_roundtrip():
+    """Test that a columnar snapshot decodes to the original state."""
+    state = {"a": _row("a", "1"), "b": _row("b", "2")}
+    blob = snapshot_codec.encode_snapshot(state)
+    decoded = snapshot_codec.decode_snapshot(blob)
+    assert decoded["a"]["raw_value"] == "1"
+    assert decoded["b"]["key"] == "b"
+
+
+def test_diff_and_apply_delta():
+    """Test that applying a diff turns the old state into the new one."""
+    old = {"a": _row("a", "1"), "b": _row("b", "2")}
+    new = {"a": _row("a", "5"), "c": _row("c", "3")}
+    delta = snapshot_codec.diff_states(old, new)
+    assert delta["changed"] == {"a": {"raw_value": "5"}}
+    assert list(delta["added"]) == ["c"]
+    assert delta["removed"] == ["b"]
+
+    restored = snapshot_codec.apply_delta({k: dict(v) for k, v in old.items()}, delta)
+    assert restored == new
+
+
+def test_compose_deltas_matches_direct_diff():
+    """Test that composed deltas equal the diff between the end states."""
+    v1 = {"a": _row("a", "1"), "b": _row("b", "2")}
+    v2 = {"a": _row("a", "2"), "c": _row("c", "3")}
+    v3 = {"a": _row("a", "3"), "b": _row("b", "2")}
+
+    composed = snapshot_codec.compose_deltas(
+        [snapshot_codec.diff_states(v1, v2), snapshot_codec.diff_states(v2, v3)]
+    )
+    assert composed["removed"] == []
+    assert composed["added"] == {}
+    # "b" was removed and re-added, so it is reported as changed
+    assert set(composed["changed"]) == {"a", "b"}
+    assert snapshot_codec.apply_delta({k: dict(v) for k, v in v1.items()}, composed) == v3
+
+
+def test_encode_values_round_trip():
+    """Test that value maps survive encoding, including missing values."""
+    values = {"a": "1.5", "b": None, "c": "text"}
+    assert snapshot_codec.decode_values(snapshot_codec.encode_values(values)) == values
@@ -0,0 +1,84 @@
+"""
+Tests for the in-process catalog of compiled templates.
+"""
+
+import pytest
+from sqlalchemy import update
+
+from app.models.model_template import ModelTemplate
+from app.services import template_catalog as catalog_module
+from app.services.template_catalog import TemplateCatalog
+from app.services.template_service import template_catalog
+
+
+def _variables(rate):
+    return [
+        {"key": "rate", "label": "Rate", "value_type": "number", "raw_value": rate},
+        {"key": "double", "label": "Double", "value_type": "formula", "formula": "{{rate}} * 2"},
+    ]
+
+
+def _no_compile(*args, **kwargs):
+    raise AssertionError("template should not be compiled again")
+
+
+def test_warm_compiles_builtin_templates_once(monkeypatch):
+    """Test that warmed built-in templates are served without compiling on request."""
+    catalog = TemplateCatalog({"pricing": {"name": "Pricing", "variables": _variables("10")}})
+
+    catalog.warm()
+    monkeypatch.setattr(catalog, "_compile", _no_compile)
+    compiled = catalog.get(None, "pricing")
+
+    assert compiled.order == ("rate", "double")
+    assert compiled.depends_on == {"rate": (), "double": ("rate",)}
+    assert float(compiled.default_values["double"]) == 20
+    assert catalog.get(None, "pricing") is compiled
+
+
+def test_stored_template_is_recompiled_after_update_and_gone_after_delete(db_session):
+    """Test that the ORM listeners drop the compiled copy of a changed row."""
+    template = ModelTemplate(name="Pricing", variables_schema=_variables("10"))
+    db_session.add(template)
+    db_session.commit()
+    template_id = str(template.id)
+    assert float(template_catalog.get(db_session, template_id).default_values["double"]) == 20
+
+    template.variables_schema = _variables("7")
+    db_session.commit()
+    assert float(template_catalog.get(db_session, template_id).default_values["double"]) == 14
+
+    db_session.delete(template)
+    db_session.commit()
+    with pytest.raises(ValueError, match="Template not found"):
+        template_catalog.get(db_session, template_id)
+
+
+def test_stored_template_expires_after_ttl(db_session, monkeypatch):
+    """Test that changes the listeners never saw are picked up once the TTL passes."""
+    clock = [1000.0]
+    monkeypatch.setattr(catalog_module.time, "monotonic", lambda: clock[0])
+    catalog = TemplateCatalog({})
+    template = ModelTemplate(name="Pricing", variables_schema=_variables("10"))
+    db_session.add(template)
+    db_session.commit()
+    template_id = str(template.id)
+    first = catalog.get(db_session, template_id)
+
+    # Unchanged after the TTL: renewed without recompiling
+    clock[0] += catalog.DB_TEMPLATE_TTL_SECONDS
+    with monkeypatch.context() as patch:
+        patch.setattr(catalog, "_compile", _no_compile)
+        renewed = catalog.get(db_session, template_id)
+    assert (renewed.fingerprint, renewed.compiled_at) == (first.fingerprint, clock[0])
+
+    # Changed by another worker: served stale until the TTL passes
+    db_session.execute(
+        update(ModelTemplate)
+        .where(ModelTemplate.id == template.id)
+        .values(variables_schema=_variables("7"))
+    )
+    db_session.commit()
+    assert catalog.get(db_session, template_id) is renewed
+    clock[0] += catalog.DB_TEMPLATE_TTL_SECONDS
+    assert float(catalog.get(db_session, template_id).default_values["double"]) == 14
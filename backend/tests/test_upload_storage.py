@@ -0,0 +1,42 @@
+"""
+Tests for streaming upload storage.
+"""
+
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.upload_storage import UploadTooLargeError, safe_filename, save_upload
+
+
+def test_save_upload_streams_and_hashes(tmp_path):
+    """Test that an upload is written in chunks with its SHA-256."""
+    data = b"x" * 10_000
+    upload = UploadFile(io.BytesIO(data), filename="report.pdf")
+
+    stored = asyncio.run(save_upload(upload, tmp_path / "report.pdf", max_bytes=20_000, chunk_size=1024))
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "report.pdf").read_bytes() == data
+
+
+def test_save_upload_rejects_oversized_files_without_leftovers(tmp_path):
+    """Test that exceeding the limit aborts the upload and removes the partial file."""
+    upload = UploadFile(io.BytesIO(b"x" * 5000), filename="big.pdf")
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(upload, tmp_path / "big.pdf", max_bytes=4096, chunk_size=1024))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_safe_filename_strips_directories():
+    """Test that client file names cannot point outside the upload directory."""
+    assert safe_filename("../../etc/passwd") == "passwd"
+    assert safe_filename("C:\\docs\\plan.pdf") == "plan.pdf"
+    with pytest.raises(ValueError):
+        safe_filename("..")
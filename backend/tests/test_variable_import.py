@@ -0,0 +1,48 @@
+"""
+Tests for spreadsheet variable import.
+"""
+
+import io
+from uuid import uuid4
+
+import pytest
+
+from app.services.variable_import import VariableImportService
+
+
+def test_iter_rows_normalizes_headers_and_skips_blank_rows():
+    """Test that CSV rows are read lazily with normalized column names."""
+    stream = io.BytesIO(
+        "\ufeffKey,Label,Value,Formula\nrevenue,Revenue,100,\n,,,\ntotal,Total,,{{revenue}} * 2\n".encode()
+    )
+
+    rows = list(VariableImportService().iter_rows(stream, "model.csv"))
+
+    assert rows == [
+        (2, {"key": "revenue", "label": "Revenue", "raw_value": "100"}),
+        (4, {"key": "total", "label": "Total", "formula": "{{revenue}} * 2"}),
+    ]
+
+
+def test_build_row_reports_invalid_rows():
+    """Test that invalid rows raise ValueError instead of aborting the import."""
+    service = VariableImportService()
+    project_id = uuid4()
+
+    values, refs = service._build_row(
+        project_id, {"key": "total", "formula": "{{revenue}} + {{category:inputs}}"}, 3
+    )
+    assert values["value_type"].value == "formula"
+    assert values["label"] == "total"
+    assert refs == ["revenue"]
+
+    with pytest.raises(ValueError):
+        service._build_row(project_id, {"key": "x", "formula": "{{revenue}} +"}, 4)
+    with pytest.raises(ValueError, match="category"):
+        service._build_row(project_id, {"key": "x", "category": "unknown"}, 5)
+
+
+def test_unsupported_file_type():
+    """Test that only CSV and XLSX files are accepted."""
+    with pytest.raises(ValueError, match="Unsupported file type"):
+        list(VariableImportService().iter_rows(io.BytesIO(b"key\n"), "model.txt"))
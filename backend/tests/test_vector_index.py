@@ -0,0 +1,76 @@
+"""
+Tests for hashing embeddings and the memory-mapped vector index.
+"""
+
+import threading
+from uuid import uuid4
+
+import numpy as np
+
+from app.ml.embeddings import HashingEmbedder
+from app.ml.vector_index import VectorIndex
+
+
+def test_hashing_embedder_places_inflections_close():
+    """Test that related wording scores higher than unrelated text."""
+    vectors = HashingEmbedder(dim=256).embed(
+        ["termination of the supply contract", "the contract was terminated", "yellow bananas"]
+    )
+
+    assert vectors.shape == (3, 256)
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_vector_index_appends_and_searches_in_blocks(tmp_path):
+    """Test that batched queries find their nearest ids across appends and blocks."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [uuid4() for _ in range(50)]
+    index = VectorIndex(tmp_path / "chunks.vec", dim=16)
+    index.BLOCK_ROWS = 8
+
+    index.append(ids[:30], vectors[:30])
+    index.append(ids[30:], vectors[30:])
+    results = index.search(vectors[[3, 42]], k=4)
+
+    assert len(index) == 50
+    assert [hits[0][0] for hits in results] == [ids[3], ids[42]]
+    assert all(len(hits) == 4 for hits in results)
+    assert results[0][0][1] >= results[0][1][1]
+
+
+def test_vector_index_compact_keeps_live_ids(tmp_path):
+    """Test that compaction drops unknown ids and keeps the rest searchable."""
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((20, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [uuid4() for _ in range(20)]
+    index = VectorIndex(tmp_path / "chunks.vec", dim=16)
+    index.BLOCK_ROWS = 8
+    index.append(ids, vectors)
+
+    dropped = index.compact(set(ids[::2]))
+
+    assert (dropped, len(index)) == (10, 10)
+    assert [hits[0][0] for hits in index.search(vectors[[4, 18]], k=1)] == [ids[4], ids[18]]
+    assert {hit[0] for hit in index.search(vectors[[0]], k=20)[0]} == set(ids[::2])
+
+
+def test_vector_index_appends_wait_for_the_lock(tmp_path):
+    """Test that an append blocks while compaction (or another writer) holds the lock."""
+    index = VectorIndex(tmp_path / "chunks.vec", dim=4)
+    vectors = np.eye(4, dtype=np.float32)[:1]
+
+    with index._locked():
+        writer = threading.Thread(target=index.append, args=([uuid4()], vectors))
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert len(index) == 0
+    writer.join(5)
+
+    assert not writer.is_alive()
+    assert len(index) == 1
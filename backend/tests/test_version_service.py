@@ -0,0 +1,109 @@
+"""
+Tests for saving and restoring project versions.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from app.models.project import Project
+from app.models.variable import ValueType, Variable, VariableCategory
+from app.models.variable_value_history import VariableValueHistory
+from app.services import snapshot_codec
+from app.services.portfolio_service import PortfolioService, rollup_value
+from app.services.value_history import ValueHistoryService
+from app.services.version_service import VersionService
+
+
+def _project_with_revenue(db, revenue):
+    project = Project(tenant_id=1, client_id=1, name="plant")
+    db.add(project)
+    db.flush()
+    variable = Variable(
+        project_id=project.id,
+        key="revenue",
+        label="Revenue",
+        value_type=ValueType.FORMULA,
+        category=VariableCategory.OUTPUT,
+        raw_value="",
+        formula="1 + 1",
+        calculated_value=revenue,
+    )
+    db.add(variable)
+    db.commit()
+    return project, variable
+
+
+def test_restore_version_refreshes_rollups(db_session):
+    """Test that restored values replace the project's rollup contributions."""
+    project, variable = _project_with_revenue(db_session, "100")
+    rollup = asyncio.run(
+        PortfolioService().create_rollup(db_session, 1, "revenue", "Revenue", "revenue")
+    )
+    service = VersionService()
+    version = asyncio.run(service.save_version(db_session, project.id))
+    variable.calculated_value = "250"
+    db_session.commit()
+    asyncio.run(PortfolioService().refresh(db_session, rollup))
+    assert rollup_value(rollup) == 250.0
+
+    asyncio.run(service.restore_version(db_session, project.id, version.id))
+
+    assert rollup_value(rollup) == 100.0
+
+
+def test_restore_version_records_restored_values(db_session):
+    """Test that restored calculated values are appended to the value history."""
+    project, variable = _project_with_revenue(db_session, "100")
+    service = VersionService()
+    version = asyncio.run(service.save_version(db_session, project.id))
+    variable.calculated_value = "250"
+    db_session.commit()
+
+    asyncio.run(service.restore_version(db_session, project.id, version.id))
+
+    history = ValueHistoryService()
+    now = datetime.now(timezone.utc)
+    values = asyncio.run(history.values_as_of(db_session, project.id, now))
+    assert values == {str(variable.id): "100"}
+    rows = (
+        db_session.query(VariableValueHistory)
+        .order_by(VariableValueHistory.is_checkpoint.desc())
+        .all()
+    )
+    # Baseline before the restore, then the restored value
+    assert [snapshot_codec.decode_values(row.payload) for row in rows] == [
+        {str(variable.id): "250"},
+        {str(variable.id): "100"},
+    ]
+
+
+def test_diff_versions_honours_the_requested_direction(db_session):
+    """Test that a reverse diff turns the later version back into the earlier one."""
+    project, variable = _project_with_revenue(db_session, "100")
+    service = VersionService()
+    asyncio.run(service.save_version(db_session, project.id))
+    variable.calculated_value = "250"
+    db_session.add(
+        Variable(
+            project_id=project.id,
+            key="cost",
+            label="Cost",
+            value_type=ValueType.NUMBER,
+            category=VariableCategory.INPUT,
+            raw_value="5",
+        )
+    )
+    db_session.commit()
+    asyncio.run(service.save_version(db_session, project.id))
+
+    forward = asyncio.run(service.diff_versions(db_session, project.id, 1, 2))
+    reverse = asyncio.run(service.diff_versions(db_session, project.id, 2, 1))
+
+    assert (reverse["from_version"], reverse["to_version"]) == (2, 1)
+    assert reverse["removed"] == list(forward["added"])
+    assert reverse["changed"] == {str(variable.id): {"calculated_value": "100"}}
+    later = service._materialize_state(db_session, project.id, 2)
+    delta = {key: reverse[key] for key in ("added", "changed", "removed")}
+    assert snapshot_codec.apply_delta(later, delta) == service._materialize_state(
+        db_session, project.id, 1
+    )